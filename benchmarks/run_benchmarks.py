@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmarks für die Migrations-Pipeline
+Misst Wall-Zeit, CPU-Zeit und Spitzenspeicher je Stufe gegen den
+deCONZ-Simulator und vergleicht mit einer gespeicherten Baseline
+
+    python3 benchmarks/run_benchmarks.py                  # messen und vergleichen
+    python3 benchmarks/run_benchmarks.py --save-baseline  # Baseline aktualisieren
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent / "bin"))
+
+from deconz_client import configure_cache
+from deconz_simulator import DeconzSimulator, generate_fleet
+from final_interactive import create_zigbee2mqtt_config, get_devices, save_config, show_summary
+
+API_KEY = "BENCHMARK"
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+BASELINE_FILE = BENCHMARK_DIR / "baseline.json"
+RESULTS_FILE = BENCHMARK_DIR / "results.json"
+
+# Kleinere Änderungen gelten unabhängig vom Prozentsatz nicht als Regression
+MIN_DELTA = {'wall_ms': 5.0, 'cpu_ms': 5.0, 'peak_kib': 256.0}
+
+
+def pipeline_stages():
+    """Stufen der Pipeline: (Name, Funktion(ctx)). Jede Stufe legt ihr Ergebnis in ctx ab.
+
+    Schnellere Varianten werden hier als zusätzliche Stufen eingetragen,
+    damit sie mit denselben Daten gemessen werden.
+    """
+    return [
+        ("get_devices", lambda ctx: ctx.update(
+            devices=get_devices(ctx['host'], ctx['port'], API_KEY))),
+        ("create_zigbee2mqtt_config", lambda ctx: ctx.update(
+            config=create_zigbee2mqtt_config(ctx['devices'], ctx['network_config'],
+                                             "mqtt://localhost", "zigbee2mqtt"))),
+        ("save_config", lambda ctx: save_config(ctx['config'], ctx['output'])),
+        ("show_summary", lambda ctx: show_summary(ctx['devices'], ctx['network_config'])),
+    ]
+
+
+def _network_config(fleet):
+    config = fleet['config']
+    return {
+        'channel': config['zigbeechannel'],
+        'pan_id': config['panid'],
+        'ext_pan_id': config['extpanid'],
+        'network_key': config['networkkey'],
+        'name': config['name'],
+        'version': config['swversion']
+    }
+
+
+def run_pipeline(ctx, measure_memory=False):
+    """Führe alle Stufen einmal aus. Gibt je Stufe die Messwerte zurück."""
+    results = {}
+    for name, stage in pipeline_stages():
+        if measure_memory:
+            tracemalloc.start()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            stage(ctx)
+        results[name] = {
+            'wall': time.perf_counter() - wall,
+            'cpu': time.process_time() - cpu
+        }
+        if measure_memory:
+            results[name]['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return results
+
+
+def benchmark_size(size, repeat):
+    """Miss die Pipeline für eine Installation mit `size` Ressourcen."""
+    fleet = generate_fleet(size, seed=size)
+    with DeconzSimulator(fleet, api_keys=[API_KEY]) as simulator, \
+            tempfile.TemporaryDirectory() as workdir:
+        ctx = {
+            'host': simulator.host,
+            'port': simulator.port,
+            'network_config': _network_config(fleet),
+            'output': str(Path(workdir) / "configuration.yaml")
+        }
+        # Aufwärmen (Verbindungsaufbau, Caches im Simulator)
+        run_pipeline(dict(ctx))
+        runs = [run_pipeline(dict(ctx)) for _ in range(repeat)]
+        # Speicher separat messen, tracemalloc verfälscht die Zeiten
+        memory = run_pipeline(dict(ctx), measure_memory=True)
+
+    # Minimum statt Median: Störungen durch andere Prozesse verlängern Läufe nur
+    stages = {}
+    for name in runs[0]:
+        stages[name] = {
+            'wall_ms': round(min(run[name]['wall'] for run in runs) * 1000, 3),
+            'cpu_ms': round(min(run[name]['cpu'] for run in runs) * 1000, 3),
+            'peak_kib': round(memory[name]['peak_bytes'] / 1024, 1)
+        }
+    return stages
+
+
+def compare(results, baseline, threshold, memory_threshold=None):
+    """Vergleiche mit der Baseline. Gibt die Liste der Regressionen zurück.
+
+    Eine Regression muss sowohl den relativen Schwellwert (`memory_threshold`
+    für peak_kib) als auch die absolute Mindestdifferenz aus MIN_DELTA
+    überschreiten.
+    """
+    if memory_threshold is None:
+        memory_threshold = threshold
+    regressions = []
+    for size, stages in results['sizes'].items():
+        for name, current in stages.items():
+            reference = baseline.get('sizes', {}).get(size, {}).get(name)
+            if not reference:
+                continue
+            for metric in ('wall_ms', 'cpu_ms', 'peak_kib'):
+                before, after = reference.get(metric), current.get(metric)
+                # Sehr kleine Werte schwanken zu stark für einen prozentualen Vergleich
+                if not before or before < 1 or after - before < MIN_DELTA[metric]:
+                    continue
+                change = (after - before) / before
+                if change > (memory_threshold if metric == 'peak_kib' else threshold):
+                    regressions.append((size, name, metric, before, after, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks der Migrations-Pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Anzahl Ressourcen je Lauf (Standard: 100 1000 10000 50000)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Wiederholungen je Größe, gewertet wird der schnellste Lauf (Standard: 5)")
+    parser.add_argument("--output", default=str(RESULTS_FILE), help="Ergebnisdatei (JSON)")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE), help="Baseline-Datei (JSON)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Erlaubte Verschlechterung der Zeiten (Standard: 0.25 = 25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.5,
+                        help="Erlaubte Verschlechterung des Spitzenspeichers (Standard: 0.5 = 50%%)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Ergebnis als neue Baseline speichern")
+    args = parser.parse_args(argv)
+
+    # Jede Wiederholung soll die Geräte wirklich vom Gateway laden
+    configure_cache(0)
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.machine()},
+        'sizes': {}
+    }
+
+    print("⏱️  Benchmark der Migrations-Pipeline")
+    print("=" * 72)
+    print(f"{'Ressourcen':>10}  {'Stufe':<28}{'Wall ms':>10}{'CPU ms':>10}{'Peak KiB':>12}")
+    print("-" * 72)
+    for size in args.sizes:
+        stages = benchmark_size(size, args.repeat)
+        results['sizes'][str(size)] = stages
+        for name, values in stages.items():
+            print(f"{size:>10}  {name:<28}{values['wall_ms']:>10.1f}"
+                  f"{values['cpu_ms']:>10.1f}{values['peak_kib']:>12.1f}")
+    print("=" * 72)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"📁 Ergebnisse: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline gespeichert: {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print("💡 Keine Baseline vorhanden, erzeuge eine mit --save-baseline")
+        return
+
+    if baseline.get('machine') != results['machine']:
+        print("⚠️  Baseline stammt von einer anderen Umgebung, Vergleich nur eingeschränkt aussagekräftig")
+
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+    limits = f"{args.threshold:.0%} Zeit / {args.memory_threshold:.0%} Speicher"
+    if not regressions:
+        print(f"✅ Keine Regression über {limits} gegenüber der Baseline")
+        return
+
+    print(f"❌ {len(regressions)} Regression(en) über {limits}:")
+    for size, name, metric, before, after, change in regressions:
+        print(f"   - {size} Ressourcen, {name}, {metric}: {before} -> {after} (+{change:.0%})")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
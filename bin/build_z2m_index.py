@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Erzeugt bin/data/z2m_devices.tsv aus zigbee-herdsman-converters
+Liest alle Zigbee2MQTT-Definitionen (zigbeeModel, Fingerprints und
+White-Label-Varianten) über Node.js oder aus einer JSON-Datei und schreibt
+je (manufacturername, modelid) eine Zeile für bin/compatibility.py
+
+Beispiel:
+    npm install zigbee-herdsman-converters
+    python3 bin/build_z2m_index.py --package node_modules/zigbee-herdsman-converters
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from compatibility import COLUMNS, DATA_FILE, compile_index
+
+PACKAGE = "zigbee-herdsman-converters"
+
+# Gibt die benötigten Felder aller Definitionen als JSON aus; ältere Versionen
+# exportieren `definitions`, neuere zusätzlich getDefinitions()
+DUMP_SCRIPT = r"""
+const target = process.argv[1];
+const zhc = require(target);
+let version = null;
+try { version = require(target + '/package.json').version; } catch (e) {}
+const fingerprints = (list) => (list || []).filter((f) => f.modelID)
+    .map((f) => ({modelID: f.modelID, manufacturerName: f.manufacturerName || ''}));
+Promise.resolve(zhc.definitions || (zhc.getDefinitions && zhc.getDefinitions()) || [])
+    .then((definitions) => {
+        process.stdout.write(JSON.stringify({version, definitions: definitions.map((d) => ({
+            zigbeeModel: d.zigbeeModel || [], model: d.model, vendor: d.vendor,
+            description: d.description, fingerprint: fingerprints(d.fingerprint),
+            whiteLabel: (d.whiteLabel || []).map((w) => ({
+                model: w.model, vendor: w.vendor || d.vendor, description: w.description || d.description,
+                fingerprint: fingerprints(w.fingerprint)})),
+        }))}));
+    });
+"""
+
+
+def load_from_package(package=PACKAGE, node="node"):
+    """Definitionen über Node.js aus dem installierten Paket.
+
+    Returns:
+        (Definitionen, Version oder None)
+    """
+    target = os.path.abspath(package) if os.path.exists(package) else package
+    result = subprocess.run([node, "-e", DUMP_SCRIPT, target], capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        # Nur die Fehlerzeile, nicht den Stacktrace
+        raise RuntimeError(next((line for line in lines if 'Error' in line), None)
+                           or f"node beendet mit Code {result.returncode}")
+    data = json.loads(result.stdout)
+    return data['definitions'], data.get('version')
+
+
+def load_from_file(filename):
+    """Definitionen aus einer JSON-Datei (Liste oder {'definitions': [...], 'version': ...})."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data, None
+    return data['definitions'], data.get('version')
+
+
+def _clean(value):
+    # Tabs und Zeilenumbrüche würden die TSV-Zeile zerlegen
+    return " ".join(str(value or '').split())
+
+
+def index_rows(definitions):
+    """Zeilen (manufacturer, modelid, model, vendor, description), je Schlüssel die erste Definition.
+
+    zigbeeModel gilt für jeden Hersteller (leere Spalte), Fingerprints nur
+    für ihren manufacturerName; White-Label-Varianten mit eigenem
+    Fingerprint erhalten ihr eigenes Modell.
+    """
+    rows = {}
+
+    def add(manufacturer, modelid, model, vendor, description):
+        modelid = _clean(modelid)
+        key = (_clean(manufacturer).casefold(), modelid)
+        if modelid and model and key not in rows:
+            rows[key] = (_clean(manufacturer), modelid, _clean(model), _clean(vendor), _clean(description))
+
+    for definition in definitions:
+        model, vendor, description = definition.get('model'), definition.get('vendor'), definition.get('description')
+        for white_label in definition.get('whiteLabel') or []:
+            for fingerprint in white_label.get('fingerprint') or []:
+                add(fingerprint.get('manufacturerName'), fingerprint.get('modelID'), white_label.get('model'),
+                    white_label.get('vendor') or vendor, white_label.get('description') or description)
+        for fingerprint in definition.get('fingerprint') or []:
+            add(fingerprint.get('manufacturerName'), fingerprint.get('modelID'), model, vendor, description)
+        for zigbee_model in definition.get('zigbeeModel') or []:
+            add('', zigbee_model, model, vendor, description)
+    return sorted(rows.values(), key=lambda row: (row[1].casefold(), row[0].casefold()))
+
+
+def write_index(rows, filename=DATA_FILE, source=PACKAGE, version=None):
+    """Schreibe die TSV-Datei atomar."""
+    tmp_file = f"{filename}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8', newline='') as f:
+        f.write("# deCONZ-Geräte mit Zigbee2MQTT-Definition, erzeugt von bin/build_z2m_index.py\n")
+        f.write(f"# Quelle: {source}{' ' + version if version else ''}, "
+                f"{time.strftime('%Y-%m-%d')}, {len(rows)} Einträge\n")
+        f.write("# Spalten: manufacturername (leer = jeder Hersteller), modelid, Z2M-Modell, "
+                "Hersteller, Beschreibung\n")
+        f.write("# Wird beim ersten Zugriff nach SQLite übersetzt (bin/compatibility.py)\n")
+        for row in [COLUMNS] + rows:
+            f.write("\t".join(row) + "\n")
+    os.replace(tmp_file, filename)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Zigbee2MQTT-Index (bin/data/z2m_devices.tsv) aus zigbee-herdsman-converters erzeugen"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--package", default=PACKAGE,
+                        help=f"Pfad oder Name des npm-Pakets (Standard: {PACKAGE}, benötigt node)")
+    source.add_argument("--definitions", metavar="DATEI", help="Definitionen aus JSON-Datei statt Node.js")
+    parser.add_argument("--node", default="node", help="Node.js-Programm (Standard: node)")
+    parser.add_argument("--output", default=DATA_FILE, help=f"Zieldatei (Standard: {DATA_FILE})")
+    parser.add_argument("--no-compile", action="store_true", help="SQLite-Cache nicht neu erzeugen")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.definitions:
+            definitions, version = load_from_file(args.definitions)
+            label = os.path.basename(args.definitions)
+        else:
+            definitions, version = load_from_package(args.package, args.node)
+            label = PACKAGE
+    except (OSError, ValueError, KeyError, RuntimeError) as e:
+        print(f"❌ Definitionen nicht lesbar: {e}")
+        sys.exit(2)
+
+    rows = index_rows(definitions)
+    if not rows:
+        print(f"❌ Keine Definitionen gefunden ({len(definitions)} gelesen)")
+        sys.exit(1)
+    write_index(rows, args.output, label, version)
+    print(f"✅ {len(rows)} Einträge aus {len(definitions)} Definitionen → {args.output}")
+    if not args.no_compile and os.path.abspath(args.output) == os.path.abspath(DATA_FILE):
+        print(f"✅ SQLite-Index neu erzeugt ({compile_index()} Einträge)")
+
+
+if __name__ == "__main__":
+    main()
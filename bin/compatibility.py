@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Zigbee2MQTT-Kompatibilität der deCONZ-Geräte
+Ordnet (manufacturername, modelid) einer Zigbee2MQTT-Definition zu, damit
+fragliche Geräte vor dem Neu-Anlernen auffallen. Quellen sind
+bin/data/z2m_devices.tsv (aus zigbee-herdsman-converters erzeugt, siehe
+build_z2m_index.py) und bin/data/z2m_unsupported.tsv (gepflegte Liste
+nicht unterstützter Geräte); beim ersten Zugriff wird daraus eine
+SQLite-Datenbank im Cache erzeugt. Fehlt ein Gerät in beiden, ist seine
+Unterstützung unbekannt
+"""
+
+import argparse
+import csv
+import heapq
+import os
+import re
+import sqlite3
+import sys
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+
+from snapshot import SNAPSHOT_FILE, load_snapshot
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATA_FILE = os.path.join(DATA_DIR, "z2m_devices.tsv")
+UNSUPPORTED_FILE = os.path.join(DATA_DIR, "z2m_unsupported.tsv")
+
+DATABASE = os.environ.get(
+    "DECONZ_COMPAT_DB",
+    os.path.join(os.path.expanduser("~"), ".cache", "deconz-to-zigbee2mqtt", "z2m_devices.sqlite")
+)
+
+# Spalten der Quelldateien; in z2m_unsupported.tsv ist description der Grund
+COLUMNS = ('manufacturer', 'modelid', 'model', 'vendor', 'description')
+UNSUPPORTED_COLUMNS = ('manufacturer', 'modelid', 'description')
+
+# Aufbau der Datenbank; eine Änderung erzwingt die Neuübersetzung
+SCHEMA = 2
+
+# Ähnliche Modelle: Mindestwert (Dice-Koeffizient der Trigramme) und Anzahl
+MIN_SIMILARITY = 0.4
+CANDIDATES = 3
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def _signature(*sources):
+    """Kennung des Quellstands; ändert sich eine Datei, wird neu übersetzt."""
+    stats = [os.stat(source) for source in sources]
+    return ":".join([str(SCHEMA)] + [f"{stat.st_size}:{stat.st_mtime_ns}" for stat in stats])
+
+
+def trigrams(text):
+    """Trigramme einer modelid; Satzzeichen und Groß-/Kleinschreibung zählen nicht."""
+    text = f"  {_SEPARATORS.sub(' ', text.casefold()).strip()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def read_source(source=DATA_FILE, columns=COLUMNS):
+    """Zeilen der TSV-Datei als Dictionaries (Kommentare mit # werden übersprungen)."""
+    with open(source, 'r', encoding='utf-8', newline='') as f:
+        lines = (line for line in f if line.strip() and not line.startswith('#'))
+        # Ohne Quoting: Beschreibungen wie 'Hue "Go"' bleiben unverändert
+        reader = csv.DictReader(lines, delimiter='\t', quoting=csv.QUOTE_NONE)
+        missing = set(columns) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{source}: Spalten fehlen: {', '.join(sorted(missing))}")
+        return [row for row in reader if row['modelid']]
+
+
+def _fill(connection, source, unsupported):
+    rows = read_source(source)
+    blocked = read_source(unsupported, UNSUPPORTED_COLUMNS)
+    connection.executescript("""
+        CREATE TABLE devices (manufacturer TEXT, modelid TEXT, model TEXT, vendor TEXT,
+                              description TEXT, supported INTEGER,
+                              PRIMARY KEY (modelid, manufacturer)) WITHOUT ROWID;
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+    """)
+    connection.executemany(
+        "INSERT OR REPLACE INTO devices VALUES (?, ?, ?, ?, ?, 1)",
+        [(row['manufacturer'].strip().casefold(), row['modelid'].strip(), row['model'],
+          row['vendor'], row['description']) for row in rows])
+    # Eine Zigbee2MQTT-Definition hat Vorrang vor der gepflegten Liste
+    connection.executemany(
+        "INSERT OR IGNORE INTO devices VALUES (?, ?, NULL, NULL, ?, 0)",
+        [(row['manufacturer'].strip().casefold(), row['modelid'].strip(), row['description'])
+         for row in blocked])
+    connection.execute("INSERT INTO meta VALUES ('source', ?)", (_signature(source, unsupported),))
+    connection.commit()
+    return len(rows) + len(blocked)
+
+
+def compile_index(source=DATA_FILE, database=DATABASE, unsupported=UNSUPPORTED_FILE):
+    """Übersetze die TSV-Dateien in eine SQLite-Datenbank (atomar ersetzt).
+
+    Returns:
+        Anzahl der Einträge
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+    tmp_file = f"{database}.{os.getpid()}.tmp"
+    connection = sqlite3.connect(tmp_file)
+    try:
+        count = _fill(connection, source, unsupported)
+    except BaseException:
+        connection.close()
+        os.remove(tmp_file)
+        raise
+    connection.close()
+    os.replace(tmp_file, database)
+    return count
+
+
+class CompatibilityIndex:
+    """Nachschlagen von Zigbee2MQTT-Definitionen.
+
+    Die Datenbank wird erst beim ersten lookup() geöffnet (und bei Bedarf
+    neu übersetzt); Ergebnisse liegen in einem LRU-Cache, sodass gleiche
+    Modelle großer Installationen nur einmal abgefragt werden.
+    """
+
+    def __init__(self, database=DATABASE, source=DATA_FILE, unsupported=UNSUPPORTED_FILE,
+                 cache_size=1024):
+        self.database = database
+        self.source = source
+        self.unsupported = unsupported
+        self._connection = None
+        self._trigrams = None
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+        # Je unterschiedlicher modelid nur einmal rechnen (wenige Tausend Einträge)
+        self.candidates = lru_cache(maxsize=None)(self._candidates)
+
+    def _open(self):
+        if self._connection is not None:
+            return self._connection
+        try:
+            connection = sqlite3.connect(f"file:{self.database}?mode=ro", uri=True,
+                                         check_same_thread=False)
+            current = connection.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+            if current and current[0] == _signature(self.source, self.unsupported):
+                self._connection = connection
+                return connection
+            connection.close()
+        except sqlite3.Error:
+            pass
+        try:
+            compile_index(self.source, self.database, self.unsupported)
+            self._connection = sqlite3.connect(f"file:{self.database}?mode=ro", uri=True,
+                                               check_same_thread=False)
+        except (OSError, sqlite3.Error):
+            # Cache nicht beschreibbar: Index nur im Speicher
+            self._connection = sqlite3.connect(":memory:", check_same_thread=False)
+            _fill(self._connection, self.source, self.unsupported)
+        return self._connection
+
+    def _lookup(self, manufacturer, modelid):
+        """Definition für ein Gerät oder None.
+
+        Ein Eintrag mit passendem Hersteller hat Vorrang vor einem Eintrag
+        ohne Hersteller bzw. eines anderen Herstellers mit gleicher modelid.
+        Bekannt nicht unterstützte Geräte liefern supported=False und den
+        Grund als description.
+        """
+        modelid = (modelid or '').strip()
+        if not modelid:
+            return None
+        row = self._open().execute(
+            "SELECT model, vendor, description, supported FROM devices WHERE modelid = ? "
+            "ORDER BY manufacturer = ? DESC, manufacturer = '' DESC, supported DESC LIMIT 1",
+            (modelid, (manufacturer or '').strip().casefold())).fetchone()
+        if row is None:
+            return None
+        definition = dict(zip(('model', 'vendor', 'description'), row))
+        definition['supported'] = bool(row[3])
+        return definition
+
+    def _trigram_index(self):
+        """Einträge und Trigramm -> Einträge, beim ersten unscharfen Vergleich aufgebaut."""
+        if self._trigrams is None:
+            entries = self._open().execute(
+                "SELECT DISTINCT modelid, model, vendor, description FROM devices WHERE supported "
+                "ORDER BY modelid").fetchall()
+            sizes = []
+            postings = {}
+            for position, (modelid, *_) in enumerate(entries):
+                grams = trigrams(modelid)
+                sizes.append(len(grams))
+                for gram in grams:
+                    postings.setdefault(gram, []).append(position)
+            self._trigrams = (entries, sizes, postings)
+        return self._trigrams
+
+    def _candidates(self, modelid, limit=CANDIDATES, min_score=MIN_SIMILARITY):
+        """Ähnliche bekannte Modelle für eine unbekannte modelid, beste zuerst.
+
+        Bewertet wird mit dem Dice-Koeffizienten der Trigramme. Kandidaten
+        werden nach Anzahl gemeinsamer Trigramme durchlaufen; da der
+        Koeffizient höchstens 2c/(a+c) erreicht, endet die Suche, sobald
+        kein besserer Treffer mehr möglich ist.
+
+        Returns:
+            Liste von {'modelid', 'model', 'vendor', 'description', 'score'}
+        """
+        grams = trigrams(modelid or '')
+        if not modelid or not grams:
+            return []
+        entries, sizes, postings = self._trigram_index()
+        shared = Counter(chain.from_iterable(postings.get(gram, ()) for gram in grams))
+        size = len(grams)
+        best = []  # Min-Heap (score, -position) der besten `limit` Treffer
+        for position, count in shared.most_common():
+            bound = 2 * count / (size + count)
+            if bound < min_score or (len(best) == limit and bound < best[0][0]):
+                break
+            score = 2 * count / (size + sizes[position])
+            if score < min_score:
+                continue
+            if len(best) < limit:
+                heapq.heappush(best, (score, -position))
+            elif (score, -position) > best[0]:
+                heapq.heapreplace(best, (score, -position))
+        return [dict(zip(('modelid', 'model', 'vendor', 'description'), entries[-position]),
+                     score=round(score, 3))
+                for score, position in sorted(best, reverse=True)]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        self._trigrams = None
+        self.lookup.cache_clear()
+        self.candidates.cache_clear()
+
+
+_index = None
+
+
+def get_index():
+    """Gemeinsamer Index des Prozesses."""
+    global _index
+    if _index is None:
+        _index = CompatibilityIndex()
+    return _index
+
+
+def annotate_devices(devices, index=None):
+    """Setze device['z2m_supported'] (True/False, None = nicht im Index) und device['z2m_model'].
+
+    Returns:
+        Liste der Geräte, die im Index fehlen
+    """
+    index = index or get_index()
+    unknown = []
+    for device in devices:
+        definition = index.lookup(device.get('manufacturer'), device.get('model'))
+        device['z2m_supported'] = definition['supported'] if definition else None
+        device['z2m_model'] = definition['model'] if definition else None
+        if definition is None:
+            unknown.append(device)
+    return unknown
+
+
+def annotate_compatibility(index=None):
+    """Transformation für die Migrations-Engine: z2m_supported und z2m_model setzen.
+
+    Geräte ohne Index-Eintrag stehen danach in data['unknown'], bekannt nicht
+    unterstützte in data['unsupported'].
+    """
+    def transform(data):
+        unknown = annotate_devices(data['devices'], index)
+        unsupported = [device for device in data['devices'] if device['z2m_supported'] is False]
+        return dict(data, unknown=unknown, unsupported=unsupported)
+    return transform
+
+
+def unknown_models(devices):
+    """[(Hersteller, Modell, Anzahl)] der Geräte ohne Index-Eintrag, häufigste zuerst."""
+    counts = Counter((device.get('manufacturer') or '?', device.get('model') or '?') for device in devices)
+    return [(manufacturer, model, count) for (manufacturer, model), count in counts.most_common()]
+
+
+def unsupported_models(devices, index=None):
+    """[(Hersteller, Modell, Anzahl, Grund)] bekannt nicht unterstützter Geräte, häufigste zuerst."""
+    index = index or get_index()
+    return [(manufacturer, model, count, (index.lookup(manufacturer, model) or {}).get('description') or '')
+            for manufacturer, model, count in unknown_models(devices)]
+
+
+def print_unsupported(devices, limit=20, index=None):
+    """Bericht über Geräte, die Zigbee2MQTT nicht unterstützt (vor dem Neu-Anlernen)."""
+    if not devices:
+        return
+    models = unsupported_models(devices, index)
+    print(f"⛔ {len(devices)} Geräte ({len(models)} Modelle) werden von Zigbee2MQTT nicht unterstützt:")
+    for manufacturer, model, count, reason in models[:limit]:
+        print(f"   {count:>5}× {manufacturer} {model}" + (f"  – {reason}" if reason else ""))
+    if len(models) > limit:
+        print(f"   ... und {len(models) - limit} weitere Modelle")
+
+
+def print_unknown(devices, limit=20, index=None):
+    """Bericht über Geräte, die im Index fehlen (vor dem Neu-Anlernen prüfen).
+
+    Zu jedem Modell wird das ähnlichste bekannte Modell genannt, z.B. bei
+    angehängter Firmware-Version oder OEM-Variante.
+    """
+    index = index or get_index()
+    models = unknown_models(devices)
+    if not models:
+        print("✅ Alle Geräte im Zigbee2MQTT-Index gefunden")
+        return
+    print(f"❔ {len(devices)} Geräte ({len(models)} Modelle) nicht im mitgelieferten Zigbee2MQTT-Index, "
+          f"Unterstützung unbekannt:")
+    for manufacturer, model, count in models[:limit]:
+        line = f"   {count:>5}× {manufacturer} {model}"
+        candidates = index.candidates(model)
+        if candidates:
+            best = candidates[0]
+            line += f"  ≈ {best['model']} ({best['vendor']}, {best['modelid']}, {best['score']:.0%})"
+        print(line)
+    if len(models) > limit:
+        print(f"   ... und {len(models) - limit} weitere Modelle")
+    print("   Vor dem Neu-Anlernen prüfen: https://www.zigbee2mqtt.io/supported-devices/")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zigbee2MQTT-Unterstützung der Geräte eines Snapshots prüfen")
+    parser.add_argument("snapshot", nargs="?", default=SNAPSHOT_FILE, help=f"Snapshot (Standard: {SNAPSHOT_FILE})")
+    parser.add_argument("--rebuild", action="store_true", help=f"Datenbank aus {DATA_DIR} neu erzeugen")
+    parser.add_argument("--all", action="store_true", help="Auch unterstützte Geräte auflisten")
+    parser.add_argument("--match", action="append", metavar="MODELID",
+                        help="Ähnliche bekannte Modelle zu einer modelid anzeigen (mehrfach möglich)")
+    args = parser.parse_args(argv)
+
+    if args.match:
+        for modelid in args.match:
+            print(f"🔎 {modelid}")
+            candidates = get_index().candidates(modelid, limit=5)
+            for candidate in candidates:
+                print(f"   {candidate['score']:>4.0%}  {candidate['model']:<20} {candidate['vendor']:<12} "
+                      f"{candidate['modelid']}")
+            if not candidates:
+                print("   Keine ähnlichen Modelle")
+        return
+
+    if args.rebuild:
+        count = compile_index()
+        print(f"✅ {count} Einträge → {DATABASE}")
+        if not os.path.exists(args.snapshot):
+            return
+
+    try:
+        devices = load_snapshot(args.snapshot).get('devices') or []
+    except (OSError, ValueError) as e:
+        print(f"❌ Snapshot nicht lesbar: {e}")
+        sys.exit(2)
+
+    unknown = annotate_devices(devices)
+    unsupported = [device for device in devices if device['z2m_supported'] is False]
+    if args.all:
+        for device in devices:
+            label = device['z2m_model'] or ('-' if device['z2m_supported'] is False else '?')
+            print(f"{label:<20} {device['type']:<6} {device['id']:>5}  {device['name']}")
+    print_unsupported(unsupported)
+    print_unknown(unknown)
+    sys.exit(1 if unknown or unsupported else 0)
+
+
+if __name__ == "__main__":
+    main()
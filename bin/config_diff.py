@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Struktureller Vergleich zweier Zigbee2MQTT-Konfigurationen
+Geräte werden über (type, id) zugeordnet statt zeilenweise verglichen;
+Grundlage für den Dry-Run von Wizard und headless_migrate
+"""
+
+import argparse
+import sys
+
+import yaml
+
+# libyaml ist um ein Vielfaches schneller als der reine Python-Parser
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Werte, die im Bericht nicht im Klartext erscheinen
+SECRET_PATHS = {'advanced.network_key'}
+
+# Von network_parameters() erzeugte Felder -> Pfad in der Konfiguration
+GENERATED_PATHS = {
+    'ext_pan_id': 'advanced.extended_pan_id',
+    'network_key': 'advanced.network_key'
+}
+
+
+def load_config(filename):
+    """Lade eine configuration.yaml; None, wenn sie nicht existiert."""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return yaml.load(f, Loader=SafeLoader) or {}
+    except FileNotFoundError:
+        return None
+
+
+def device_key(entry):
+    return (entry.get('type'), str(entry.get('id')))
+
+
+def _flatten(value, prefix, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(item, f"{prefix}.{key}" if prefix else str(key), out)
+    else:
+        out[prefix] = value
+    return out
+
+
+def diff_configs(old, new, ignore=()):
+    """Vergleiche zwei Konfigurationen.
+
+    Args:
+        ignore: Pfade wie "advanced.network_key", die nicht verglichen werden
+
+    Returns:
+        {'added': [Eintrag], 'removed': [Eintrag],
+         'changed': [(Eintrag, {Feld: (alt, neu)})],
+         'settings': {Pfad: (alt, neu)}}
+    """
+    old = old or {}
+    old_devices = {device_key(entry): entry for entry in old.get('devices') or []}
+    new_devices = {device_key(entry): entry for entry in new.get('devices') or []}
+
+    added = [entry for key, entry in new_devices.items() if key not in old_devices]
+    removed = [entry for key, entry in old_devices.items() if key not in new_devices]
+    changed = []
+    for key, entry in new_devices.items():
+        previous = old_devices.get(key)
+        if previous is None or previous == entry:
+            continue
+        fields = {field: (previous.get(field), entry.get(field))
+                  for field in previous.keys() | entry.keys()
+                  if previous.get(field) != entry.get(field)}
+        changed.append((entry, fields))
+
+    old_settings = _flatten({k: v for k, v in old.items() if k != 'devices'}, "", {})
+    new_settings = _flatten({k: v for k, v in new.items() if k != 'devices'}, "", {})
+    settings = {path: (old_settings.get(path), new_settings.get(path))
+                for path in sorted(old_settings.keys() | new_settings.keys())
+                if path not in ignore and old_settings.get(path) != new_settings.get(path)}
+
+    return {'added': added, 'removed': removed, 'changed': changed, 'settings': settings}
+
+
+def has_changes(diff):
+    return any(diff[key] for key in ('added', 'removed', 'changed', 'settings'))
+
+
+def summarize(diff):
+    """Anzahlen für JSON-Ausgaben."""
+    return {key: len(diff[key]) for key in ('added', 'removed', 'changed', 'settings')}
+
+
+def _show(path, value):
+    return "***" if path in SECRET_PATHS and value is not None else repr(value)
+
+
+def print_report(diff, filename="configuration.yaml", limit=20):
+    """Bericht über hinzugefügte, entfernte und geänderte Einträge.
+
+    Je Abschnitt werden höchstens `limit` Geräte aufgeführt.
+    """
+    print(f"\n🔎 Dry-Run: Vergleich mit {filename}")
+    if not has_changes(diff):
+        print("✅ Keine Änderungen")
+        return
+
+    for path, (old, new) in diff['settings'].items():
+        print(f"   ⚙️  {path}: {_show(path, old)} → {_show(path, new)}")
+
+    for symbol, title, entries in (("➕", "Neu", diff['added']), ("➖", "Entfernt", diff['removed'])):
+        if entries:
+            print(f"\n{symbol} {title}: {len(entries)}")
+            for entry in entries[:limit]:
+                print(f"   {entry.get('type')} {entry.get('id')}: {entry.get('name')}")
+            if len(entries) > limit:
+                print(f"   ... und {len(entries) - limit} weitere")
+
+    if diff['changed']:
+        print(f"\n✏️  Geändert: {len(diff['changed'])}")
+        for entry, fields in diff['changed'][:limit]:
+            details = ", ".join(f"{field}: {old!r} → {new!r}" for field, (old, new) in sorted(fields.items()))
+            print(f"   {entry.get('type')} {entry.get('id')}: {details}")
+        if len(diff['changed']) > limit:
+            print(f"   ... und {len(diff['changed']) - limit} weitere")
+
+    counts = summarize(diff)
+    print(f"\n📊 {counts['added']} neu, {counts['removed']} entfernt, {counts['changed']} geändert, "
+          f"{counts['settings']} Einstellungen")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zwei Zigbee2MQTT-Konfigurationen strukturell vergleichen")
+    parser.add_argument("old", help="Bisherige configuration.yaml")
+    parser.add_argument("new", help="Neue configuration.yaml")
+    parser.add_argument("--limit", type=int, default=20, help="Max. Geräte je Abschnitt (Standard: 20)")
+    args = parser.parse_args(argv)
+
+    new = load_config(args.new)
+    if new is None:
+        print(f"❌ {args.new} nicht gefunden")
+        sys.exit(2)
+    diff = diff_configs(load_config(args.old), new)
+    print_report(diff, args.old, args.limit)
+    sys.exit(1 if has_changes(diff) else 0)
+
+
+if __name__ == "__main__":
+    main()
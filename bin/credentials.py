@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Gespeicherte deCONZ API-Keys, damit nicht bei jedem Lauf der Link-Button
+gedrückt werden muss
+Die Keys liegen pro Gateway (bridgeid) in einer nur für den Benutzer
+lesbaren JSON-Datei
+"""
+
+import argparse
+import json
+import os
+import stat
+import sys
+import time
+
+import requests
+
+from deconz_client import get_client
+
+CREDENTIALS_FILE = os.environ.get(
+    "DECONZ_CREDENTIALS",
+    os.path.join(os.path.expanduser("~"), ".config", "deconz-to-zigbee2mqtt", "credentials.json")
+)
+
+# deCONZ-Fehlertyp für "unauthorized user"
+ERROR_UNAUTHORIZED = 1
+
+# Ergebnisse für diesen Prozess: validate_api_key je (host, port, api_key),
+# Bridge-IDs je (host, port)
+_validated = {}
+_bridge_ids = {}
+
+
+def get_bridge_id(host, port):
+    """Bridge-ID aus der öffentlichen Konfiguration (/api/config, ohne Key).
+
+    Ist sie nicht ermittelbar, dient host:port als Schlüssel.
+    """
+    if (host, int(port)) in _bridge_ids:
+        return _bridge_ids[(host, int(port))]
+    try:
+        response = get_client(host, port).get("/config", auth=False)
+        if response.status_code == 200:
+            bridge_id = response.json().get('bridgeid')
+            if bridge_id:
+                _bridge_ids[(host, int(port))] = bridge_id.upper()
+                return bridge_id.upper()
+    except Exception:
+        pass
+    return f"{host}:{port}"
+
+
+def _unauthorized(payload):
+    """True, wenn die deCONZ-Antwort einen Fehler vom Typ "unauthorized user" enthält."""
+    return isinstance(payload, list) and any(
+        isinstance(item, dict) and (item.get('error') or {}).get('type') == ERROR_UNAUTHORIZED
+        for item in payload)
+
+
+def validate_api_key(host, port, api_key):
+    """Prüfe einen API-Key mit einer einzigen Anfrage; das Ergebnis wird gecacht.
+
+    deCONZ liefert /api/<key>/config auch für unbekannte Keys mit HTTP 200,
+    dann aber nur die öffentlichen Felder. Gültig ist ein Key daher nur,
+    wenn die Antwort die Netzwerkparameter enthält; ungültig nur bei dieser
+    öffentlichen Antwort, HTTP 403 oder Fehlertyp 1.
+
+    Raises:
+        requests.HTTPError: Keine eindeutige Antwort (z.B. 503 während eines
+            Neustarts); das Ergebnis wird dann nicht gecacht
+        ValueError: Antwort ist kein deCONZ-JSON
+    """
+    cache_key = (host, int(port), api_key)
+    if cache_key not in _validated:
+        response = get_client(host, port, api_key).get("/config")
+        if response.status_code == 403:
+            valid = False
+        elif response.status_code == 200:
+            payload = response.json()
+            if isinstance(payload, dict):
+                valid = 'zigbeechannel' in payload
+            elif _unauthorized(payload):
+                valid = False
+            else:
+                raise ValueError("Unerwartete Antwort auf /config")
+        else:
+            raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+        _validated[cache_key] = valid
+    return _validated[cache_key]
+
+
+class CredentialStore:
+    """API-Keys pro Gateway, gespeichert mit Dateirechten 600."""
+
+    def __init__(self, filename=None):
+        self.filename = filename or CREDENTIALS_FILE
+        self.gateways = None
+
+    def load(self):
+        """Lade die Datei (einmalig). Eine fehlende Datei ist ein leerer Speicher."""
+        if self.gateways is not None:
+            return self.gateways
+        self.gateways = {}
+        try:
+            mode = os.stat(self.filename).st_mode
+            if mode & (stat.S_IRWXG | stat.S_IRWXO):
+                print(f"⚠️  {self.filename} ist für andere Benutzer lesbar "
+                      f"(chmod 600 {self.filename})")
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                self.gateways = json.load(f).get('gateways', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Gespeicherte API-Keys nicht lesbar: {e}")
+        return self.gateways
+
+    def save(self):
+        """Schreibe atomar; die Datei entsteht direkt mit Rechten 600."""
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmp_file = f"{self.filename}.{os.getpid()}.tmp"
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'gateways': self.load()}, f, indent=2, ensure_ascii=False)
+        os.chmod(tmp_file, 0o600)
+        os.replace(tmp_file, self.filename)
+
+    def get(self, bridge_id):
+        entry = self.load().get(bridge_id)
+        return entry['api_key'] if entry else None
+
+    def put(self, bridge_id, api_key, host, port):
+        self.load()[bridge_id] = {
+            'api_key': api_key,
+            'host': host,
+            'port': int(port),
+            'saved': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        self.save()
+
+    def remove(self, bridge_id):
+        if self.load().pop(bridge_id, None) is not None:
+            self.save()
+            return True
+        return False
+
+
+def stored_api_key(host, port, store=None, read_only=False):
+    """Gespeicherten und noch gültigen API-Key für das Gateway zurückgeben.
+
+    Ungültig gewordene Keys (z.B. in Phoscon gelöscht) werden entfernt;
+    ist das Gateway gerade nicht eindeutig erreichbar, bleibt der Key erhalten.
+    Mit `read_only` (Dry-Run) wird der Speicher nie verändert.
+    """
+    store = store or CredentialStore()
+    bridge_id = get_bridge_id(host, port)
+    api_key = store.get(bridge_id)
+    if not api_key:
+        return None
+    try:
+        if validate_api_key(host, port, api_key):
+            entry = store.load()[bridge_id]
+            if not read_only and (entry.get('host'), entry.get('port')) != (host, int(port)):
+                store.put(bridge_id, api_key, host, port)
+            print(f"🔑 Gespeicherter API-Key für Gateway {bridge_id} ist gültig")
+            return api_key
+    except Exception as e:
+        print(f"⚠️  Gespeicherter API-Key konnte nicht geprüft werden: {e}")
+        return None
+    if read_only:
+        print(f"⚠️  Gespeicherter API-Key für Gateway {bridge_id} ist ungültig")
+        return None
+    print(f"⚠️  Gespeicherter API-Key für Gateway {bridge_id} ist ungültig und wird entfernt")
+    store.remove(bridge_id)
+    return None
+
+
+def remember_api_key(host, port, api_key, store=None):
+    """Speichere einen funktionierenden API-Key für das Gateway."""
+    store = store or CredentialStore()
+    bridge_id = get_bridge_id(host, port)
+    try:
+        store.put(bridge_id, api_key, host, port)
+        print(f"💾 API-Key für Gateway {bridge_id} gespeichert ({store.filename})")
+    except OSError as e:
+        print(f"⚠️  API-Key konnte nicht gespeichert werden: {e}")
+
+
+def obtain_api_key(host, port, pair, store=None):
+    """Gespeicherten Key verwenden, sonst `pair(host, port)` aufrufen und merken."""
+    store = store or CredentialStore()
+    api_key = stored_api_key(host, port, store)
+    if api_key:
+        return api_key
+    api_key = pair(host, port)
+    if api_key:
+        _validated[(host, int(port), api_key)] = True
+        remember_api_key(host, port, api_key, store)
+    return api_key
+
+
+def mask(api_key):
+    return api_key[:4] + "…" if len(api_key) > 4 else "…"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gespeicherte deCONZ API-Keys verwalten")
+    parser.add_argument("--file", help=f"Schlüsseldatei (Standard: {CREDENTIALS_FILE})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Gespeicherte Gateways anzeigen")
+    forget = subparsers.add_parser("forget", help="API-Key eines Gateways löschen")
+    forget.add_argument("bridge_id", help="Bridge-ID (oder host:port)")
+    args = parser.parse_args(argv)
+
+    store = CredentialStore(args.file)
+    if args.command == "list":
+        gateways = store.load()
+        if not gateways:
+            print(f"📭 Keine gespeicherten API-Keys in {store.filename}")
+            return
+        print(f"📁 {store.filename}")
+        for bridge_id, entry in sorted(gateways.items()):
+            print(f"   {bridge_id:<18} {entry.get('host')}:{entry.get('port'):<6} "
+                  f"{mask(entry.get('api_key', ''))}  gespeichert {entry.get('saved', '?')}")
+    elif args.command == "forget":
+        if store.remove(args.bridge_id.upper()) or store.remove(args.bridge_id):
+            print(f"🗑️  API-Key für {args.bridge_id} gelöscht")
+        else:
+            print(f"❌ Kein gespeicherter API-Key für {args.bridge_id}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
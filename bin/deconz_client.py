@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Gemeinsamer HTTP-Client für die deCONZ-REST-API
+Alle Anfragen der Tools laufen hierüber, damit Messungen (Profiling, Tracing)
+an einer Stelle ansetzen können
+"""
+
+import contextvars
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+
+from tracing import is_enabled, span
+
+DEFAULT_HEADERS = {"Content-Type": "application/json"}
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "PUT", "DELETE", "OPTIONS"))
+RETRY_STATUSES = frozenset((429, 502, 503, 504))
+
+# Beobachter für abgeschlossene Anfragen, z.B. der Profiler.
+# Jeder Hook erhält pro Versuch ein Dictionary mit method, template, url,
+# status, elapsed (Sekunden), bytes, error und attempt (0 = erster Versuch).
+_request_hooks = []
+
+_clients = {}
+_sessions = {}
+_breakers = {}
+_timeouts = {}
+_caches = {}
+_registry_lock = threading.Lock()
+
+# Absoluter Zeitpunkt (time.monotonic), bis zu dem Anfragen abgeschlossen
+# sein müssen; gesetzt über deadline(). Gilt nur im eigenen Thread/Kontext.
+_deadline = contextvars.ContextVar('deconz_deadline', default=None)
+
+# Zeiten des Verbindungsaufbaus der laufenden Anfrage (dns_ms, connect_ms);
+# nur beim Tracing gesetzt, sonst misst _TimedConnection nichts
+_connect_timings = contextvars.ContextVar('deconz_connect_timings', default=None)
+
+
+class _TimedConnection(HTTPConnection):
+    """HTTP-Verbindung, die Namensauflösung und TCP-Connect getrennt misst.
+
+    Die Adresse wird einmal aufgelöst und dann der Reihe nach verbunden wie
+    in urllib3; die Zeiten landen im Dictionary aus _connect_timings.
+    """
+
+    def _new_conn(self):
+        timings = _connect_timings.get()
+        if timings is None:
+            return super()._new_conn()
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        timings['dns_ms'] = round((resolved - start) * 1000, 3)
+        dns_host = self._dns_host
+        try:
+            for position, (*_, address) in enumerate(addresses):
+                self._dns_host = address[0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError):
+                    if position + 1 == len(addresses):
+                        raise
+        finally:
+            self._dns_host = dns_host
+        timings['connect_ms'] = round((time.perf_counter() - resolved) * 1000, 3)
+        return sock
+
+
+class _TimedConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """Adapter, dessen HTTP-Verbindungen den Aufbau für das Tracing messen."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(self.poolmanager.pool_classes_by_scheme,
+                                                       http=_TimedConnectionPool)
+
+
+def new_session():
+    """requests.Session für ein Gateway (mit gemessenem Verbindungsaufbau)."""
+    session = requests.Session()
+    session.mount("http://", _TimedAdapter())
+    return session
+
+
+class GatewayUnavailable(requests.ConnectionError):
+    """Der Circuit Breaker für das Gateway ist offen."""
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Die Frist aus deadline() ist abgelaufen."""
+
+
+def add_request_hook(hook):
+    """Registriere einen Beobachter für alle deCONZ-Anfragen."""
+    _request_hooks.append(hook)
+
+
+def remove_request_hook(hook):
+    """Entferne einen registrierten Beobachter."""
+    if hook in _request_hooks:
+        _request_hooks.remove(hook)
+
+
+def _not_sent(error):
+    """True, wenn die Anfrage das Gateway sicher nicht erreicht hat."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class RetryPolicy:
+    """Wiederholungen mit exponentiellem Backoff und vollem Jitter.
+
+    Idempotente Methoden werden bei Verbindungsfehlern, Timeouts und den
+    Status-Codes in `statuses` wiederholt. Andere Methoden (POST) nur, wenn
+    die Verbindung gar nicht zustande kam, damit z.B. kein zweiter API-Key
+    angelegt wird.
+    """
+
+    def __init__(self, attempts=3, backoff=0.25, max_backoff=4.0, statuses=RETRY_STATUSES):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def retry_error(self, method, error):
+        if isinstance(error, (GatewayUnavailable, DeadlineExceeded)):
+            return False
+        if method in IDEMPOTENT_METHODS:
+            return isinstance(error, (requests.ConnectionError, requests.Timeout))
+        return _not_sent(error)
+
+    def retry_response(self, method, response):
+        return method in IDEMPOTENT_METHODS and response.status_code in self.statuses
+
+
+class AdaptiveTimeouts:
+    """Connect- und Read-Timeouts aus gemessener RTT und Durchsatz eines Gateways.
+
+    Die RTT wird wie beim TCP-Retransmission-Timeout (RFC 6298) geglättet,
+    der Durchsatz aus großen Antworten geschätzt. Der Read-Timeout eines
+    Endpunkts wächst mit der zuletzt gesehenen Antwortgröße. Solange noch
+    nichts gemessen wurde, gelten die `cold`-Werte. Nach einem Timeout
+    verdoppeln sich die Werte bis zur nächsten erfolgreichen Antwort.
+    """
+
+    LARGE_RESPONSE = 16384
+
+    def __init__(self, connect_floor=0.25, connect_ceiling=5.0, read_floor=2.0,
+                 read_ceiling=60.0, cold=(3.05, 10.0)):
+        self.connect_floor = connect_floor
+        self.connect_ceiling = connect_ceiling
+        self.read_floor = read_floor
+        self.read_ceiling = read_ceiling
+        self.cold = cold
+        self.srtt = None
+        self.rttvar = None
+        self.throughput = None
+        self.sizes = {}
+        self.backoff = 1
+        self.lock = threading.Lock()
+
+    def observe(self, template, status, first_byte, elapsed, size):
+        """Messwerte einer erfolgreichen Antwort einarbeiten."""
+        with self.lock:
+            if size < self.LARGE_RESPONSE or self.srtt is None:
+                if self.srtt is None:
+                    self.srtt, self.rttvar = first_byte, first_byte / 2
+                else:
+                    self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - first_byte)
+                    self.srtt = 0.875 * self.srtt + 0.125 * first_byte
+            if size >= self.LARGE_RESPONSE and elapsed > 0:
+                sample = size / elapsed
+                self.throughput = sample if self.throughput is None \
+                    else 0.8 * self.throughput + 0.2 * sample
+            if status == 200:
+                self.sizes[template] = size
+            self.backoff = 1
+
+    def timed_out(self):
+        with self.lock:
+            self.backoff = min(self.backoff * 2, 8)
+
+    def timeout(self, template):
+        """(connect, read) für einen Endpunkt."""
+        with self.lock:
+            if self.srtt is None:
+                return tuple(value * self.backoff for value in self.cold)
+            rto = (self.srtt + max(4 * self.rttvar, 0.01)) * self.backoff
+            connect = min(max(3 * rto, self.connect_floor), self.connect_ceiling)
+            size = self.sizes.get(template)
+            if size is None:
+                read = max(2 * rto, self.cold[1])
+            elif self.throughput:
+                read = 2 * rto + 2 * size / self.throughput
+            else:
+                read = 2 * rto
+            read = min(max(read, self.read_floor), self.read_ceiling)
+            return round(connect, 3), round(read, 3)
+
+
+# Grenzen für neu angelegte AdaptiveTimeouts (siehe configure_timeouts)
+_timeout_limits = {}
+
+
+def configure_timeouts(**limits):
+    """Setze Untergrenzen/Obergrenzen der adaptiven Timeouts für alle Gateways.
+
+    Erlaubt: connect_floor, connect_ceiling, read_floor, read_ceiling, cold.
+    """
+    _timeout_limits.update(limits)
+    with _registry_lock:
+        for timeouts in _timeouts.values():
+            for name, value in limits.items():
+                setattr(timeouts, name, value)
+
+
+class _Flight:
+    __slots__ = ('done', 'response', 'error', 'valid')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+        self.valid = True
+
+
+class ResponseCache:
+    """Single-Flight und kurzlebige Memoisierung von GET-Antworten eines Gateways.
+
+    Gleichzeitige Aufrufer derselben URL teilen sich eine laufende Anfrage.
+    Erfolgreiche Antworten (HTTP 200) werden `ttl` Sekunden wiederverwendet;
+    schreibende Anfragen an das Gateway verwerfen den Cache.
+    """
+
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+        self.entries = {}
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'shared': 0, 'misses': 0}
+
+    def fetch(self, url, load):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None and entry[0] > now:
+                self.stats['hits'] += 1
+                return entry[1]
+            flight = self.flights.get(url)
+            leader = flight is None
+            if leader:
+                flight = self.flights[url] = _Flight()
+                self.stats['misses'] += 1
+                for key in [key for key, (expires, _) in self.entries.items() if expires <= now]:
+                    del self.entries[key]
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            remaining = remaining_time()
+            if not flight.done.wait(remaining):
+                raise DeadlineExceeded(f"Frist beim Warten auf {url} abgelaufen")
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = load()
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.flights.pop(url, None)
+                response = flight.response
+                if flight.valid and self.ttl > 0 and response is not None \
+                        and response.status_code == 200:
+                    self.entries[url] = (time.monotonic() + self.ttl, response)
+            flight.done.set()
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            for flight in self.flights.values():
+                flight.valid = False
+
+
+# Gültigkeitsdauer für neu angelegte ResponseCaches (siehe configure_cache)
+_cache_ttl = 5.0
+
+
+def configure_cache(ttl):
+    """Setze die Wiederverwendungsdauer für GET-Antworten (0 = nur Single-Flight)."""
+    global _cache_ttl
+    _cache_ttl = ttl
+    with _registry_lock:
+        for cache in _caches.values():
+            cache.ttl = ttl
+            cache.invalidate()
+
+
+DEFAULT_RETRY = RetryPolicy()
+NO_RETRY = RetryPolicy(attempts=1)
+
+# Abweichende Strategien je (Methode, URL-Template)
+_retry_policies = {
+    # Pairing fragt selbst in einer Schleife ab
+    ("POST", "/api"): NO_RETRY,
+    # Große Sammlungen: Gateways verwerfen Anfragen während OTA-Updates
+    ("GET", "/api/{key}/sensors"): RetryPolicy(attempts=4),
+    ("GET", "/api/{key}/lights"): RetryPolicy(attempts=4),
+}
+
+
+def set_retry_policy(method, template, policy):
+    """Lege die Wiederholungsstrategie für einen Endpunkt fest."""
+    _retry_policies[(method, template)] = policy
+
+
+def retry_policy(method, template):
+    return _retry_policies.get((method, template), DEFAULT_RETRY)
+
+
+class CircuitBreaker:
+    """Sperrt ein Gateway nach `threshold` Verbindungsfehlern in Folge.
+
+    Während `cooldown` Sekunden schlagen Anfragen sofort mit
+    GatewayUnavailable fehl; danach darf eine Probeanfrage durch. Im
+    Flottenbetrieb kostet ein ausgefallenes Gateway so keine Timeouts mehr.
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self.lock:
+            return (self.opened_at is not None
+                    and time.monotonic() - self.opened_at < self.cooldown)
+
+    def check(self, host):
+        if self.is_open:
+            raise GatewayUnavailable(f"Gateway {host} nach {self.failures} Fehlern "
+                                     f"vorübergehend gesperrt")
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+@contextmanager
+def deadline(seconds):
+    """Alle Anfragen im Block (inkl. Wiederholungen) enden nach `seconds`.
+
+    Verschachtelte Fristen können die äußere nur verkürzen.
+    """
+    end = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        end = min(end, outer)
+    token = _deadline.set(end)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time():
+    """Restzeit der aktuellen Frist in Sekunden oder None."""
+    end = _deadline.get()
+    return None if end is None else end - time.monotonic()
+
+
+class DeconzClient:
+    """Client für ein deCONZ-Gateway.
+
+    Pfade werden relativ angegeben: "/sensors" wird zu /api/<api_key>/sensors,
+    mit auth=False zu /api/sensors. Die HTTP-Session wird pro Gateway geteilt,
+    damit Verbindungen wiederverwendet werden.
+    """
+
+    def __init__(self, host, port, api_key=None, session=None, breaker=None, timeouts=None,
+                 cache=None):
+        self.host = host
+        self.port = int(port)
+        self.api_key = api_key
+        self.root = f"http://{host}:{self.port}/api"
+        self.session = session or new_session()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeouts = timeouts or AdaptiveTimeouts(**_timeout_limits)
+        self.cache = cache or ResponseCache(_cache_ttl)
+
+    def url(self, path="", auth=True):
+        """Vollständige URL und URL-Template (ohne API-Key) für einen Pfad."""
+        if auth and self.api_key:
+            return f"{self.root}/{self.api_key}{path}", f"/api/{{key}}{path}"
+        return f"{self.root}{path}", f"/api{path}"
+
+    def request(self, method, path="", auth=True, timeout=None, retry=None, cache=True, **kwargs):
+        """Führe eine Anfrage aus. Gibt das requests.Response-Objekt zurück.
+
+        Ohne `timeout` werden Connect- und Read-Timeout aus den bisherigen
+        Messungen des Gateways abgeleitet (AdaptiveTimeouts). Vorübergehende
+        Fehler werden nach der Strategie des Endpunkts (oder `retry`)
+        wiederholt. Nach ausgeschöpften Versuchen wird die letzte Antwort
+        zurückgegeben bzw. der letzte Fehler ausgelöst.
+
+        Einfache GET-Anfragen (ohne Header, Parameter, cache=False) laufen
+        über den ResponseCache des Gateways; andere Methoden verwerfen ihn.
+        """
+        if method == "GET" and cache and not kwargs:
+            return self.cache.fetch(self.url(path, auth)[0], lambda: self._request(
+                method, path, auth, timeout, retry, kwargs))
+        if method not in ("GET", "HEAD"):
+            self.cache.invalidate()
+        return self._request(method, path, auth, timeout, retry, kwargs)
+
+    def _request(self, method, path, auth, timeout, retry, kwargs):
+
+        url, template = self.url(path, auth)
+        headers = dict(DEFAULT_HEADERS)
+        headers.update(kwargs.pop('headers', None) or {})
+        policy = retry or retry_policy(method, template)
+
+        with span(f"{method} {template}", "http", method=method, url_template=template,
+                  host=self.host) as current:
+            attempt = 0
+            while True:
+                self.breaker.check(self.host)
+                attempt_timeout = timeout or self.timeouts.timeout(template)
+                remaining = remaining_time()
+                if remaining is not None:
+                    if remaining <= 0:
+                        raise DeadlineExceeded(f"Frist für {method} {template} abgelaufen")
+                    if isinstance(attempt_timeout, tuple):
+                        attempt_timeout = tuple(min(value, remaining) for value in attempt_timeout)
+                    else:
+                        attempt_timeout = min(attempt_timeout, remaining)
+                current.set(retries=attempt, timeout=attempt_timeout)
+                try:
+                    response = self._send(method, url, template, headers, attempt_timeout,
+                                          attempt, current, kwargs)
+                except requests.RequestException as e:
+                    if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                        self.breaker.failure()
+                    if isinstance(e, requests.Timeout):
+                        self.timeouts.timed_out()
+                    if attempt + 1 < policy.attempts and policy.retry_error(method, e) \
+                            and self._backoff(policy, attempt):
+                        attempt += 1
+                        continue
+                    if isinstance(e, requests.Timeout) and remaining is not None \
+                            and remaining_time() <= 0:
+                        raise DeadlineExceeded(f"Frist für {method} {template} abgelaufen") from e
+                    raise
+                self.breaker.success()
+                if attempt + 1 < policy.attempts and policy.retry_response(method, response) \
+                        and self._backoff(policy, attempt):
+                    # Bei stream=True ist der Body ungelesen; ohne close bliebe die Verbindung belegt
+                    response.close()
+                    attempt += 1
+                    continue
+                return response
+
+    def _backoff(self, policy, attempt):
+        """Warte vor dem nächsten Versuch; False, wenn die Frist nicht reicht."""
+        delay = policy.delay(attempt)
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _send(self, method, url, template, headers, timeout, attempt, current, kwargs):
+        """Ein einzelner Versuch; meldet das Ergebnis an Tracing und Hooks."""
+        record = {'method': method, 'template': template, 'url': url,
+                  'status': None, 'bytes': 0, 'error': None, 'attempt': attempt}
+        tracing = is_enabled()
+        if tracing:
+            timings = {}
+            token = _connect_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, headers=headers, timeout=timeout, **kwargs)
+            record['status'] = response.status_code
+            if kwargs.get('stream'):
+                # Der Aufrufer liest den Body selbst; Größe nur laut Header, keine
+                # Durchsatzmessung (bisher sind nur die Header angekommen)
+                record['bytes'] = int(response.headers.get('Content-Length') or 0)
+                return response
+            record['bytes'] = len(response.content)
+            self.timeouts.observe(template, response.status_code, response.elapsed.total_seconds(),
+                                  time.perf_counter() - start, record['bytes'])
+            return response
+        except Exception as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['elapsed'] = time.perf_counter() - start
+            if tracing:
+                _connect_timings.reset(token)
+                # Ohne neue Verbindung (Keep-Alive) gibt es keine DNS-/Connect-Zeit
+                current.set(status=record['status'], bytes=record['bytes'],
+                            total_ms=round(record['elapsed'] * 1000, 3),
+                            new_connection='connect_ms' in timings,
+                            dns_ms=timings.get('dns_ms'), connect_ms=timings.get('connect_ms'))
+                if record['status'] is not None:
+                    current.set(first_byte_ms=round(response.elapsed.total_seconds() * 1000, 3))
+            for hook in _request_hooks:
+                hook(record)
+
+    def get(self, path="", **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path="", **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path="", **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path="", **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+
+def get_client(host, port, api_key=None):
+    """Gemeinsamer Client für Gateway und API-Key.
+
+    Session, Circuit Breaker, Timeout-Messung und Antwort-Cache werden pro
+    Gateway geteilt.
+    """
+    key = (host, int(port), api_key)
+    with _registry_lock:
+        client = _clients.get(key)
+        if client is None:
+            session = _sessions.get(key[:2])
+            if session is None:
+                session = _sessions[key[:2]] = new_session()
+                _breakers[key[:2]] = CircuitBreaker()
+                _timeouts[key[:2]] = AdaptiveTimeouts(**_timeout_limits)
+                _caches[key[:2]] = ResponseCache(_cache_ttl)
+            client = _clients[key] = DeconzClient(host, port, api_key, session=session,
+                                                  breaker=_breakers[key[:2]],
+                                                  timeouts=_timeouts[key[:2]],
+                                                  cache=_caches[key[:2]])
+        return client
@@ -0,0 +1,14 @@
+"""
+Lokaler deCONZ-Simulator für Tests und Benchmarks ohne echtes Gateway
+"""
+
+from .fleet import DEVICE_TEMPLATES, generate_fleet
+from .server import DeconzSimulator, FaultProfile, error_payload
+
+__all__ = [
+    "DEVICE_TEMPLATES",
+    "DeconzSimulator",
+    "FaultProfile",
+    "error_payload",
+    "generate_fleet",
+]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Startet den deCONZ-Simulator
+
+    python3 bin/deconz_simulator --resources 1000 --port 4530
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Erlaubt den Start als Verzeichnis (python3 bin/deconz_simulator)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deconz_simulator import DeconzSimulator, FaultProfile, generate_fleet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokaler deCONZ-REST- und WebSocket-Simulator")
+    parser.add_argument("--bind", default="127.0.0.1", help="Adresse (Standard: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=4530, help="REST-Port (Standard: 4530)")
+    parser.add_argument("--websocket-port", type=int, default=8443, help="WebSocket-Port (Standard: 8443)")
+    parser.add_argument("--resources", type=int, default=100, help="Anzahl Ressourcen (10 bis 50000)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed für reproduzierbare Installationen")
+    parser.add_argument("--api-key", action="append", default=[], help="Gültiger API-Key (mehrfach möglich)")
+    parser.add_argument("--link-button", action="store_true", help="Pairing dauerhaft erlauben")
+    parser.add_argument("--latency", type=float, default=0.0, help="Zusätzliche Antwortzeit in Sekunden")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Zufälliger Zuschlag in Sekunden")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Anteil hängender Anfragen")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil HTTP-Fehler")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP-Status für Fehler")
+    parser.add_argument("--event-rate", type=float, default=0.0, help="'changed'-Events pro Sekunde")
+    parser.add_argument("--verbose", action="store_true", help="Anfragen protokollieren")
+    args = parser.parse_args(argv)
+
+    fleet = generate_fleet(args.resources, seed=args.seed)
+    faults = FaultProfile(args.latency, args.jitter, args.timeout_rate, args.error_rate,
+                          args.error_status, seed=args.seed)
+    simulator = DeconzSimulator(fleet, args.bind, args.port, args.websocket_port,
+                                api_keys=args.api_key or ["SIMULATOR"], faults=faults,
+                                link_button=args.link_button, verbose=args.verbose)
+    simulator.start()
+    if args.event_rate:
+        simulator.start_event_stream(args.event_rate, seed=args.seed)
+
+    print(f"🧪 deCONZ-Simulator läuft auf http://{args.bind}:{simulator.port} "
+          f"(WebSocket {simulator.websocket_port})")
+    print(f"   📊 {len(fleet['sensors'])} Sensoren, 💡 {len(fleet['lights'])} Lichter")
+    print(f"   🔑 API-Keys: {', '.join(args.api_key or ['SIMULATOR'])}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n👋 Simulator beendet")
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Synthetische deCONZ-Installationen
+Erzeugt realistische Sensor-/Lichtbestände mit Geräten, die aus mehreren
+Ressourcen bestehen (z.B. Temperatur + Luftfeuchte + Druck)
+"""
+
+import random
+import time
+
+# (Gerätename, Hersteller, modelid, IEEE-Präfix, Ressourcen)
+# Ressourcen: (Sammlung, deCONZ-Typ, Endpunkt, Cluster)
+DEVICE_TEMPLATES = [
+    ("Wetter", "LUMI", "lumi.weather", "00:15:8d:00", [
+        ("sensors", "ZHATemperature", "01", "0402"),
+        ("sensors", "ZHAHumidity", "01", "0405"),
+        ("sensors", "ZHAPressure", "01", "0403"),
+    ]),
+    ("Bewegungsmelder", "LUMI", "lumi.sensor_motion.aq2", "00:15:8d:00", [
+        ("sensors", "ZHAPresence", "01", "0406"),
+        ("sensors", "ZHALightLevel", "01", "0400"),
+    ]),
+    ("Fensterkontakt", "LUMI", "lumi.sensor_magnet.aq2", "00:15:8d:00", [
+        ("sensors", "ZHAOpenClose", "01", "0006"),
+    ]),
+    ("Wassermelder", "LUMI", "lumi.sensor_wleak.aq1", "00:15:8d:00", [
+        ("sensors", "ZHAWater", "01", "0500"),
+    ]),
+    ("Taster", "IKEA of Sweden", "TRADFRI remote control", "00:0b:57:ff", [
+        ("sensors", "ZHASwitch", "01", "1000"),
+    ]),
+    ("Deckenlampe", "IKEA of Sweden", "TRADFRI bulb E27 WS opal 980lm", "00:0b:57:ff", [
+        ("lights", "Color temperature light", "01", None),
+    ]),
+    ("Stehlampe", "Signify Netherlands B.V.", "LCT015", "00:17:88:01", [
+        ("lights", "Extended color light", "0b", None),
+    ]),
+    ("Lichtstreifen", "Signify Netherlands B.V.", "LST002", "00:17:88:01", [
+        ("lights", "Color light", "0b", None),
+    ]),
+    ("Steckdose", "OSRAM", "Plug 01", "84:18:26:00", [
+        ("lights", "On/Off plug-in unit", "03", None),
+    ]),
+    ("Zwischenstecker", "LUMI", "lumi.plug.maeu01", "54:ef:44:10", [
+        ("lights", "Smart plug", "01", None),
+        ("sensors", "ZHAPower", "15", "000c"),
+        ("sensors", "ZHAConsumption", "15", "000c"),
+    ]),
+    ("Heizkörperthermostat", "Eurotronic", "SPZB0001", "00:15:8d:00", [
+        ("sensors", "ZHAThermostat", "01", "0201"),
+    ]),
+]
+
+ROOMS = ["Wohnzimmer", "Küche", "Flur", "Bad", "Schlafzimmer", "Kinderzimmer",
+         "Büro", "Keller", "Garage", "Garten", "Dachboden", "Gästezimmer"]
+
+SENSOR_STATES = {
+    "ZHATemperature": lambda rng: {"temperature": rng.randint(1500, 2600)},
+    "ZHAHumidity": lambda rng: {"humidity": rng.randint(3000, 7000)},
+    "ZHAPressure": lambda rng: {"pressure": rng.randint(980, 1040)},
+    "ZHAPresence": lambda rng: {"presence": rng.random() < 0.2},
+    "ZHALightLevel": lambda rng: {"lightlevel": rng.randint(0, 30000), "lux": rng.randint(0, 900)},
+    "ZHAOpenClose": lambda rng: {"open": rng.random() < 0.1},
+    "ZHAWater": lambda rng: {"water": False},
+    "ZHASwitch": lambda rng: {"buttonevent": rng.choice([1002, 2002, 3002, 4002])},
+    "ZHAPower": lambda rng: {"power": rng.randint(0, 2000)},
+    "ZHAConsumption": lambda rng: {"consumption": rng.randint(0, 500000)},
+    "ZHAThermostat": lambda rng: {"temperature": rng.randint(1600, 2400), "valve": rng.randint(0, 100)},
+}
+
+BATTERY_TYPES = {"ZHATemperature", "ZHAHumidity", "ZHAPressure", "ZHAPresence",
+                 "ZHALightLevel", "ZHAOpenClose", "ZHAWater", "ZHASwitch", "ZHAThermostat"}
+
+
+def _timestamp(epoch):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(epoch))
+
+
+def _sensor(rng, name, template, sensor_type, unique_id, now, dead):
+    age = rng.randint(3600 * 24 * 400, 3600 * 24 * 1500) if dead else rng.randint(0, 3600 * 6)
+    sensor = {
+        "config": {"on": True, "reachable": not dead},
+        "ep": int(unique_id.split('-')[1], 16),
+        "etag": f"{rng.getrandbits(64):016x}",
+        "lastseen": _timestamp(now - age)[:-3] + "Z",
+        "manufacturername": template[1],
+        "modelid": template[2],
+        "name": name,
+        "state": dict(SENSOR_STATES.get(sensor_type, lambda r: {})(rng), lastupdated=_timestamp(now - age)),
+        "swversion": "20191205",
+        "type": sensor_type,
+        "uniqueid": unique_id
+    }
+    if sensor_type in BATTERY_TYPES:
+        sensor["config"]["battery"] = 0 if dead and rng.random() < 0.5 else rng.randint(5, 100)
+    return sensor
+
+
+def _light(rng, name, template, light_type, unique_id, now, dead):
+    light = {
+        "etag": f"{rng.getrandbits(64):016x}",
+        "hascolor": "color" in light_type.lower(),
+        "lastannounced": None,
+        "lastseen": _timestamp(now - (rng.randint(86400 * 30, 86400 * 900) if dead else rng.randint(0, 600)))[:-3] + "Z",
+        "manufacturername": template[1],
+        "modelid": template[2],
+        "name": name,
+        "state": {"alert": "none", "on": rng.random() < 0.3, "reachable": not dead},
+        "swversion": "1.50.2_r30933",
+        "type": light_type,
+        "uniqueid": unique_id
+    }
+    if light["hascolor"] or "dimmable" in light_type.lower():
+        light["state"]["bri"] = rng.randint(1, 254)
+    return light
+
+
+def generate_fleet(resources=100, seed=0, dead_ratio=0.05, duplicate_names=True):
+    """Erzeuge eine synthetische Installation mit ungefähr `resources` Ressourcen.
+
+    Gibt ein Dictionary mit 'config', 'sensors', 'lights' und 'groups' zurück,
+    aufgebaut wie die Antworten der deCONZ-REST-API. Mit demselben `seed`
+    ist das Ergebnis reproduzierbar. Ein Anteil von `dead_ratio` Geräten
+    ist seit Langem nicht erreichbar, bei `duplicate_names` tragen mehrere
+    Geräte denselben Namen (wie in echten Installationen).
+    """
+    rng = random.Random(seed)
+    now = int(time.time())
+    sensors = {}
+    lights = {}
+    groups = {}
+    counter = 0
+    name_counts = {}
+
+    while len(sensors) + len(lights) < resources:
+        template = rng.choice(DEVICE_TEMPLATES)
+        counter += 1
+        room = rng.choice(ROOMS)
+        base_name = f"{template[0]} {room}"
+        name_counts[base_name] = name_counts.get(base_name, 0) + 1
+        if not duplicate_names and name_counts[base_name] > 1:
+            base_name = f"{base_name} {name_counts[base_name]}"
+
+        mac_suffix = f"{counter:08x}"
+        mac = template[3] + ":" + ":".join(mac_suffix[i:i + 2] for i in range(0, 8, 2))
+        dead = rng.random() < dead_ratio
+
+        for collection, resource_type, endpoint, cluster in template[4]:
+            unique_id = f"{mac}-{endpoint}" + (f"-{cluster}" if cluster else "")
+            if collection == "sensors":
+                resource_id = str(len(sensors) + 1)
+                sensors[resource_id] = _sensor(rng, base_name, template, resource_type, unique_id, now, dead)
+            else:
+                resource_id = str(len(lights) + 1)
+                lights[resource_id] = _light(rng, base_name, template, resource_type, unique_id, now, dead)
+                group = groups.setdefault(room, {
+                    "id": str(len(groups) + 1), "name": room, "type": "Room",
+                    "lights": [], "state": {"all_on": False, "any_on": False}
+                })
+                group["lights"].append(resource_id)
+
+    config = {
+        "apiversion": "1.16.0",
+        "bridgeid": f"00212EFFFF{seed & 0xFFFFFF:06X}",
+        "datastoreversion": "93",
+        "name": "deCONZ-Simulator",
+        "panid": rng.randint(1, 0xFFFE),
+        "extpanid": rng.getrandbits(64),
+        "networkkey": rng.getrandbits(128),
+        "swversion": "2.26.3",
+        "websocketport": 443,
+        "websocketnotifyall": True,
+        "zigbeechannel": rng.choice([11, 15, 20, 25]),
+        "whitelist": {}
+    }
+    return {
+        "config": config,
+        "sensors": sensors,
+        "lights": lights,
+        "groups": {group["id"]: group for group in groups.values()}
+    }
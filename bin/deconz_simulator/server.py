@@ -0,0 +1,359 @@
+"""
+deCONZ-REST- und WebSocket-Simulator
+Bedient die Endpunkte, die das Migration Tool nutzt, inklusive
+Link-Button-Pairing, deCONZ-Fehlerantworten und Fehlerinjektion
+"""
+
+import json
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from websocket_lite import WebSocketServer
+
+from .fleet import generate_fleet
+
+# deCONZ-Fehlertypen (wie in der REST-API-Dokumentation)
+ERROR_UNAUTHORIZED = 1
+ERROR_RESOURCE_NOT_AVAILABLE = 3
+ERROR_LINK_BUTTON_NOT_PRESSED = 101
+ERROR_INTERNAL = 901
+
+
+def error_payload(error_type, address, description):
+    """deCONZ-Fehlerantwort."""
+    return [{"error": {"type": error_type, "address": address, "description": description}}]
+
+
+class FaultProfile:
+    """Fehlerinjektion für den Simulator.
+
+    latency/jitter: zusätzliche Antwortzeit in Sekunden (Basis + gleichverteilt)
+    timeout_rate:   Anteil der Anfragen, die `hang` Sekunden hängen und ohne Antwort enden
+    error_rate:     Anteil der Anfragen, die mit `error_status` beantwortet werden
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, timeout_rate=0.0, error_rate=0.0,
+                 error_status=503, hang=30.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.timeout_rate = timeout_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang = hang
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        """Würfle die Störung für eine Anfrage aus: (Verzögerung, 'timeout'|'error'|None)."""
+        with self.lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self.rng.random()
+        if roll < self.timeout_rate:
+            return delay, 'timeout'
+        if roll < self.timeout_rate + self.error_rate:
+            return delay, 'error'
+        return delay, None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Header und Body werden getrennt geschrieben; ohne TCP_NODELAY
+    # verzögert Delayed-ACK kleine Antworten um ~40 ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.simulator.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, headers=None):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def _dispatch(self):
+        simulator = self.server.simulator
+        simulator.count_request(self.command, self.path)
+        # Body immer lesen, sonst gilt er bei Keep-Alive als nächste Anfrage
+        body = self._read_json() if self.command in ("POST", "PUT") else None
+        delay, fault = simulator.faults.draw()
+        if delay:
+            time.sleep(delay)
+        if fault == 'timeout':
+            time.sleep(simulator.faults.hang)
+            self.close_connection = True
+            return
+        if fault == 'error':
+            self._send(simulator.faults.error_status,
+                       error_payload(ERROR_INTERNAL, self.path, "internal error"))
+            return
+
+        status, payload, headers = simulator.handle(self.command, self.path, body,
+                                                    self.headers.get("If-None-Match"))
+        if status == 304:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self._send(status, payload, headers)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class DeconzSimulator:
+    """Simuliertes deCONZ-Gateway (REST + WebSocket) für Tests und Benchmarks.
+
+    Beispiel:
+        with DeconzSimulator(generate_fleet(1000), api_keys=["KEY"]) as sim:
+            get_devices(sim.host, sim.port, "KEY")
+    """
+
+    def __init__(self, fleet=None, host="127.0.0.1", port=0, websocket_port=0,
+                 api_keys=("SIMULATOR",), faults=None, link_button=False, verbose=False):
+        self.fleet = fleet if fleet is not None else generate_fleet()
+        self.host = host
+        self.requested_port = port
+        self.requested_websocket_port = websocket_port
+        self.faults = faults or FaultProfile()
+        self.verbose = verbose
+
+        self.lock = threading.Lock()
+        self.link_button_until = float('inf') if link_button else 0.0
+        self.requests = {}
+        self.versions = {"sensors": 0, "lights": 0, "groups": 0, "config": 0}
+        self._cache = {}
+
+        whitelist = self.fleet["config"].setdefault("whitelist", {})
+        for key in api_keys:
+            whitelist.setdefault(key, self._whitelist_entry("simulator"))
+
+        self.http = None
+        self.websocket = None
+
+    # ------------------------------------------------------------------
+    # Lebenszyklus
+    # ------------------------------------------------------------------
+
+    @property
+    def port(self):
+        return self.http.server_address[1]
+
+    @property
+    def websocket_port(self):
+        return self.websocket.port
+
+    def start(self):
+        """Starte REST- und WebSocket-Server in Hintergrund-Threads."""
+        self.websocket = WebSocketServer(self.host, self.requested_websocket_port).start()
+        self.fleet["config"]["websocketport"] = self.websocket.port
+        self.http = _HTTPServer((self.host, self.requested_port), _Handler)
+        self.http.simulator = self
+        # Kurzes Poll-Intervall, damit stop() in Tests nicht 0,5 s blockiert
+        threading.Thread(target=self.http.serve_forever, kwargs={'poll_interval': 0.05},
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.http:
+            self.http.shutdown()
+            self.http.server_close()
+        if self.websocket:
+            self.websocket.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Steuerung
+    # ------------------------------------------------------------------
+
+    def press_link_button(self, seconds=60):
+        """Öffne das Pairing-Fenster für `seconds` Sekunden."""
+        with self.lock:
+            self.link_button_until = time.monotonic() + seconds
+
+    def count_request(self, method, path):
+        with self.lock:
+            key = f"{method} {path.split('?')[0]}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def add_resource(self, collection, resource, resource_id=None):
+        """Füge einen Sensor oder ein Licht hinzu und sende ein 'added'-Event."""
+        with self.lock:
+            items = self.fleet[collection]
+            if resource_id is None:
+                resource_id = str(max((int(i) for i in items), default=0) + 1)
+            items[resource_id] = resource
+            self._invalidate(collection)
+        key = "sensor" if collection == "sensors" else "light"
+        self.emit({"t": "event", "e": "added", "r": collection, "id": resource_id, key: resource})
+        return resource_id
+
+    def delete_resource(self, collection, resource_id):
+        """Entferne eine Ressource und sende ein 'deleted'-Event."""
+        with self.lock:
+            removed = self.fleet[collection].pop(resource_id, None)
+            self._invalidate(collection)
+        if removed is not None:
+            self.emit({"t": "event", "e": "deleted", "r": collection, "id": resource_id})
+        return removed is not None
+
+    def start_event_stream(self, rate=10.0, seed=None):
+        """Sende `rate` 'changed'-Events pro Sekunde mit zufälligen Sensorwerten.
+
+        Gibt ein threading.Event zurück; set() beendet den Stream.
+        """
+        stop = threading.Event()
+        rng = random.Random(seed)
+
+        def stream():
+            interval = 1.0 / rate
+            next_send = time.monotonic()
+            while not stop.is_set():
+                with self.lock:
+                    sensor_ids = list(self.fleet["sensors"])
+                if sensor_ids:
+                    sensor_id = rng.choice(sensor_ids)
+                    sensor = self.fleet["sensors"].get(sensor_id) or {}
+                    state = dict(sensor.get("state", {}),
+                                 lastupdated=time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime()))
+                    self.emit({"t": "event", "e": "changed", "r": "sensors",
+                               "id": sensor_id, "uniqueid": sensor.get("uniqueid"), "state": state})
+                next_send += interval
+                stop.wait(max(0.0, next_send - time.monotonic()))
+
+        threading.Thread(target=stream, daemon=True).start()
+        return stop
+
+    def emit(self, event):
+        """Sende ein Event an alle WebSocket-Clients."""
+        if self.websocket:
+            return self.websocket.broadcast(json.dumps(event, separators=(',', ':')))
+        return 0
+
+    # ------------------------------------------------------------------
+    # REST
+    # ------------------------------------------------------------------
+
+    def _whitelist_entry(self, name):
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        return {"create date": now, "last use date": now, "name": name}
+
+    def _invalidate(self, collection):
+        # Aufrufer hält self.lock
+        self.versions[collection] += 1
+        self._cache.pop(collection, None)
+
+    def _collection(self, collection):
+        """Serialisierte Sammlung mit ETag; wird bis zur nächsten Änderung gecacht."""
+        with self.lock:
+            cached = self._cache.get(collection)
+            if cached is None:
+                data = json.dumps(self.fleet[collection]).encode('utf-8')
+                cached = (data, f'"{collection}-{self.versions[collection]}"')
+                self._cache[collection] = cached
+            return cached
+
+    def _public_config(self):
+        config = self.fleet["config"]
+        return {key: config.get(key) for key in
+                ("apiversion", "bridgeid", "datastoreversion", "name", "swversion")}
+
+    def handle(self, method, path, body, if_none_match=None):
+        """Beantworte eine REST-Anfrage. Gibt (Status, Payload, Header) zurück."""
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        if not parts or parts[0] != "api":
+            return 404, error_payload(ERROR_RESOURCE_NOT_AVAILABLE, path, "resource not available"), {}
+
+        if len(parts) == 1:
+            if method == "POST":
+                return self._pair(body)
+            return 403, error_payload(ERROR_UNAUTHORIZED, "/", "unauthorized user"), {}
+
+        key, rest = parts[1], parts[2:]
+        if key == "config" and not rest:
+            return 200, self._public_config(), {}
+
+        whitelist = self.fleet["config"]["whitelist"]
+        if key not in whitelist:
+            if rest == ["config"]:
+                return 200, self._public_config(), {}
+            address = "/" + "/".join(rest)
+            return 403, error_payload(ERROR_UNAUTHORIZED, address, "unauthorized user"), {}
+        with self.lock:
+            whitelist[key]["last use date"] = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+        if not rest:
+            return 200, {name: self.fleet[name] for name in ("config", "lights", "sensors", "groups")}, {}
+
+        collection = rest[0]
+        if collection == "config":
+            if len(rest) == 3 and rest[1] == "whitelist" and method == "DELETE":
+                with self.lock:
+                    removed = whitelist.pop(rest[2], None)
+                    self._invalidate("config")
+                if removed is None:
+                    return 404, error_payload(ERROR_RESOURCE_NOT_AVAILABLE, "/" + "/".join(rest),
+                                              "resource, /" + "/".join(rest) + ", not available"), {}
+                return 200, [{"success": f"/config/whitelist/{rest[2]} deleted."}], {}
+            if len(rest) == 1 and method in ("GET", "HEAD"):
+                data, etag = self._collection("config")
+                if if_none_match == etag:
+                    return 304, b"", {"ETag": etag}
+                return 200, data, {"ETag": etag}
+
+        if collection in ("sensors", "lights", "groups") and method in ("GET", "HEAD"):
+            if len(rest) == 1:
+                data, etag = self._collection(collection)
+                if if_none_match == etag:
+                    return 304, b"", {"ETag": etag}
+                return 200, data, {"ETag": etag}
+            if len(rest) == 2 and rest[1] in self.fleet[collection]:
+                return 200, self.fleet[collection][rest[1]], {}
+
+        if collection in ("sensors", "lights") and method == "DELETE" and len(rest) == 2:
+            if self.delete_resource(collection, rest[1]):
+                return 200, [{"success": {"id": rest[1]}}], {}
+
+        address = "/" + "/".join(rest)
+        return 404, error_payload(ERROR_RESOURCE_NOT_AVAILABLE, address,
+                                  f"resource, {address}, not available"), {}
+
+    def _pair(self, body):
+        if not isinstance(body, dict) or not body.get("devicetype"):
+            return 400, error_payload(2, "/", "body contains invalid JSON"), {}
+        with self.lock:
+            if time.monotonic() > self.link_button_until:
+                return 403, error_payload(ERROR_LINK_BUTTON_NOT_PRESSED, "/",
+                                          "link button not pressed"), {}
+            username = body.get("username") or secrets.token_hex(5).upper()
+            self.fleet["config"]["whitelist"][username] = self._whitelist_entry(body["devicetype"])
+            self._invalidate("config")
+        return 200, [{"success": {"username": username}}], {}
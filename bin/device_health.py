@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Zustand der Geräte vor der Migration: aktiv, veraltet (stale) oder tot
+Grundlage sind lastseen/state.lastupdated, config.reachable bzw.
+state.reachable und der Batteriestand; tote Geräte müssen nicht nach
+Zigbee2MQTT übernommen werden
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+
+from inventory import is_reachable
+from snapshot import SNAPSHOT_FILE, load_snapshot
+
+ACTIVE = "active"
+STALE = "stale"
+DEAD = "dead"
+STATUSES = (ACTIVE, STALE, DEAD)
+
+STALE_AFTER_DAYS = 30
+DEAD_AFTER_DAYS = 180
+
+LABELS = {ACTIVE: "aktiv", STALE: "veraltet", DEAD: "tot"}
+
+
+def _seen(device):
+    """Letztes Lebenszeichen als "YYYY-MM-DDTHH:MM" (UTC); None wenn unbekannt.
+
+    deCONZ liefert ISO-Zeitstempel in UTC, die sich als Text vergleichen
+    lassen; das spart das Parsen bei großen Installationen.
+    """
+    value = device.get('last_seen') or (device.get('state') or {}).get('lastupdated')
+    if not isinstance(value, str) or len(value) < 16 or value == 'none':
+        return None
+    return value[:16]
+
+
+def classify(device, stale_before, dead_before):
+    """Zustand eines Geräts.
+
+    Args:
+        stale_before, dead_before: Zeitpunkte als "YYYY-MM-DDTHH:MM" (UTC);
+            ältere Lebenszeichen gelten als veraltet bzw. tot
+
+    Geräte ohne Zeitstempel und ohne Erreichbarkeitsangabe gelten als aktiv,
+    damit nichts allein mangels Daten wegfällt.
+    """
+    seen = _seen(device)
+    reachable = is_reachable(device)
+    battery = (device.get('config') or {}).get('battery')
+
+    if seen is not None and seen < dead_before:
+        return DEAD
+    if battery == 0:
+        return DEAD
+    if reachable is False:
+        # Nicht erreichbar und schon länger still: tot, sonst nur veraltet
+        return DEAD if seen is None or seen < stale_before else STALE
+    if seen is not None and seen < stale_before:
+        return STALE
+    return ACTIVE
+
+
+def _threshold(now, days):
+    return time.strftime('%Y-%m-%dT%H:%M', time.gmtime(now - days * 86400))
+
+
+def analyze_devices(devices, now=None, stale_days=STALE_AFTER_DAYS, dead_days=DEAD_AFTER_DAYS):
+    """Bewerte alle Geräte in einem Durchlauf und setze device['health'].
+
+    Returns:
+        Counter mit der Anzahl je Zustand
+    """
+    now = time.time() if now is None else now
+    stale_before = _threshold(now, stale_days)
+    dead_before = _threshold(now, dead_days)
+    counts = Counter({status: 0 for status in STATUSES})
+    for device in devices:
+        status = classify(device, stale_before, dead_before)
+        device['health'] = status
+        counts[status] += 1
+    return counts
+
+
+def exclusions(policy):
+    """Auszuschließende Zustände: "none", "dead" oder "stale" (veraltete und tote)."""
+    return {'none': (), 'dead': (DEAD,), 'stale': (STALE, DEAD)}[policy]
+
+
+def exclude_health(*statuses):
+    """Transformation für die Migrations-Engine: Geräte mit diesen Zuständen entfernen.
+
+    Die entfernten Geräte stehen danach in data['excluded'].
+    """
+    def transform(data):
+        devices = data['devices']
+        if any('health' not in device for device in devices):
+            analyze_devices(devices)
+        kept, excluded = [], []
+        for device in devices:
+            (excluded if device['health'] in statuses else kept).append(device)
+        return dict(data, devices=kept, excluded=excluded)
+    return transform
+
+
+def migrated_devices(snapshot):
+    """Geräte eines Snapshots ohne die bei der Migration bewusst ausgelassenen.
+
+    Returns:
+        (migrierte Geräte, Anzahl ausgelassener Geräte)
+    """
+    devices = snapshot.get('devices') or []
+    excluded = exclusions(snapshot.get('exclude') or 'none')
+    if not excluded:
+        return devices, 0
+    migrated = [device for device in devices if device.get('health') not in excluded]
+    return migrated, len(devices) - len(migrated)
+
+
+def format_counts(counts):
+    return ", ".join(f"{counts.get(status, 0)} {LABELS[status]}" for status in STATUSES)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Veraltete und tote Geräte in einem Snapshot finden")
+    parser.add_argument("snapshot", nargs="?", default=SNAPSHOT_FILE, help=f"Snapshot (Standard: {SNAPSHOT_FILE})")
+    parser.add_argument("--stale-days", type=float, default=STALE_AFTER_DAYS,
+                        help=f"Tage ohne Lebenszeichen bis veraltet (Standard: {STALE_AFTER_DAYS})")
+    parser.add_argument("--dead-days", type=float, default=DEAD_AFTER_DAYS,
+                        help=f"Tage ohne Lebenszeichen bis tot (Standard: {DEAD_AFTER_DAYS})")
+    parser.add_argument("--all", action="store_true", help="Auch aktive Geräte auflisten")
+    args = parser.parse_args(argv)
+
+    try:
+        devices = load_snapshot(args.snapshot).get('devices') or []
+    except (OSError, ValueError) as e:
+        print(f"❌ Snapshot nicht lesbar: {e}")
+        sys.exit(2)
+
+    counts = analyze_devices(devices, stale_days=args.stale_days, dead_days=args.dead_days)
+    for device in devices:
+        if args.all or device['health'] != ACTIVE:
+            print(f"{LABELS[device['health']]:<9} {device['type']:<6} {device['id']:>5}  {device['name']}")
+    print(f"\n🩺 {len(devices)} Geräte: {format_counts(counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Recorder und Replayer für den deCONZ-WebSocket-Event-Stream
+Zeichnet Events mit Zeitstempel auf und spielt sie über einen lokalen
+WebSocket-Server in Echtzeit, beschleunigt oder mit maximaler Rate ab
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from websocket_lite import WebSocketClient, WebSocketServer
+
+# Dateiformat: eine Zeile pro Event, append-only
+#   <Unix-Zeit in Sekunden, 3 Nachkommastellen>\t<kompaktes JSON>\n
+
+
+def record(host, port, filename, duration=None, max_events=None):
+    """Zeichne Events vom deCONZ-WebSocket auf.
+
+    Hängt an eine bestehende Aufzeichnung an. Gibt die Anzahl Events zurück.
+    """
+    client = WebSocketClient(host, port).connect()
+    print(f"🔴 Aufnahme von ws://{host}:{port} nach {filename}")
+    deadline = time.monotonic() + duration if duration else None
+    count = 0
+    try:
+        with open(filename, 'a', encoding='utf-8') as f:
+            while max_events is None or count < max_events:
+                timeout = None
+                if deadline:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                message = client.recv(timeout=timeout)
+                if message is None:
+                    continue
+                try:
+                    message = json.dumps(json.loads(message), separators=(',', ':'),
+                                         ensure_ascii=False)
+                except ValueError:
+                    continue
+                f.write(f"{time.time():.3f}\t{message}\n")
+                f.flush()
+                count += 1
+    finally:
+        client.close()
+    return count
+
+
+def iter_recording(filename):
+    """Lies eine Aufzeichnung. Liefert (Zeitstempel, JSON-Text)."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            timestamp, _, message = line.partition('\t')
+            try:
+                yield float(timestamp), message
+            except ValueError:
+                continue
+
+
+def replay(filename, server, speed=1.0, max_gap=5.0, loops=1):
+    """Spiele eine Aufzeichnung über einen WebSocketServer ab.
+
+    speed=1 entspricht Echtzeit, speed=N ist N-fach beschleunigt,
+    speed=0 sendet so schnell wie möglich. Pausen über `max_gap` Sekunden
+    (z.B. zwischen zwei Aufnahmesitzungen) werden gekürzt.
+
+    Gibt Statistiken zurück: Events, Dauer, Events/s und die maximale
+    Verspätung gegenüber dem Zeitplan.
+    """
+    events = 0
+    max_lag = 0.0
+    start = time.perf_counter()
+    schedule = 0.0
+
+    for _ in range(loops):
+        previous = None
+        for timestamp, message in iter_recording(filename):
+            if previous is not None and speed:
+                schedule += min(max(timestamp - previous, 0.0), max_gap) / speed
+                delay = schedule - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    max_lag = max(max_lag, -delay)
+            previous = timestamp
+            server.broadcast(message)
+            events += 1
+
+    elapsed = time.perf_counter() - start
+    return {
+        'events': events,
+        'seconds': round(elapsed, 3),
+        'events_per_second': round(events / elapsed, 1) if elapsed > 0 else None,
+        'max_lag_ms': round(max_lag * 1000, 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="deCONZ-WebSocket-Events aufzeichnen und wieder abspielen"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="Events vom Gateway aufzeichnen")
+    rec.add_argument("output", help="Aufzeichnungsdatei (wird angehängt)")
+    rec.add_argument("--host", default="192.168.178.76", help="deCONZ-Host")
+    rec.add_argument("--websocket-port", type=int, default=443, help="deCONZ-WebSocket-Port")
+    rec.add_argument("--duration", type=float, help="Aufnahmedauer in Sekunden")
+    rec.add_argument("--max-events", type=int, help="Nach N Events beenden")
+
+    play = commands.add_parser("replay", help="Aufzeichnung über lokalen WebSocket abspielen")
+    play.add_argument("input", help="Aufzeichnungsdatei")
+    play.add_argument("--bind", default="127.0.0.1", help="Adresse des lokalen Servers")
+    play.add_argument("--port", type=int, default=8443, help="Port des lokalen Servers")
+    play.add_argument("--speed", type=float, default=1.0,
+                      help="1 = Echtzeit, N = N-fach, 0 = maximale Rate")
+    play.add_argument("--clients", type=int, default=1, help="Vor dem Start auf N Clients warten")
+    play.add_argument("--loops", type=int, default=1, help="Aufzeichnung N-mal abspielen")
+    play.add_argument("--json", action="store_true", help="Statistik als JSON ausgeben")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        try:
+            count = record(args.host, args.websocket_port, args.output,
+                           duration=args.duration, max_events=args.max_events)
+        except KeyboardInterrupt:
+            print("\n⏹️  Aufnahme beendet")
+            return
+        except OSError as e:
+            print(f"❌ Aufnahme fehlgeschlagen: {e}")
+            sys.exit(2)
+        print(f"✅ {count} Events aufgezeichnet")
+        return
+
+    server = WebSocketServer(args.bind, args.port).start()
+    print(f"▶️  Replay-Server auf ws://{args.bind}:{server.port}, "
+          f"warte auf {args.clients} Client(s)...")
+    try:
+        server.wait_for_clients(args.clients)
+        stats = replay(args.input, server, speed=args.speed, loops=args.loops)
+    except KeyboardInterrupt:
+        print("\n⏹️  Replay abgebrochen")
+        return
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        print(f"✅ {stats['events']} Events in {stats['seconds']}s "
+              f"({stats['events_per_second']} Events/s, max. Verzug {stats['max_lag_ms']} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Streaming-Export der Geräte eines oder mehrerer deCONZ-Gateways
+Ein Gerät pro Zeile (NDJSON) oder CSV-Zeile, direkt aus der HTTP-Antwort
+gelesen und geschrieben; der Speicherbedarf hängt nicht von der Anzahl der
+Geräte ab
+"""
+
+import argparse
+import codecs
+import contextlib
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+
+from credentials import stored_api_key
+from deconz_client import get_client
+from inventory import is_reachable
+from pairing import parse_gateway
+from snapshot import device_from_resource
+
+RESOURCE_TYPES = {'sensors': 'sensor', 'lights': 'light'}
+
+DEFAULT_FIELDS = ['gateway', 'type', 'id', 'name', 'manufacturer', 'model', 'unique_id',
+                  'reachable', 'last_seen']
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_object_items(chunks):
+    """(Schlüssel, Wert) eines JSON-Objekts der obersten Ebene, stückweise gelesen.
+
+    Im Speicher liegt jeweils nur ein Block und der aktuelle Wert, nicht die
+    ganze Antwort.
+
+    Args:
+        chunks: Iterator über Textblöcke
+
+    Raises:
+        ValueError: Die Antwort ist kein vollständiges JSON-Objekt
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer, position = "", 0
+    expect = '{'
+    key = None
+
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position >= len(buffer):
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ValueError("Unvollständige JSON-Antwort")
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        char = buffer[position]
+        if expect in ('{', ':'):
+            if char != expect:
+                raise ValueError(f"'{expect}' erwartet, '{char}' gefunden")
+            position += 1
+            expect = 'key' if expect == '{' else 'value'
+        elif expect == ',':
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"',' erwartet, '{char}' gefunden")
+            position += 1
+            expect = 'key'
+        else:
+            if expect == 'key' and char == '}' and key is None:
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = None
+            # Am Pufferende kann auch eine abgeschnittene Zahl gültig aussehen
+            if end is None or end >= len(buffer):
+                chunk = next(chunks, None)
+                if chunk is None and end is None:
+                    raise ValueError("Unvollständige JSON-Antwort")
+                if chunk is not None:
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+            position = end
+            if expect == 'key':
+                key, expect = value, ':'
+            else:
+                yield key, value
+                expect = ','
+
+
+def decode_chunks(chunks, encoding='utf-8'):
+    """Bytes-Blöcke in Text; Mehrbyte-Zeichen dürfen über Blockgrenzen reichen."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def stream_devices(client):
+    """(Geräteeintrag, Ressource) aller Sensoren und Lichter eines Gateways."""
+    for collection, device_type in RESOURCE_TYPES.items():
+        response = client.get(f"/{collection}", stream=True)
+        try:
+            response.raise_for_status()
+            chunks = decode_chunks(response.iter_content(CHUNK_SIZE), response.encoding or 'utf-8')
+            for resource_id, resource in iter_object_items(chunks):
+                yield device_from_resource(resource_id, resource, device_type), resource
+        finally:
+            response.close()
+
+
+def field_value(field, device, resource, gateway):
+    """Wert einer Spalte; Pfade wie "config.battery" lesen aus der deCONZ-Ressource."""
+    if field == 'gateway':
+        return gateway
+    if field == 'reachable':
+        return is_reachable(device)
+    if field in device:
+        return device[field]
+    value = resource
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class NdjsonWriter:
+    def __init__(self, stream, fields):
+        self.stream = stream
+        self.fields = fields
+
+    def write(self, values):
+        self.stream.write(json.dumps(dict(zip(self.fields, values)), ensure_ascii=False))
+        self.stream.write("\n")
+
+
+class CsvWriter:
+    def __init__(self, stream, fields):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(fields)
+
+    def write(self, values):
+        self.writer.writerow(['' if value is None
+                              else json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list))
+                              else value
+                              for value in values])
+
+
+WRITERS = {'ndjson': NdjsonWriter, 'csv': CsvWriter}
+
+
+def open_output(filename, compress=False):
+    """Ausgabedatei ("-" = stdout); gzip bei compress oder Endung .gz."""
+    if filename in (None, '-'):
+        if compress:
+            return io.TextIOWrapper(gzip.GzipFile(filename='', mode='wb', fileobj=sys.stdout.buffer),
+                                    encoding='utf-8', newline='')
+        return sys.stdout
+    if compress or filename.endswith('.gz'):
+        return gzip.open(filename, 'wt', encoding='utf-8', newline='')
+    return open(filename, 'w', encoding='utf-8', newline='')
+
+
+def export_devices(gateways, stream, fields=None, output_format='ndjson'):
+    """Exportiere die Geräte aller Gateways.
+
+    Args:
+        gateways: Liste von (host, port, api_key)
+
+    Returns:
+        Anzahl exportierter Geräte
+    """
+    fields = fields or DEFAULT_FIELDS
+    writer = WRITERS[output_format](stream, fields)
+    count = 0
+    for host, port, api_key in gateways:
+        gateway = f"{host}:{port}"
+        for device, resource in stream_devices(get_client(host, port, api_key)):
+            writer.write([field_value(field, device, resource, gateway) for field in fields])
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Geräte von deCONZ-Gateways als NDJSON oder CSV exportieren (Streaming)",
+        epilog="Beispiel: export_devices.py 192.168.1.10 192.168.1.11:4530 -o geraete.ndjson.gz"
+    )
+    parser.add_argument("gateways", nargs="+", metavar="HOST[:PORT]", help="deCONZ-Gateways")
+    parser.add_argument("--api-key", help="API-Key für alle Gateways (Standard: gespeicherte Keys)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="ndjson", help="Ausgabeformat")
+    parser.add_argument("--fields", default=",".join(DEFAULT_FIELDS),
+                        help="Spalten, auch Pfade in der Ressource wie state.on oder config.battery")
+    parser.add_argument("-o", "--output", default="-", help="Ausgabedatei (Standard: stdout)")
+    parser.add_argument("--gzip", action="store_true", help="gzip-komprimiert schreiben (automatisch bei .gz)")
+    args = parser.parse_args(argv)
+
+    gateways = []
+    for value in args.gateways:
+        host, port = parse_gateway(value)
+        # stdout gehört den exportierten Daten
+        with contextlib.redirect_stdout(sys.stderr):
+            api_key = args.api_key or stored_api_key(host, port)
+        if not api_key:
+            print(f"❌ Kein API-Key für {host}:{port} (--api-key oder bin/pairing.py)", file=sys.stderr)
+            sys.exit(1)
+        gateways.append((host, port, api_key))
+
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()]
+    start = time.perf_counter()
+    output = open_output(args.output, args.gzip)
+    try:
+        count = export_devices(gateways, output, fields, args.format)
+    except Exception as e:
+        print(f"❌ Export fehlgeschlagen: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"✅ {count} Geräte exportiert → {args.output} ({time.perf_counter() - start:.1f}s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
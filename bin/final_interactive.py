@@ -4,12 +4,26 @@ Finales interaktives deCONZ zu Zigbee2MQTT Migration Tool
 Mit vollständiger Benutzerführung und Link-Button-Unterstützung
 """
 
-import requests
-import yaml
-import random
-import time
+import argparse
 import sys
-from pathlib import Path
+import time
+from collections import Counter
+
+import requests
+
+from compatibility import annotate_compatibility, print_unknown, print_unsupported
+from config_diff import GENERATED_PATHS, diff_configs, load_config, print_report
+from credentials import remember_api_key, stored_api_key, validate_api_key
+from deconz_client import get_client
+from device_health import (DEAD, LABELS, STALE, analyze_devices, exclude_health, exclusions,
+                           format_counts)
+from migration_engine import (FriendlyNames, MigrationEngine, RestSource, StaticSource, YamlSink,
+                              assign_rooms, friendly_names, name_map_file, network_parameters)
+from pairing import pair_interactive
+from profiling import add_profile_arguments, create_profiler
+from run_journal import NullJournal, RunJournal
+from snapshot import save_snapshot
+from tracing import add_trace_arguments, configure_tracing, disable_tracing, traced
 
 def print_header():
     """Zeige den Header des Tools."""
@@ -66,7 +80,7 @@ def test_connection(host, port):
     """Teste Verbindung zu deCONZ."""
     print(f"\n🔍 Teste Verbindung zu {host}:{port}...")
     try:
-        response = requests.get(f"http://{host}:{port}/api", timeout=5)
+        response = get_client(host, port).get(auth=False)
         if response.status_code in [200, 403]:
             print("✅ Verbindung erfolgreich!")
             return True
@@ -77,105 +91,15 @@ def test_connection(host, port):
         print(f"❌ Verbindung fehlgeschlagen: {e}")
         return False
 
-def generate_api_key_interactive(host, port):
-    """Generiere API-Key mit interaktiver Anleitung."""
-    print("\n" + "=" * 60)
-    print("🔑 API-Key Generierung")
-    print("=" * 60)
-    print("Um einen API-Key zu generieren, musst du den")
-    print("LINK-BUTTON auf deinem deCONZ-Gateway drücken.")
-    print("\n📋 Schritt-für-Schritt Anleitung:")
-    print("1. Gehe zu deinem deCONZ-Gateway (ConBee II, RaspBee, etc.)")
-    print("2. Suche den LINK-BUTTON (meist ein kleiner Taster)")
-    print("3. Drücke und halte den Button für 5-10 Sekunden")
-    print("4. Warte bis die LED blinkt oder sich ändert")
-    print("5. Drücke dann ENTER hier im Terminal")
-    print("\n⏱️  Du hast 60 Sekunden Zeit!")
-    print("=" * 60)
-    
-    # Warte auf Benutzer
-    input("\nDrücke ENTER wenn du den Link-Button gedrückt hast...")
-    
-    # Generiere App-Namen
-    app_name = f"deconz-migrator-{random.randint(1000, 9999)}"
-    url = f"http://{host}:{port}/api"
-    payload = {"devicetype": app_name}
-    headers = {"Content-Type": "application/json"}
-    
-    print(f"\n🔄 Generiere API-Key...")
-    print(f"📱 App-Name: {app_name}")
-    
-    try:
-        # Erster Versuch
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        
-        if response.status_code in [200, 403]:
-            data = response.json()
-            
-            if isinstance(data, list) and len(data) > 0:
-                result = data[0]
-                
-                if "success" in result and "username" in result["success"]:
-                    api_key = result["success"]["username"]
-                    print(f"✅ API-Key erfolgreich generiert!")
-                    print(f"🔑 API-Key: {api_key}")
-                    return api_key
-                    
-                elif "error" in result:
-                    error_msg = result["error"].get("description", "Unbekannter Fehler")
-                    print(f"❌ Fehler: {error_msg}")
-                    
-                    if "link button not pressed" in error_msg.lower():
-                        print("\n🔄 Link-Button nicht erkannt!")
-                        print("📋 Versuche es nochmal:")
-                        print("1. Drücke den Link-Button länger (10 Sekunden)")
-                        print("2. Warte bis die LED blinkt")
-                        print("3. Drücke ENTER")
-                        
-                        input("\nDrücke ENTER für den zweiten Versuch...")
-                        
-                        # Zweiter Versuch
-                        response2 = requests.post(url, json=payload, headers=headers, timeout=10)
-                        if response2.status_code in [200, 403]:
-                            data2 = response2.json()
-                            if isinstance(data2, list) and len(data2) > 0:
-                                result2 = data2[0]
-                                if "success" in result2 and "username" in result2["success"]:
-                                    api_key = result2["success"]["username"]
-                                    print(f"✅ API-Key erfolgreich generiert (2. Versuch)!")
-                                    print(f"🔑 API-Key: {api_key}")
-                                    return api_key
-                                else:
-                                    print(f"❌ Auch der zweite Versuch fehlgeschlagen: {result2}")
-                    else:
-                        print(f"❌ Unerwarteter Fehler: {error_msg}")
-        else:
-            print(f"❌ HTTP-Fehler: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Fehler bei API-Key-Generierung: {e}")
-    
-    print("\n💡 Tipps:")
-    print("- Stelle sicher, dass deCONZ läuft")
-    print("- Drücke den Link-Button länger (5-10 Sekunden)")
-    print("- Versuche es erneut")
-    print("- Oder verwende einen bereits vorhandenen API-Key")
-    return None
-
 def test_api_key(host, port, api_key):
     """Teste API-Key."""
     print(f"\n🔑 Teste API-Key...")
     try:
-        url = f"http://{host}:{port}/api/{api_key}/config"
-        headers = {"Content-Type": "application/json"}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
+        if validate_api_key(host, port, api_key):
             print("✅ API-Key gültig!")
             return True
         else:
-            print(f"❌ API-Key ungültig: HTTP {response.status_code}")
+            print("❌ API-Key ungültig!")
             return False
             
     except Exception as e:
@@ -187,33 +111,17 @@ def get_network_config(host, port, api_key):
     print(f"\n📋 Hole Netzwerkkonfiguration...")
     
     try:
-        url = f"http://{host}:{port}/api/{api_key}/config"
-        headers = {"Content-Type": "application/json"}
+        network_config = RestSource(host, port, api_key).fetch_network_config()
         
-        response = requests.get(url, headers=headers, timeout=10)
+        print("✅ Netzwerkkonfiguration abgerufen:")
+        print(f"   📡 Kanal: {network_config['channel']}")
+        print(f"   🆔 PAN-ID: 0x{network_config['pan_id']:04X}")
+        print(f"   🏠 Gateway: {network_config['name']}")
         
-        if response.status_code == 200:
-            config = response.json()
-            
-            network_config = {
-                'channel': config.get('zigbeechannel'),
-                'pan_id': config.get('panid'),
-                'ext_pan_id': config.get('extpanid'),
-                'network_key': config.get('networkkey'),
-                'name': config.get('name', 'deCONZ'),
-                'version': config.get('version', 'Unknown')
-            }
-            
-            print("✅ Netzwerkkonfiguration abgerufen:")
-            print(f"   📡 Kanal: {network_config['channel']}")
-            print(f"   🆔 PAN-ID: 0x{network_config['pan_id']:04X}")
-            print(f"   🏠 Gateway: {network_config['name']}")
-            
-            return network_config
-        else:
-            print(f"❌ Fehler beim Abrufen der Konfiguration: HTTP {response.status_code}")
-            return None
-            
+        return network_config
+    except requests.HTTPError as e:
+        print(f"❌ Fehler beim Abrufen der Konfiguration: HTTP {e.response.status_code}")
+        return None
     except Exception as e:
         print(f"❌ Fehler: {e}")
         return None
@@ -222,47 +130,26 @@ def get_devices(host, port, api_key):
     """Hole alle Geräte von deCONZ."""
     print(f"\n🔍 Hole Geräte...")
     
-    devices = []
-    
     try:
-        headers = {"Content-Type": "application/json"}
-        base_url = f"http://{host}:{port}/api/{api_key}"
+        source = RestSource(host, port, api_key)
         
         # Hole Sensoren
         print("   📊 Lade Sensoren...")
-        sensors_response = requests.get(f"{base_url}/sensors", headers=headers, timeout=10)
-        if sensors_response.status_code == 200:
-            sensors = sensors_response.json()
-            for sensor_id, sensor in sensors.items():
-                device_info = {
-                    'id': sensor_id,
-                    'name': sensor.get('name', f'sensor_{sensor_id}'),
-                    'type': 'sensor',
-                    'model': sensor.get('modelid', ''),
-                    'manufacturer': sensor.get('manufacturername', ''),
-                    'unique_id': sensor.get('uniqueid', ''),
-                    'state': sensor.get('state', {})
-                }
-                devices.append(device_info)
-            print(f"   ✅ {len(sensors)} Sensoren gefunden")
+        sensors = source.fetch_collection("sensors")
+        print(f"   ✅ {len(sensors)} Sensoren gefunden")
         
         # Hole Lichter
         print("   💡 Lade Lichter...")
-        lights_response = requests.get(f"{base_url}/lights", headers=headers, timeout=10)
-        if lights_response.status_code == 200:
-            lights = lights_response.json()
-            for light_id, light in lights.items():
-                device_info = {
-                    'id': light_id,
-                    'name': light.get('name', f'light_{light_id}'),
-                    'type': 'light',
-                    'model': light.get('modelid', ''),
-                    'manufacturer': light.get('manufacturername', ''),
-                    'unique_id': light.get('uniqueid', ''),
-                    'state': light.get('state', {})
-                }
-                devices.append(device_info)
-            print(f"   ✅ {len(lights)} Lichter gefunden")
+        lights = source.fetch_collection("lights")
+        print(f"   ✅ {len(lights)} Lichter gefunden")
+        
+        devices = sensors + lights
+        
+        # Räume helfen beim Auflösen doppelter Namen, sind aber nicht zwingend
+        try:
+            assign_rooms(devices, source.fetch_rooms())
+        except Exception as e:
+            print(f"   ⚠️  Räume nicht abrufbar: {e}")
         
         print(f"\n✅ Insgesamt {len(devices)} Geräte gefunden!")
         return devices
@@ -271,80 +158,92 @@ def get_devices(host, port, api_key):
         print(f"❌ Fehler beim Abrufen der Geräte: {e}")
         return []
 
-def generate_random_hex(byte_count):
-    """Generiere zufällige Hex-Zeichen."""
-    return ''.join(random.choices('0123456789abcdef', k=byte_count * 2))
+def ask_health_policy(devices, policy=None):
+    """Zustand der Geräte anzeigen und fragen, welche übernommen werden.
+
+    Ist `policy` bereits bekannt (z.B. aus einem fortgesetzten Lauf), wird
+    nicht gefragt. Ohne veraltete oder tote Geräte gilt "dead".
 
-def create_zigbee2mqtt_config(devices, network_config, mqtt_server, mqtt_topic):
-    """Erstelle Zigbee2MQTT-Konfiguration."""
+    Returns:
+        Ausschluss-Regel "dead", "stale" oder "none"
+    """
+    health = analyze_devices(devices)
+    print(f"\n🩺 Zustand: {format_counts(health)}")
+    if policy is not None:
+        return policy
+    if not (health[STALE] or health[DEAD]):
+        return "dead"
+    choice = get_user_input(
+        "Übernehmen: [1] Ohne tote Geräte, [2] Nur aktive Geräte, [3] Alle (markiert)",
+        "1",
+        lambda x: x in ['1', '2', '3'],
+        "Wähle 1, 2 oder 3"
+    )
+    return {'1': 'dead', '2': 'stale', '3': 'none'}[choice]
+
+def migration_transforms(exclude="dead", names=None):
+    """Transformationen aller Front-Ends: Zustand, Friendly Names, Zigbee2MQTT-Index."""
+    return [exclude_health(*exclusions(exclude)), friendly_names(names), annotate_compatibility()]
+
+@traced("config.build", "config")
+def create_zigbee2mqtt_config(devices, network_config, mqtt_server, mqtt_topic, exclude="dead",
+                              output="configuration.yaml"):
+    """Erstelle Zigbee2MQTT-Konfiguration über die Migrations-Engine.
+
+    Geräte im Zustand aus `exclude` ("none", "dead", "stale") werden
+    ausgelassen, Friendly Names über die Zuordnung neben `output` vergeben
+    und nicht unterstützte bzw. im Zigbee2MQTT-Index fehlende Geräte gemeldet.
+    """
     print(f"\n⚙️ Erstelle Zigbee2MQTT-Konfiguration...")
     
-    # Verwende Netzwerkkonfiguration oder generiere Werte
-    channel = network_config.get('channel', 15) if network_config else 15
-    pan_id = network_config.get('pan_id', 0x1A63) if network_config else 0x1A63
-    
-    # Generiere fehlende Werte
-    if not network_config or not network_config.get('ext_pan_id'):
-        ext_pan_id = generate_random_hex(8)
+    # Verwende Netzwerkkonfiguration oder generiere fehlende Werte
+    parameters = network_parameters(network_config)
+    _, _, ext_pan_id, network_key, generated = parameters
+    if 'ext_pan_id' in generated:
         print(f"   🔧 Extended PAN ID generiert: 0x{ext_pan_id}")
-    else:
-        ext_pan_id = f"{network_config['ext_pan_id']:016X}"
-    
-    if not network_config or not network_config.get('network_key'):
-        network_key = generate_random_hex(16)
+    if 'network_key' in generated:
         print(f"   🔧 Network Key generiert: 0x{network_key}")
-    else:
-        network_key = f"{network_config['network_key']:032X}"
-    
-    # Erstelle Konfiguration
-    config = {
-        'mqtt': {
-            'base_topic': mqtt_topic,
-            'server': mqtt_server
-        },
-        'serial': {
-            'port': '/dev/ttyACM0'
-        },
-        'advanced': {
-            'pan_id': f"0x{pan_id:04X}",
-            'extended_pan_id': f"0x{ext_pan_id}",
-            'network_key': f"[{', '.join(f'0x{network_key[i:i+2]}' for i in range(0, len(network_key), 2))}]",
-            'channel': int(channel)
-        },
-        'devices': []
-    }
-    
-    # Füge Geräte hinzu
-    for device in devices:
-        device_config = {
-            'id': device['id'],
-            'name': device['name'],
-            'type': device['type']
-        }
-        
-        if device['model']:
-            device_config['model'] = device['model']
-        if device['manufacturer']:
-            device_config['manufacturer'] = device['manufacturer']
-            
-        config['devices'].append(device_config)
     
-    return config
+    names = FriendlyNames.load(name_map_file(output))
+    engine = MigrationEngine(StaticSource(devices, network_config),
+                             transforms=migration_transforms(exclude, names),
+                             mqtt_server=mqtt_server, mqtt_topic=mqtt_topic, parameters=parameters)
+    data = engine.fetch()
+    
+    if data['excluded']:
+        health = Counter(LABELS[device['health']] for device in data['excluded'])
+        details = ", ".join(f"{count} {label}" for label, count in health.items())
+        print(f"   🚫 {len(data['excluded'])} Geräte nicht übernommen ({details})")
+    if data['renamed']:
+        print(f"   🏷️  {data['renamed']} Namen für MQTT-Topics angepasst (doppelt oder mit / + #)")
+    # Vor dem Neu-Anlernen wissen, welche Geräte Zigbee2MQTT nicht oder evtl. nicht kennt
+    print_unsupported(data['unsupported'])
+    print_unknown(data['unknown'])
+    
+    return engine.build(data)
+
+@traced("config.save", "io")
+def save_config(config, filename="configuration.yaml", exclude=None):
+    """Speichere Konfiguration in Datei.
 
-def save_config(config, filename="configuration.yaml"):
-    """Speichere Konfiguration in Datei."""
+    Die Friendly Names der Einträge werden als Zuordnung daneben gesichert
+    (configuration.names.json), damit weitere Läufe sie beibehalten; dort
+    liest der Sync-Daemon auch die Ausschluss-Regel `exclude`.
+    """
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            yaml.dump(config, f, sort_keys=False, default_flow_style=False, 
-                     allow_unicode=True, indent=2)
+        YamlSink(filename).write(config)
+        FriendlyNames.from_config(config, exclude).save(name_map_file(filename))
         print(f"✅ Konfiguration gespeichert: {filename}")
         return True
     except Exception as e:
         print(f"❌ Fehler beim Speichern: {e}")
         return False
 
-def show_summary(devices, network_config):
-    """Zeige Migrationszusammenfassung."""
+def show_summary(devices, network_config, excluded=0):
+    """Zeige Migrationszusammenfassung.
+
+    `excluded` ist die Anzahl der wegen ihres Zustands nicht übernommenen Geräte.
+    """
     print("\n" + "=" * 60)
     print("📊 MIGRATIONSZUSAMMENFASSUNG")
     print("=" * 60)
@@ -356,6 +255,12 @@ def show_summary(devices, network_config):
     print(f"   📊 Sensoren: {len(sensors)}")
     print(f"   💡 Lichter: {len(lights)}")
     
+    health = Counter(d['health'] for d in devices if 'health' in d)
+    if health:
+        print(f"   🩺 Zustand: {format_counts(health)}")
+        if excluded:
+            print(f"   🚫 Nicht übernommen: {excluded}")
+    
     if network_config:
         print(f"\n📡 Netzwerkkonfiguration:")
         print(f"   Kanal: {network_config.get('channel', 'Unbekannt')}")
@@ -365,11 +270,40 @@ def show_summary(devices, network_config):
     print(f"\n📁 Ausgabedatei: configuration.yaml")
     print("=" * 60)
 
-def main():
-    """Hauptfunktion des interaktiven Migration Tools."""
+def offer_resume(journal):
+    """Frage, ob ein unterbrochener Lauf fortgesetzt werden soll.
+
+    Returns:
+        True zum Fortsetzen; sonst wird das Journal verworfen
+    """
+    stages = journal.completed()
+    if not stages:
+        return False
+    saved = time.strftime('%d.%m. %H:%M', time.localtime(journal.saved_at()))
+    print(f"\n♻️  Unterbrochener Lauf gefunden (Stand {saved}: {', '.join(stages)})")
+    choice = get_user_input(
+        "Fortsetzen? [j/n]",
+        "j",
+        lambda x: x.lower() in ['j', 'n'],
+        "Wähle j oder n"
+    )
+    if choice.lower() == "j":
+        return True
+    journal.discard()
+    return False
+
+def run_wizard(profiler, dry_run=False):
+    """Führe den Wizard Schritt für Schritt aus.
+
+    Jede abgeschlossene Stufe wird im Lauf-Journal gesichert; nach einem
+    Abbruch setzt der nächste Start dort fort. Mit `dry_run` wird statt zu
+    speichern mit der vorhandenen configuration.yaml verglichen; das
+    Journal bleibt dabei unberührt.
+    """
     print_header()
     
     # Schritt 1: deCONZ-Server-Informationen
+    profiler.mark("SCHRITT 1: deCONZ-Server")
     print("\n📡 SCHRITT 1: deCONZ-Server")
     print("-" * 30)
     
@@ -387,97 +321,180 @@ def main():
         "Ungültiger Port (1-65535)"
     )
     
+    journal = NullJournal() if dry_run else RunJournal.for_gateway(host, port)
+    resume = offer_resume(journal)
+    
     # Teste Verbindung
-    if not test_connection(host, int(port)):
-        print("\n❌ Kann nicht mit deCONZ-Server verbinden!")
-        print("💡 Prüfe IP-Adresse und Port, stelle sicher dass deCONZ läuft.")
-        return
+    if not resume or not journal.has('config'):
+        if not test_connection(host, int(port)):
+            print("\n❌ Kann nicht mit deCONZ-Server verbinden!")
+            print("💡 Prüfe IP-Adresse und Port, stelle sicher dass deCONZ läuft.")
+            return
     
     # Schritt 2: API-Key
+    profiler.mark("SCHRITT 2: API-Key")
     print("\n🔑 SCHRITT 2: API-Key")
     print("-" * 30)
     
-    api_key_choice = get_user_input(
-        "API-Key Option: [1] Neuen generieren, [2] Vorhandenen verwenden", 
-        "1",
-        lambda x: x in ['1', '2'],
-        "Wähle 1 oder 2"
-    )
-    
-    if api_key_choice == "1":
-        # Neuen API-Key generieren
-        api_key = generate_api_key_interactive(host, int(port))
-        if not api_key:
-            print("\n❌ API-Key-Generierung fehlgeschlagen!")
-            return
+    api_key = journal.load('api_key') if resume else None
+    if api_key and not journal.has('devices') and not validate_api_key(host, int(port), api_key):
+        # Key wurde inzwischen gelöscht: alles Folgende neu abrufen
+        journal.discard_from('api_key')
+        api_key = None
+    if api_key:
+        print("♻️  API-Key aus dem unterbrochenen Lauf")
     else:
-        # Vorhandenen API-Key verwenden
-        api_key = get_user_input(
-            "deCONZ API-Key", 
-            "99D54B94DA",
-            None,
-            ""
+        # Gespeicherter API-Key macht den Link-Button überflüssig
+        api_key = stored_api_key(host, int(port), read_only=dry_run)
+    if not api_key:
+        api_key_choice = get_user_input(
+            "API-Key Option: [1] Neuen generieren, [2] Vorhandenen verwenden", 
+            "1",
+            lambda x: x in ['1', '2'],
+            "Wähle 1 oder 2"
         )
         
-        # Teste API-Key
-        if not test_api_key(host, int(port), api_key):
-            print("\n❌ API-Key ungültig!")
-            print("💡 Generiere einen neuen API-Key mit Option 1")
-            return
+        if api_key_choice == "1":
+            # Neuen API-Key generieren
+            api_key = pair_interactive(host, int(port))
+            if not api_key:
+                print("\n❌ API-Key-Generierung fehlgeschlagen!")
+                return
+        else:
+            # Vorhandenen API-Key verwenden
+            api_key = get_user_input("deCONZ API-Key")
+            
+            # Teste API-Key
+            if not test_api_key(host, int(port), api_key):
+                print("\n❌ API-Key ungültig!")
+                print("💡 Generiere einen neuen API-Key mit Option 1")
+                return
+        
+        if dry_run:
+            print("🔎 Dry-Run: API-Key wird nicht gespeichert")
+        else:
+            remember_api_key(host, int(port), api_key)
+    journal.checkpoint('api_key', api_key)
     
     # Schritt 3: Netzwerkkonfiguration abrufen
+    profiler.mark("SCHRITT 3: Netzwerkkonfiguration")
     print("\n📋 SCHRITT 3: Netzwerkkonfiguration")
     print("-" * 30)
     
-    network_config = get_network_config(host, int(port), api_key)
+    if journal.has('network_config'):
+        network_config = journal.load('network_config')
+        print("♻️  Netzwerkkonfiguration aus dem unterbrochenen Lauf")
+    else:
+        network_config = get_network_config(host, int(port), api_key)
+        if network_config is not None:
+            journal.checkpoint('network_config', network_config)
     
     # Schritt 4: Geräte abrufen
+    profiler.mark("SCHRITT 4: Geräte")
     print("\n🔍 SCHRITT 4: Geräte")
     print("-" * 30)
     
-    devices = get_devices(host, int(port), api_key)
-    if not devices:
-        print("\n❌ Keine Geräte gefunden!")
-        return
+    if journal.has('devices'):
+        devices = journal.load('devices')
+        print(f"♻️  {len(devices)} Geräte aus dem unterbrochenen Lauf")
+    else:
+        devices = get_devices(host, int(port), api_key)
+        if not devices:
+            print("\n❌ Keine Geräte gefunden!")
+            return
+        journal.checkpoint('devices', devices)
+    
+    # Veraltete und tote Geräte erkennen; die Regel gehört zu den gesicherten
+    # Einstellungen eines unterbrochenen Laufs
+    mqtt = journal.load('mqtt') if journal.has('mqtt') else None
+    policy = ask_health_policy(devices, mqtt.get('exclude', 'dead') if mqtt else None)
     
     # Schritt 5: MQTT-Konfiguration
+    profiler.mark("SCHRITT 5: MQTT-Konfiguration")
     print("\n📡 SCHRITT 5: MQTT-Konfiguration")
     print("-" * 30)
     
-    mqtt_server = get_user_input(
-        "MQTT Server URL", 
-        "mqtt://localhost",
-        None,
-        ""
-    )
-    
-    mqtt_topic = get_user_input(
-        "MQTT Base Topic", 
-        "zigbee2mqtt",
-        None,
-        ""
-    )
+    if mqtt is not None:
+        mqtt_server, mqtt_topic = mqtt['server'], mqtt['base_topic']
+        print(f"♻️  MQTT: {mqtt_server} ({mqtt_topic})")
+    else:
+        mqtt_server = get_user_input(
+            "MQTT Server URL", 
+            "mqtt://localhost",
+            None,
+            ""
+        )
+        
+        mqtt_topic = get_user_input(
+            "MQTT Base Topic", 
+            "zigbee2mqtt",
+            None,
+            ""
+        )
+        journal.checkpoint('mqtt', {'server': mqtt_server, 'base_topic': mqtt_topic, 'exclude': policy})
     
     # Schritt 6: Konfiguration erstellen
+    profiler.mark("SCHRITT 6: Konfiguration erstellen")
     print("\n⚙️ SCHRITT 6: Konfiguration erstellen")
     print("-" * 30)
     
-    config = create_zigbee2mqtt_config(devices, network_config, mqtt_server, mqtt_topic)
+    if journal.has('config'):
+        # Gleiche Konfiguration wie vor dem Abbruch, inkl. erzeugtem Network Key
+        config = journal.load('config')
+        print("♻️  Konfiguration aus dem unterbrochenen Lauf")
+    else:
+        config = create_zigbee2mqtt_config(devices, network_config, mqtt_server, mqtt_topic, policy)
+        journal.checkpoint('config', config)
+    
+    if dry_run:
+        profiler.mark("SCHRITT 7: Vergleich")
+        # Erzeugte Werte (fehlender Network Key usw.) sind kein echter Unterschied
+        generated = network_parameters(network_config)[4]
+        print_report(diff_configs(load_config("configuration.yaml"), config,
+                                  ignore={GENERATED_PATHS[field] for field in generated}))
+        print("\n🔎 Dry-Run: nichts geschrieben")
+        return
     
     # Schritt 7: Speichern
+    profiler.mark("SCHRITT 7: Speichern")
     print("\n💾 SCHRITT 7: Speichern")
     print("-" * 30)
     
-    if save_config(config):
-        show_summary(devices, network_config)
+    if save_config(config, exclude=policy):
+        save_snapshot(devices, network_config, exclude=policy)
+        journal.discard()
+        show_summary(devices, network_config, len(devices) - len(config['devices']))
         print("\n🎉 Migration erfolgreich abgeschlossen!")
         print("\n📋 Nächste Schritte:")
         print("1. Kopiere configuration.yaml nach Zigbee2MQTT")
         print("2. Starte Zigbee2MQTT mit der neuen Konfiguration")
         print("3. Prüfe die Geräte in der Zigbee2MQTT-Oberfläche")
+        print("4. Prüfe die Migration: python3 bin/verify_database.py <zigbee2mqtt>/database.db")
     else:
         print("\n❌ Migration fehlgeschlagen!")
 
+def main(argv=None):
+    """Hauptfunktion des interaktiven Migration Tools."""
+    parser = argparse.ArgumentParser(description="Interaktive Migration von deCONZ zu Zigbee2MQTT")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Nichts schreiben, nur Unterschiede zur vorhandenen configuration.yaml anzeigen")
+    add_profile_arguments(parser)
+    add_trace_arguments(parser)
+    # Launcher (App-Bundle, install.py) rufen main() ohne argv auf; deren eigene
+    # Argumente (z.B. -psn_... unter macOS) dürfen den Assistenten nicht abbrechen
+    args, ignored = parser.parse_known_args(argv)
+    if ignored:
+        print(f"⚠️  Unbekannte Argumente ignoriert: {' '.join(ignored)}")
+
+    configure_tracing(args)
+    profiler = create_profiler(args)
+    try:
+        run_wizard(profiler, args.dry_run)
+    finally:
+        profiler.finish()
+        disable_tracing()
+        profiler.report()
+
 if __name__ == "__main__":
     try:
         main()
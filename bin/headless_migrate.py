@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Nicht-interaktive Migration für Cron, CI und Flotten-Orchestrierung
+Alle Werte kommen aus Kommandozeile, Umgebungsvariablen oder einer
+YAML-/TOML-Profildatei; das Ergebnis kann als JSON ausgegeben werden
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import tarfile
+import time
+
+import yaml
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+from compatibility import get_index, unknown_models, unsupported_models
+from config_diff import GENERATED_PATHS, diff_configs, load_config, print_report, summarize
+from credentials import remember_api_key, stored_api_key, validate_api_key
+from device_health import analyze_devices
+from final_interactive import (create_zigbee2mqtt_config, get_devices, get_network_config,
+                               save_config, test_connection)
+from migration_engine import (BackupArchiveSource, SnapshotSource, ZllDbSource, name_map_file,
+                              network_parameters)
+from pairing import pair_gateway, parse_gateway
+from run_journal import FleetJournal, RunJournal
+from snapshot import SNAPSHOT_FILE, save_snapshot
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_UNREACHABLE = 3
+EXIT_AUTH = 4
+EXIT_NO_DEVICES = 5
+EXIT_WRITE = 6
+
+# Name, Umgebungsvariable, Pfad in der Profildatei, Standardwert
+SETTINGS = [
+    ('host', 'DECONZ_HOST', ('deconz', 'host'), '192.168.178.76'),
+    ('port', 'DECONZ_PORT', ('deconz', 'port'), 4530),
+    ('api_key', 'DECONZ_API_KEY', ('deconz', 'api_key'), None),
+    ('mqtt_server', 'MQTT_SERVER', ('mqtt', 'server'), 'mqtt://localhost'),
+    ('mqtt_topic', 'MQTT_BASE_TOPIC', ('mqtt', 'base_topic'), 'zigbee2mqtt'),
+    ('output', 'Z2M_OUTPUT', ('output',), 'configuration.yaml'),
+    ('source', 'MIGRATE_SOURCE', ('source',), 'rest'),
+    ('snapshot', 'MIGRATE_SNAPSHOT', ('snapshot',), SNAPSHOT_FILE),
+    ('source_file', 'MIGRATE_SOURCE_FILE', ('source_file',), None),
+    ('exclude', 'MIGRATE_EXCLUDE', ('exclude',), 'dead'),
+]
+
+SOURCES = ('rest', 'snapshot', 'zll', 'backup')
+
+# none: alle Geräte, dead: ohne tote, stale: ohne veraltete und tote
+EXCLUDE_POLICIES = ('none', 'dead', 'stale')
+
+# Offline-Quellen der Migrations-Engine
+FILE_SOURCES = {'zll': ZllDbSource, 'backup': BackupArchiveSource}
+
+
+class MigrationFailed(Exception):
+    """Abbruch der Pipeline mit Exit-Code."""
+
+    def __init__(self, exit_code, message):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def load_profile(filename):
+    """Lade eine Profildatei (.toml oder YAML)."""
+    if filename.endswith('.toml'):
+        if tomllib is None:
+            raise MigrationFailed(EXIT_USAGE, "TOML-Profile benötigen Python 3.11 (tomllib)")
+        with open(filename, 'rb') as f:
+            return tomllib.load(f)
+    with open(filename, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def _lookup(profile, path):
+    value = profile
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def resolve_settings(args, environ=None):
+    """Kommandozeile vor Umgebungsvariablen vor Profildatei vor Standardwerten."""
+    environ = os.environ if environ is None else environ
+    profile = load_profile(args.profile) if args.profile else {}
+    settings = {}
+    for name, env, path, default in SETTINGS:
+        value = getattr(args, name)
+        if value is None:
+            value = environ.get(env)
+        if value is None:
+            value = _lookup(profile, path)
+            if value is None and len(path) > 1:
+                value = profile.get(name)
+        settings[name] = default if value is None else value
+    try:
+        settings['port'] = int(settings['port'])
+    except ValueError:
+        raise MigrationFailed(EXIT_USAGE, f"Ungültiger Port: {settings['port']}")
+    if settings['source'] not in SOURCES:
+        raise MigrationFailed(EXIT_USAGE, f"Unbekannte Quelle: {settings['source']}")
+    if settings['exclude'] not in EXCLUDE_POLICIES:
+        raise MigrationFailed(EXIT_USAGE, f"Unbekannte Ausschluss-Regel: {settings['exclude']}")
+    if settings['source'] in FILE_SOURCES and not settings['source_file']:
+        raise MigrationFailed(EXIT_USAGE, f"Quelle {settings['source']} benötigt --source-file")
+    return settings
+
+
+def resolve_api_key(settings, pair, window, dry_run=False):
+    """Angegebener Key, sonst gespeicherter Key, sonst (mit --pair) Link-Button.
+
+    Mit `dry_run` bleibt der Credential-Store unverändert; ein per --pair
+    erzeugter Key gilt dann nur für diesen Lauf.
+    """
+    host, port = settings['host'], settings['port']
+    api_key = settings['api_key']
+    if api_key:
+        if not validate_api_key(host, port, api_key):
+            raise MigrationFailed(EXIT_AUTH, "API-Key ungültig")
+        return api_key
+    api_key = stored_api_key(host, port, read_only=dry_run)
+    if api_key:
+        return api_key
+    if not pair:
+        raise MigrationFailed(EXIT_AUTH, "Kein API-Key angegeben oder gespeichert (--api-key oder --pair)")
+    api_key = pair_gateway(host, port, window=window)
+    if not api_key:
+        raise MigrationFailed(EXIT_AUTH, f"Kein Link-Button innerhalb von {window:.0f}s")
+    if dry_run:
+        print("🔎 Dry-Run: API-Key wird nicht gespeichert")
+    else:
+        remember_api_key(host, port, api_key)
+    return api_key
+
+
+def run_pipeline(settings, pair=False, window=60, allow_empty=False, resume=False, dry_run=False):
+    """Führe die Migration ohne Rückfragen aus. Gibt das Ergebnis-Dictionary zurück.
+
+    Bei der REST-Quelle wird jede Stufe im Lauf-Journal gesichert; mit
+    `resume` werden gesicherte Stufen eines abgebrochenen Laufs übernommen.
+    Mit `dry_run` wird nichts geschrieben, sondern die neue Konfiguration
+    mit der vorhandenen Ausgabedatei verglichen.
+    """
+    result = {'source': settings['source'], 'output': settings['output'], 'timings_ms': {}}
+    timings = result['timings_ms']
+    clock = time.perf_counter()
+    journal = None
+    resumed = []
+
+    def stage(name):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[name] = round((now - clock) * 1000, 1)
+        clock = now
+
+    def restore(name):
+        if journal is None or not resume or not journal.has(name):
+            return None
+        value = journal.load(name)
+        if value is not None:
+            resumed.append(name)
+        return value
+
+    def checkpoint(name, value):
+        if journal is not None:
+            journal.checkpoint(name, value)
+
+    if settings['source'] == 'rest':
+        host, port = settings['host'], settings['port']
+        result['gateway'] = {'host': host, 'port': port}
+        if not dry_run:
+            journal = RunJournal.for_gateway(host, port)
+            if not resume:
+                journal.discard()
+        devices = restore('devices')
+        if devices is not None:
+            network_config = restore('network_config')
+            stage('journal')
+        else:
+            if not test_connection(host, port):
+                raise MigrationFailed(EXIT_UNREACHABLE, f"deCONZ unter {host}:{port} nicht erreichbar")
+            api_key = None if settings['api_key'] else restore('api_key')
+            if api_key and not validate_api_key(host, port, api_key):
+                resumed.remove('api_key')
+                journal.discard_from('api_key')
+                api_key = None
+            api_key = api_key or resolve_api_key(settings, pair, window, dry_run)
+            checkpoint('api_key', api_key)
+            stage('api_key')
+            network_config = restore('network_config')
+            if network_config is None:
+                network_config = get_network_config(host, port, api_key)
+                if network_config is None:
+                    raise MigrationFailed(EXIT_UNREACHABLE, "Netzwerkkonfiguration nicht abrufbar")
+                checkpoint('network_config', network_config)
+            stage('network_config')
+            devices = get_devices(host, port, api_key)
+            if devices:
+                checkpoint('devices', devices)
+            stage('devices')
+    else:
+        if settings['source'] == 'snapshot':
+            source = SnapshotSource(settings['snapshot'])
+        else:
+            source = FILE_SOURCES[settings['source']](settings['source_file'])
+        try:
+            data = source.fetch()
+        except (OSError, ValueError, sqlite3.Error, tarfile.TarError) as e:
+            raise MigrationFailed(EXIT_FAILED, f"{settings['source']} nicht lesbar: {e}")
+        devices = data['devices']
+        network_config = data['network_config']
+        stage(settings['source'])
+
+    if not devices and not allow_empty:
+        raise MigrationFailed(EXIT_NO_DEVICES, "Keine Geräte gefunden")
+
+    result['health'] = dict(analyze_devices(devices))
+
+    # Eine gesicherte Konfiguration passt nur zu denselben Einstellungen
+    mqtt = {'server': settings['mqtt_server'], 'base_topic': settings['mqtt_topic'],
+            'exclude': settings['exclude']}
+    if journal is not None and journal.load('mqtt') != mqtt:
+        journal.discard_from('mqtt')
+        checkpoint('mqtt', mqtt)
+    config = restore('config')
+    if config is None:
+        config = create_zigbee2mqtt_config(devices, network_config, settings['mqtt_server'],
+                                           settings['mqtt_topic'], settings['exclude'],
+                                           settings['output'])
+        checkpoint('config', config)
+    stage('config')
+    entries = config['devices']
+    result['excluded'] = len(devices) - len(entries)
+    result['renamed'] = sum(1 for entry in entries
+                            if entry.get('friendly_name', entry['name']) != entry['name'])
+    result['unknown'] = [{'manufacturer': manufacturer, 'model': model, 'count': count,
+                          'candidates': get_index().candidates(model)}
+                         for manufacturer, model, count in
+                         unknown_models([entry for entry in entries if 'supported' not in entry])]
+    result['unsupported'] = [{'manufacturer': manufacturer, 'model': model, 'count': count, 'reason': reason}
+                             for manufacturer, model, count, reason in
+                             unsupported_models([entry for entry in entries if entry.get('supported') is False])]
+    if dry_run:
+        # Erzeugte Werte (fehlender Network Key usw.) sind kein echter Unterschied
+        generated = network_parameters(network_config)[4]
+        diff = diff_configs(load_config(settings['output']), config,
+                            ignore={GENERATED_PATHS[field] for field in generated})
+        print_report(diff, settings['output'])
+        stage('diff')
+        result['dry_run'] = summarize(diff)
+        result['devices'] = {'total': len(devices)}
+        return result
+    if not save_config(config, settings['output'], settings['exclude']):
+        raise MigrationFailed(EXIT_WRITE, f"{settings['output']} konnte nicht geschrieben werden")
+    if settings['source'] == 'rest':
+        save_snapshot(devices, network_config, settings['snapshot'], settings['exclude'])
+        result['snapshot'] = settings['snapshot']
+        journal.discard()
+    stage('save')
+
+    if resumed:
+        result['resumed'] = resumed
+    result['devices'] = {
+        'total': len(devices),
+        'sensors': sum(1 for device in devices if device['type'] == 'sensor'),
+        'lights': sum(1 for device in devices if device['type'] == 'light')
+    }
+    if network_config:
+        result['network'] = {'channel': network_config.get('channel'),
+                             'pan_id': network_config.get('pan_id'),
+                             'name': network_config.get('name')}
+    return result
+
+
+def gateway_filename(filename, host, port):
+    """Dateiname je Gateway: {host}/{port} ersetzen oder -<host>_<port> anhängen."""
+    if '{host}' in filename or '{port}' in filename:
+        return filename.format(host=host, port=port)
+    root, ext = os.path.splitext(filename)
+    return f"{root}-{host}_{port}{ext}"
+
+
+def run_fleet(settings, gateways, pair=False, window=60, allow_empty=False, resume=False,
+              dry_run=False):
+    """Migriere mehrere Gateways nacheinander.
+
+    Mit `resume` werden nur Gateways wiederholt, die im letzten Flotten-Lauf
+    fehlgeschlagen sind; sie setzen jeweils an ihrem Lauf-Journal fort.
+
+    Returns:
+        Liste der Ergebnisse je Gateway
+    """
+    fleet = FleetJournal()
+    if not resume and not dry_run:
+        fleet.discard()
+    pending = set(fleet.pending(gateways))
+    results = []
+    for host, port in gateways:
+        gateway = {'host': host, 'port': port}
+        if (host, port) not in pending:
+            print(f"⏭️  {host}:{port}: bereits migriert")
+            results.append({'gateway': gateway, 'status': 'ok', 'exit_code': EXIT_OK, 'skipped': True})
+            continue
+        print(f"\n🚀 {host}:{port}")
+        gateway_settings = dict(settings, host=host, port=port,
+                                output=gateway_filename(settings['output'], host, port),
+                                snapshot=gateway_filename(settings['snapshot'], host, port))
+        try:
+            result = run_pipeline(gateway_settings, pair, window, allow_empty, resume, dry_run)
+            result.update(status='ok', exit_code=EXIT_OK)
+        except MigrationFailed as e:
+            result = {'gateway': gateway, 'status': 'error', 'exit_code': e.exit_code, 'error': str(e)}
+        except Exception as e:
+            result = {'gateway': gateway, 'status': 'error', 'exit_code': EXIT_FAILED,
+                      'error': f"{type(e).__name__}: {e}"}
+        if not dry_run:
+            fleet.record(host, port, result['status'], result['exit_code'], result.get('error'))
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="deCONZ → Zigbee2MQTT Migration ohne Rückfragen",
+        epilog="Umgebungsvariablen: " + ", ".join(env for _, env, _, _ in SETTINGS)
+    )
+    parser.add_argument("--host", help="deCONZ-Host")
+    parser.add_argument("--port", help="deCONZ-Port")
+    parser.add_argument("--api-key", help="deCONZ API-Key (Standard: gespeicherter Key)")
+    parser.add_argument("--mqtt-server", help="MQTT-Server (Standard: mqtt://localhost)")
+    parser.add_argument("--mqtt-topic", help="MQTT Base Topic (Standard: zigbee2mqtt)")
+    parser.add_argument("--output", help="Ausgabedatei (Standard: configuration.yaml)")
+    parser.add_argument("--source", help=f"Datenquelle: {', '.join(SOURCES)} (Standard: rest)")
+    parser.add_argument("--snapshot", help=f"Snapshot-Datei (Standard: {SNAPSHOT_FILE})")
+    parser.add_argument("--exclude", help="Geräte auslassen: none, dead (tote, Standard) oder stale "
+                                          "(veraltete und tote)")
+    parser.add_argument("--source-file", metavar="DATEI",
+                        help="zll.db (--source zll) oder deCONZ-Backup (--source backup)")
+    parser.add_argument("--profile", metavar="DATEI", help="YAML- oder TOML-Profil mit den Einstellungen")
+    parser.add_argument("--pair", action="store_true",
+                        help="Ohne API-Key auf den Link-Button warten statt abzubrechen")
+    parser.add_argument("--pair-window", type=float, default=60, help="Sekunden für --pair (Standard: 60)")
+    parser.add_argument("--allow-empty", action="store_true", help="Auch ohne Geräte schreiben")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Nichts schreiben, nur Unterschiede zur vorhandenen Ausgabedatei anzeigen")
+    parser.add_argument("--resume", action="store_true",
+                        help="Abgebrochenen Lauf ab der letzten gesicherten Stufe fortsetzen; "
+                             "mit --gateway nur fehlgeschlagene Gateways wiederholen")
+    parser.add_argument("--gateway", action="append", metavar="HOST[:PORT]",
+                        help="Flotten-Lauf: Gateway migrieren (mehrfach angeben); Ausgabe- und "
+                             "Snapshot-Datei erhalten -<host>_<port> bzw. {host}/{port}")
+    parser.add_argument("--json", action="store_true",
+                        help="Ergebnis als JSON auf stdout, Fortschritt auf stderr")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = {'status': 'ok', 'exit_code': EXIT_OK}
+    log = sys.stderr if args.json else sys.stdout
+    try:
+        with contextlib.redirect_stdout(log):
+            settings = resolve_settings(args)
+            if args.gateway:
+                gateways = [parse_gateway(value, settings['port']) for value in args.gateway]
+                results = run_fleet(settings, gateways, args.pair, args.pair_window,
+                                    args.allow_empty, args.resume, args.dry_run)
+                result['gateways'] = results
+                failed = [entry for entry in results if entry['status'] != 'ok']
+                if failed:
+                    raise MigrationFailed(failed[0]['exit_code'],
+                                          f"{len(failed)} von {len(results)} Gateways fehlgeschlagen "
+                                          f"(wiederholen mit --resume)")
+            else:
+                result.update(run_pipeline(settings, args.pair, args.pair_window, args.allow_empty,
+                                           args.resume, args.dry_run))
+    except MigrationFailed as e:
+        result.update(status='error', exit_code=e.exit_code, error=str(e))
+    except (OSError, yaml.YAMLError) as e:
+        result.update(status='error', exit_code=EXIT_USAGE, error=str(e))
+    except Exception as e:
+        result.update(status='error', exit_code=EXIT_FAILED, error=f"{type(e).__name__}: {e}")
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        for entry in result.get('gateways', []):
+            gateway = f"{entry['gateway']['host']}:{entry['gateway']['port']}"
+            if entry.get('dry_run'):
+                counts = entry['dry_run']
+                print(f"🔎 {gateway}: {counts['added']} neu, {counts['removed']} entfernt, "
+                      f"{counts['changed']} geändert")
+            elif entry['status'] == 'ok' and not entry.get('skipped'):
+                print(f"✅ {gateway}: {entry['devices']['total']} Geräte → {entry['output']}")
+            elif entry['status'] != 'ok':
+                print(f"❌ {gateway}: {entry['error']}")
+        if result['status'] != 'ok':
+            print(f"\n❌ {result['error']}")
+        elif args.dry_run:
+            print(f"\n🔎 Dry-Run abgeschlossen, nichts geschrieben ({result['elapsed_ms'] / 1000:.1f}s)")
+        elif 'gateways' in result:
+            print(f"\n🎉 Flotten-Migration abgeschlossen: {len(result['gateways'])} Gateways "
+                  f"({result['elapsed_ms'] / 1000:.1f}s)")
+        else:
+            if result.get('excluded'):
+                print(f"🚫 {result['excluded']} Geräte nicht übernommen (--exclude {args.exclude or 'dead'})")
+            if result.get('unsupported'):
+                print(f"⛔ {sum(entry['count'] for entry in result['unsupported'])} Geräte werden von "
+                      f"Zigbee2MQTT nicht unterstützt (vor dem Neu-Anlernen prüfen)")
+            if result.get('unknown'):
+                print(f"❔ {sum(entry['count'] for entry in result['unknown'])} Geräte nicht im "
+                      f"Zigbee2MQTT-Index, Unterstützung unbekannt (vor dem Neu-Anlernen prüfen)")
+            if result.get('renamed'):
+                print(f"🏷️  {result['renamed']} Namen für MQTT-Topics angepasst "
+                      f"(Zuordnung: {name_map_file(result['output'])})")
+            print(f"\n🎉 Migration abgeschlossen: {result['devices']['total']} Geräte → "
+                  f"{result['output']} ({result['elapsed_ms'] / 1000:.1f}s)")
+    sys.exit(result['exit_code'])
+
+
+if __name__ == "__main__":
+    main()
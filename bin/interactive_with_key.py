@@ -1,284 +1,17 @@
 #!/usr/bin/env python3
 """
 Interaktives deCONZ zu Zigbee2MQTT Migration Tool
-Mit vorkonfiguriertem API-Key für sofortige Verwendung
+Mit gespeichertem API-Key für sofortige Verwendung
 """
 
-import requests
-import yaml
-import random
-import time
 import sys
-from pathlib import Path
 
-def print_header():
-    """Zeige den Header des Tools."""
-    print("=" * 60)
-    print("🚀 deCONZ zu Zigbee2MQTT Migration Tool")
-    print("=" * 60)
-    print("Dieses Tool hilft dir dabei, deine deCONZ-Geräte")
-    print("zu Zigbee2MQTT zu migrieren.")
-    print("=" * 60)
-
-def get_user_input(prompt, default="", validator=None, error_msg="Ungültige Eingabe"):
-    """Hole Benutzereingabe mit Validierung."""
-    while True:
-        try:
-            if default:
-                user_input = input(f"{prompt} [{default}]: ").strip()
-                value = user_input if user_input else default
-            else:
-                value = input(f"{prompt}: ").strip()
-            
-            if not value:
-                if default:
-                    return default
-                print("❌ Eingabe darf nicht leer sein!")
-                continue
-            
-            if validator and not validator(value):
-                print(f"❌ {error_msg}")
-                continue
-            
-            return value
-        except KeyboardInterrupt:
-            print("\n\n👋 Migration abgebrochen!")
-            sys.exit(0)
-
-def validate_ip(ip):
-    """Validiere IP-Adresse."""
-    parts = ip.split('.')
-    if len(parts) != 4:
-        return False
-    try:
-        return all(0 <= int(part) <= 255 for part in parts)
-    except ValueError:
-        return False
-
-def validate_port(port):
-    """Validiere Port-Nummer."""
-    try:
-        return 1 <= int(port) <= 65535
-    except ValueError:
-        return False
-
-def test_connection(host, port):
-    """Teste Verbindung zu deCONZ."""
-    print(f"\n🔍 Teste Verbindung zu {host}:{port}...")
-    try:
-        response = requests.get(f"http://{host}:{port}/api", timeout=5)
-        if response.status_code in [200, 403]:
-            print("✅ Verbindung erfolgreich!")
-            return True
-        else:
-            print(f"❌ Verbindung fehlgeschlagen: HTTP {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Verbindung fehlgeschlagen: {e}")
-        return False
-
-def test_api_key(host, port, api_key):
-    """Teste API-Key."""
-    print(f"\n🔑 Teste API-Key...")
-    try:
-        url = f"http://{host}:{port}/api/{api_key}/config"
-        headers = {"Content-Type": "application/json"}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            print("✅ API-Key gültig!")
-            return True
-        else:
-            print(f"❌ API-Key ungültig: HTTP {response.status_code}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Fehler beim Testen des API-Keys: {e}")
-        return False
-
-def get_network_config(host, port, api_key):
-    """Hole Netzwerkkonfiguration von deCONZ."""
-    print(f"\n📋 Hole Netzwerkkonfiguration...")
-    
-    try:
-        url = f"http://{host}:{port}/api/{api_key}/config"
-        headers = {"Content-Type": "application/json"}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            config = response.json()
-            
-            network_config = {
-                'channel': config.get('zigbeechannel'),
-                'pan_id': config.get('panid'),
-                'ext_pan_id': config.get('extpanid'),
-                'network_key': config.get('networkkey'),
-                'name': config.get('name', 'deCONZ'),
-                'version': config.get('version', 'Unknown')
-            }
-            
-            print("✅ Netzwerkkonfiguration abgerufen:")
-            print(f"   📡 Kanal: {network_config['channel']}")
-            print(f"   🆔 PAN-ID: 0x{network_config['pan_id']:04X}")
-            print(f"   🏠 Gateway: {network_config['name']}")
-            
-            return network_config
-        else:
-            print(f"❌ Fehler beim Abrufen der Konfiguration: HTTP {response.status_code}")
-            return None
-            
-    except Exception as e:
-        print(f"❌ Fehler: {e}")
-        return None
-
-def get_devices(host, port, api_key):
-    """Hole alle Geräte von deCONZ."""
-    print(f"\n🔍 Hole Geräte...")
-    
-    devices = []
-    
-    try:
-        headers = {"Content-Type": "application/json"}
-        base_url = f"http://{host}:{port}/api/{api_key}"
-        
-        # Hole Sensoren
-        print("   📊 Lade Sensoren...")
-        sensors_response = requests.get(f"{base_url}/sensors", headers=headers, timeout=10)
-        if sensors_response.status_code == 200:
-            sensors = sensors_response.json()
-            for sensor_id, sensor in sensors.items():
-                device_info = {
-                    'id': sensor_id,
-                    'name': sensor.get('name', f'sensor_{sensor_id}'),
-                    'type': 'sensor',
-                    'model': sensor.get('modelid', ''),
-                    'manufacturer': sensor.get('manufacturername', ''),
-                    'unique_id': sensor.get('uniqueid', ''),
-                    'state': sensor.get('state', {})
-                }
-                devices.append(device_info)
-            print(f"   ✅ {len(sensors)} Sensoren gefunden")
-        
-        # Hole Lichter
-        print("   💡 Lade Lichter...")
-        lights_response = requests.get(f"{base_url}/lights", headers=headers, timeout=10)
-        if lights_response.status_code == 200:
-            lights = lights_response.json()
-            for light_id, light in lights.items():
-                device_info = {
-                    'id': light_id,
-                    'name': light.get('name', f'light_{light_id}'),
-                    'type': 'light',
-                    'model': light.get('modelid', ''),
-                    'manufacturer': light.get('manufacturername', ''),
-                    'unique_id': light.get('uniqueid', ''),
-                    'state': light.get('state', {})
-                }
-                devices.append(device_info)
-            print(f"   ✅ {len(lights)} Lichter gefunden")
-        
-        print(f"\n✅ Insgesamt {len(devices)} Geräte gefunden!")
-        return devices
-        
-    except Exception as e:
-        print(f"❌ Fehler beim Abrufen der Geräte: {e}")
-        return []
-
-def generate_random_hex(byte_count):
-    """Generiere zufällige Hex-Zeichen."""
-    return ''.join(random.choices('0123456789abcdef', k=byte_count * 2))
-
-def create_zigbee2mqtt_config(devices, network_config, mqtt_server, mqtt_topic):
-    """Erstelle Zigbee2MQTT-Konfiguration."""
-    print(f"\n⚙️ Erstelle Zigbee2MQTT-Konfiguration...")
-    
-    # Verwende Netzwerkkonfiguration oder generiere Werte
-    channel = network_config.get('channel', 15) if network_config else 15
-    pan_id = network_config.get('pan_id', 0x1A63) if network_config else 0x1A63
-    
-    # Generiere fehlende Werte
-    if not network_config or not network_config.get('ext_pan_id'):
-        ext_pan_id = generate_random_hex(8)
-        print(f"   🔧 Extended PAN ID generiert: 0x{ext_pan_id}")
-    else:
-        ext_pan_id = f"{network_config['ext_pan_id']:016X}"
-    
-    if not network_config or not network_config.get('network_key'):
-        network_key = generate_random_hex(16)
-        print(f"   🔧 Network Key generiert: 0x{network_key}")
-    else:
-        network_key = f"{network_config['network_key']:032X}"
-    
-    # Erstelle Konfiguration
-    config = {
-        'mqtt': {
-            'base_topic': mqtt_topic,
-            'server': mqtt_server
-        },
-        'serial': {
-            'port': '/dev/ttyACM0'
-        },
-        'advanced': {
-            'pan_id': f"0x{pan_id:04X}",
-            'extended_pan_id': f"0x{ext_pan_id}",
-            'network_key': f"[{', '.join(f'0x{network_key[i:i+2]}' for i in range(0, len(network_key), 2))}]",
-            'channel': int(channel)
-        },
-        'devices': []
-    }
-    
-    # Füge Geräte hinzu
-    for device in devices:
-        device_config = {
-            'id': device['id'],
-            'name': device['name'],
-            'type': device['type']
-        }
-        
-        if device['model']:
-            device_config['model'] = device['model']
-        if device['manufacturer']:
-            device_config['manufacturer'] = device['manufacturer']
-            
-        config['devices'].append(device_config)
-    
-    return config
-
-def save_config(config, filename="configuration.yaml"):
-    """Speichere Konfiguration in Datei."""
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            yaml.dump(config, f, sort_keys=False, default_flow_style=False, 
-                     allow_unicode=True, indent=2)
-        print(f"✅ Konfiguration gespeichert: {filename}")
-        return True
-    except Exception as e:
-        print(f"❌ Fehler beim Speichern: {e}")
-        return False
-
-def show_summary(devices, network_config):
-    """Zeige Migrationszusammenfassung."""
-    print("\n" + "=" * 60)
-    print("📊 MIGRATIONSZUSAMMENFASSUNG")
-    print("=" * 60)
-    
-    sensors = [d for d in devices if d['type'] == 'sensor']
-    lights = [d for d in devices if d['type'] == 'light']
-    
-    print(f"🔢 Geräte gesamt: {len(devices)}")
-    print(f"   📊 Sensoren: {len(sensors)}")
-    print(f"   💡 Lichter: {len(lights)}")
-    
-    if network_config:
-        print(f"\n📡 Netzwerkkonfiguration:")
-        print(f"   Kanal: {network_config.get('channel', 'Unbekannt')}")
-        print(f"   PAN-ID: 0x{network_config.get('pan_id', 0):04X}")
-        print(f"   Gateway: {network_config.get('name', 'Unbekannt')}")
-    
-    print(f"\n📁 Ausgabedatei: configuration.yaml")
-    print("=" * 60)
+from credentials import remember_api_key, stored_api_key
+from final_interactive import (ask_health_policy, create_zigbee2mqtt_config, get_devices,
+                               get_network_config, get_user_input, print_header, save_config,
+                               show_summary, test_api_key, test_connection, validate_ip,
+                               validate_port)
+from snapshot import save_snapshot
 
 def main():
     """Hauptfunktion des interaktiven Migration Tools."""
@@ -312,18 +45,17 @@ def main():
     print("\n🔑 SCHRITT 2: API-Key")
     print("-" * 30)
     
-    api_key = get_user_input(
-        "deCONZ API-Key", 
-        "99D54B94DA",
-        None,
-        ""
-    )
-    
-    # Teste API-Key
-    if not test_api_key(host, int(port), api_key):
-        print("\n❌ API-Key ungültig!")
-        print("💡 Generiere einen neuen API-Key mit: python3 simple_api_key.py")
-        return
+    api_key = stored_api_key(host, int(port))
+    if not api_key:
+        api_key = get_user_input("deCONZ API-Key")
+        
+        # Teste API-Key
+        if not test_api_key(host, int(port), api_key):
+            print("\n❌ API-Key ungültig!")
+            print("💡 Generiere einen neuen API-Key mit: python3 simple_api_key.py")
+            return
+        
+        remember_api_key(host, int(port), api_key)
     
     # Schritt 3: Netzwerkkonfiguration abrufen
     print("\n📋 SCHRITT 3: Netzwerkkonfiguration")
@@ -340,6 +72,9 @@ def main():
         print("\n❌ Keine Geräte gefunden!")
         return
     
+    # Veraltete und tote Geräte erkennen
+    policy = ask_health_policy(devices)
+    
     # Schritt 5: MQTT-Konfiguration
     print("\n📡 SCHRITT 5: MQTT-Konfiguration")
     print("-" * 30)
@@ -362,14 +97,15 @@ def main():
     print("\n⚙️ SCHRITT 6: Konfiguration erstellen")
     print("-" * 30)
     
-    config = create_zigbee2mqtt_config(devices, network_config, mqtt_server, mqtt_topic)
+    config = create_zigbee2mqtt_config(devices, network_config, mqtt_server, mqtt_topic, policy)
     
     # Schritt 7: Speichern
     print("\n💾 SCHRITT 7: Speichern")
     print("-" * 30)
     
-    if save_config(config):
-        show_summary(devices, network_config)
+    if save_config(config, exclude=policy):
+        save_snapshot(devices, network_config, exclude=policy)
+        show_summary(devices, network_config, len(devices) - len(config['devices']))
         print("\n🎉 Migration erfolgreich abgeschlossen!")
         print("\n📋 Nächste Schritte:")
         print("1. Kopiere configuration.yaml nach Zigbee2MQTT")
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Geräte-Inventar über gespeicherte Snapshots
+Filter und Gruppierungen über alle Gateways (Hersteller, Modell, Typ,
+Erreichbarkeit, zuletzt gesehen) ohne erneuten Abruf von deCONZ
+"""
+
+import argparse
+import bisect
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from snapshot import SNAPSHOT_FILE, load_snapshot
+
+# Spalten eines Inventar-Eintrags
+FIELDS = ['gateway', 'type', 'id', 'name', 'manufacturer', 'model', 'reachable', 'last_seen']
+
+# Felder mit Index (Wert in Kleinbuchstaben -> Zeilennummern)
+INDEXED_FIELDS = ('gateway', 'type', 'manufacturer', 'model', 'reachable')
+
+# Gebräuchliche Namen -> weitere Herstellerkennungen in deCONZ (je nach Firmware)
+MANUFACTURER_ALIASES = {
+    'xiaomi': ('lumi',),
+    'aqara': ('lumi',),
+    'philips': ('signify',),
+    'hue': ('signify', 'philips'),
+    'signify': ('philips',),
+}
+
+SNAPSHOT_PREFIX = os.path.splitext(SNAPSHOT_FILE)[0]
+
+
+def parse_timestamp(value):
+    """Epoch-Sekunden aus deCONZ-Zeitstempeln ("2024-05-01T10:00Z", "...T10:00:00")."""
+    if not value or value == 'none':
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.rstrip('Z'))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def is_reachable(device):
+    """Erreichbarkeit aus config (Sensoren) bzw. state (Lichter); None wenn unbekannt."""
+    for section in ('config', 'state'):
+        reachable = (device.get(section) or {}).get('reachable')
+        if reachable is not None:
+            return bool(reachable)
+    return None
+
+
+def last_seen(device):
+    """Letztes Lebenszeichen: lastseen, sonst state.lastupdated."""
+    return (parse_timestamp(device.get('last_seen'))
+            or parse_timestamp((device.get('state') or {}).get('lastupdated')))
+
+
+def gateway_label(filename, snapshot):
+    """Gateway-Name: Suffix von deconz_snapshot-<gateway>.json, sonst Name aus der Konfiguration."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    if stem.startswith(SNAPSHOT_PREFIX + '-'):
+        return stem[len(SNAPSHOT_PREFIX) + 1:]
+    return (snapshot.get('network_config') or {}).get('name') or stem
+
+
+def snapshot_files(paths):
+    """Snapshot-Dateien aus Dateien und Verzeichnissen (deconz_snapshot*.json)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, f"{SNAPSHOT_PREFIX}*.json"))))
+        else:
+            files.append(path)
+    return files
+
+
+class Inventory:
+    """Geräte aller Snapshots mit Indizes für schnelle Abfragen.
+
+    Die Indizes werden beim ersten Filter auf das jeweilige Feld aufgebaut.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._indexes = {}
+        self._by_last_seen = None
+
+    @classmethod
+    def from_snapshots(cls, paths):
+        rows = []
+        for filename in snapshot_files(paths):
+            snapshot = load_snapshot(filename)
+            gateway = gateway_label(filename, snapshot)
+            for device in snapshot.get('devices') or []:
+                rows.append({
+                    'gateway': gateway,
+                    'type': device.get('type'),
+                    'id': str(device.get('id')),
+                    'name': device.get('name'),
+                    'manufacturer': device.get('manufacturer') or '',
+                    'model': device.get('model') or '',
+                    'reachable': is_reachable(device),
+                    'last_seen': last_seen(device)
+                })
+        return cls(rows)
+
+    def index(self, field):
+        if field not in self._indexes:
+            index = {}
+            for position, row in enumerate(self.rows):
+                index.setdefault(str(row[field]).lower(), []).append(position)
+            self._indexes[field] = index
+        return self._indexes[field]
+
+    def matching(self, field, value, exact=False):
+        """Zeilennummern, deren Feld `value` enthält (Groß-/Kleinschreibung egal).
+
+        Beim Hersteller zählen der eingegebene Name und seine Aliase
+        ("philips" findet "Philips" und "Signify").
+        """
+        value = str(value).lower()
+        values = {value}
+        if field == 'manufacturer':
+            values.update(MANUFACTURER_ALIASES.get(value, ()))
+        index = self.index(field)
+        if exact:
+            return set().union(*(index.get(value, ()) for value in values))
+        result = set()
+        for key, positions in index.items():
+            if any(value in key for value in values):
+                result.update(positions)
+        return result
+
+    def not_seen_since(self, timestamp):
+        """Zeilennummern ohne Lebenszeichen seit `timestamp` (oder nie gesehen)."""
+        if self._by_last_seen is None:
+            seen = sorted((row['last_seen'], position) for position, row in enumerate(self.rows)
+                          if row['last_seen'] is not None)
+            never = {position for position, row in enumerate(self.rows) if row['last_seen'] is None}
+            self._by_last_seen = ([entry[0] for entry in seen], [entry[1] for entry in seen], never)
+        times, positions, never = self._by_last_seen
+        return set(positions[:bisect.bisect_left(times, timestamp)]) | never
+
+    def query(self, manufacturer=None, model=None, device_type=None, gateway=None, reachable=None,
+              not_seen_days=None, name=None, now=None):
+        """Gefilterte Zeilen in Snapshot-Reihenfolge."""
+        selected = None
+
+        def narrow(positions):
+            nonlocal selected
+            selected = positions if selected is None else selected & positions
+
+        if device_type:
+            narrow(self.matching('type', device_type, exact=True))
+        if reachable is not None:
+            narrow(self.matching('reachable', reachable, exact=True))
+        if manufacturer:
+            narrow(self.matching('manufacturer', manufacturer))
+        if model:
+            narrow(self.matching('model', model))
+        if gateway:
+            narrow(self.matching('gateway', gateway))
+        if not_seen_days is not None:
+            now = time.time() if now is None else now
+            narrow(self.not_seen_since(now - not_seen_days * 86400))
+        if name:
+            name = name.lower()
+            candidates = range(len(self.rows)) if selected is None else selected
+            selected = {position for position in candidates
+                        if name in (self.rows[position]['name'] or '').lower()}
+
+        if selected is None:
+            return list(self.rows)
+        return [self.rows[position] for position in sorted(selected)]
+
+
+def group_counts(rows, fields):
+    """Anzahl je Wertekombination, absteigend sortiert."""
+    counts = Counter(tuple(row[field] for field in fields) for row in rows)
+    return [dict(zip(fields, key), count=count) for key, count in counts.most_common()]
+
+
+def _display(value, field):
+    if field == 'last_seen':
+        return time.strftime('%Y-%m-%d %H:%M', time.gmtime(value)) if value else '-'
+    if field == 'reachable':
+        return {True: 'ja', False: 'nein'}.get(value, '?')
+    return '' if value is None else str(value)
+
+
+def _export(value, field):
+    if field == 'last_seen' and value:
+        return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(value))
+    return value
+
+
+def print_table(rows, fields):
+    cells = [[_display(row[field], field) for field in fields] for row in rows]
+    widths = [max([len(field)] + [len(line[i]) for line in cells]) for i, field in enumerate(fields)]
+    print("  ".join(field.ljust(width) for field, width in zip(fields, widths)))
+    print("  ".join("-" * width for width in widths))
+    for line in cells:
+        print("  ".join(cell.ljust(width) for cell, width in zip(line, widths)))
+
+
+def write_rows(rows, fields, output_format, stream=None):
+    """Ausgabe als table, json oder csv."""
+    stream = stream or sys.stdout
+    if output_format == 'json':
+        json.dump([{field: _export(row[field], field) for field in fields} for row in rows], stream,
+                  ensure_ascii=False)
+        stream.write("\n")
+    elif output_format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(['' if row[field] is None else _export(row[field], field) for field in fields])
+    else:
+        print_table(rows, fields)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Geräte aus gespeicherten Snapshots filtern und zählen",
+        epilog="Beispiel: inventory.py snapshots/ --manufacturer ikea --group-by gateway,model"
+    )
+    parser.add_argument("snapshots", nargs="*", default=[SNAPSHOT_FILE],
+                        help=f"Snapshot-Dateien oder Verzeichnisse (Standard: {SNAPSHOT_FILE})")
+    parser.add_argument("--manufacturer", help="Hersteller enthält (z.B. ikea, xiaomi)")
+    parser.add_argument("--model", help="Modell enthält")
+    parser.add_argument("--type", choices=["sensor", "light"], help="Gerätetyp")
+    parser.add_argument("--gateway", help="Gateway enthält")
+    parser.add_argument("--name", help="Name enthält")
+    reachability = parser.add_mutually_exclusive_group()
+    reachability.add_argument("--reachable", dest="reachable", action="store_const", const=True,
+                              help="Nur erreichbare Geräte")
+    reachability.add_argument("--unreachable", dest="reachable", action="store_const", const=False,
+                              help="Nur nicht erreichbare Geräte")
+    parser.add_argument("--not-seen-days", type=float, metavar="TAGE",
+                        help="Seit mindestens TAGE Tagen ohne Lebenszeichen")
+    parser.add_argument("--group-by", metavar="FELD[,FELD]",
+                        help=f"Anzahl je Wert zählen ({', '.join(INDEXED_FIELDS)}, ...)")
+    parser.add_argument("--fields", default=",".join(FIELDS), help="Spalten der Ausgabe")
+    parser.add_argument("--format", choices=["table", "json", "csv"], default="table", help="Ausgabeformat")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        inventory = Inventory.from_snapshots(args.snapshots)
+    except (OSError, ValueError) as e:
+        print(f"❌ Snapshot nicht lesbar: {e}")
+        sys.exit(2)
+    loaded = time.perf_counter()
+    rows = inventory.query(args.manufacturer, args.model, args.type, args.gateway, args.reachable,
+                           args.not_seen_days, args.name)
+
+    fields = [field.strip() for field in (args.group_by or args.fields).split(",") if field.strip()]
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        print(f"❌ Unbekannte Felder: {', '.join(unknown)} (verfügbar: {', '.join(FIELDS)})")
+        sys.exit(2)
+    if args.group_by:
+        rows = group_counts(rows, fields)
+        fields = fields + ['count']
+    write_rows(rows, fields, args.format)
+
+    if args.format == 'table':
+        print(f"\n📊 {len(rows)} Zeilen aus {len(inventory.rows)} Geräten "
+              f"(Laden {(loaded - start) * 1000:.0f} ms, Abfrage {(time.perf_counter() - loaded) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
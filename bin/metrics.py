@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Prometheus-Metriken für die lang laufenden Modi (Sync-Daemon, Bridge)
+Stellt Counter, Gauges und Histogramme über einen kleinen HTTP-Endpunkt
+(/metrics) oder als Datei für den node_exporter-Textfile-Collector bereit
+"""
+
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from deconz_client import add_request_hook
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monoton steigender Zähler."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        if not items and not self.label_names:
+            items = [((), 0)]
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(_Metric):
+    """Momentanwert (z.B. Queue-Tiefe, Geräteanzahl)."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    """Histogramm mit festen Buckets; eine Beobachtung kostet eine Binärsuche."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        with self.lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2]))
+                           for key, entry in self.values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Sammlung aller Metriken eines Prozesses."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        if metric not in self.metrics:
+            self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Textformat 0.0.4 für Prometheus."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+GATEWAY_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "deconz_request_duration_seconds", "Dauer der deCONZ-REST-Anfragen",
+    labels=("method", "endpoint")))
+GATEWAY_REQUESTS = REGISTRY.register(Counter(
+    "deconz_requests_total", "deCONZ-REST-Anfragen nach Status",
+    labels=("method", "endpoint", "status")))
+EVENTS_PROCESSED = REGISTRY.register(Counter(
+    "deconz_events_processed_total", "Verarbeitete deCONZ-WebSocket-Events",
+    labels=("event", "resource")))
+CONFIG_REWRITES = REGISTRY.register(Counter(
+    "zigbee2mqtt_config_rewrites_total", "Geschriebene configuration.yaml-Dateien"))
+DEVICES = REGISTRY.register(Gauge(
+    "deconz_devices", "Migrierte Geräte nach Typ (wie in show_summary)",
+    labels=("type",)))
+
+# Nur in Prozessen mit MQTT-Ausgabe registriert (siehe install_mqtt_metrics),
+# z.B. im Sync-Daemon mit --mqtt-server
+MQTT_PUBLISHED = Counter(
+    "mqtt_messages_published_total", "Veröffentlichte MQTT-Nachrichten")
+MQTT_QUEUE_DEPTH = Gauge(
+    "mqtt_publish_queue_depth", "Nachrichten in der MQTT-Sendewarteschlange")
+
+
+def set_device_counts(devices):
+    """Setze die Geräteanzahlen, die show_summary ausgibt."""
+    sensors = sum(1 for device in devices if device['type'] == 'sensor')
+    lights = sum(1 for device in devices if device['type'] == 'light')
+    DEVICES.set(len(devices), type="total")
+    DEVICES.set(sensors, type="sensor")
+    DEVICES.set(lights, type="light")
+
+
+def _observe_request(record):
+    status = record['status'] if record['status'] is not None else record['error']
+    GATEWAY_REQUEST_SECONDS.observe(record['elapsed'], method=record['method'],
+                                    endpoint=record['template'])
+    GATEWAY_REQUESTS.inc(method=record['method'], endpoint=record['template'], status=status)
+
+
+_client_metrics_installed = False
+
+
+def install_client_metrics():
+    """Erfasse alle Anfragen des deCONZ-Clients (idempotent)."""
+    global _client_metrics_installed
+    if not _client_metrics_installed:
+        add_request_hook(_observe_request)
+        _client_metrics_installed = True
+
+
+def install_mqtt_metrics(registry=REGISTRY):
+    """Melde die MQTT-Metriken, sobald ein Prozess über MQTT veröffentlicht (idempotent)."""
+    registry.register(MQTT_PUBLISHED)
+    registry.register(MQTT_QUEUE_DEPTH)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ("/metrics", "/"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_metrics_server(port=9464, bind="0.0.0.0", registry=REGISTRY):
+    """Starte den /metrics-Endpunkt in einem Hintergrund-Thread."""
+    install_client_metrics()
+    server = ThreadingHTTPServer((bind, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def write_textfile(filename, registry=REGISTRY):
+    """Schreibe die Metriken atomar für den Textfile-Collector."""
+    tmp_file = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp_file, filename)
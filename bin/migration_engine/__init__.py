@@ -0,0 +1,41 @@
+"""
+Importierbare Migrations-Engine
+Quellen (REST, zll.db, Backup, Snapshot), Transformationen und Ausgaben
+(YAML, JSON, MQTT); die Wizards und die Kommandozeile bauen darauf auf
+"""
+
+from .engine import MigrationEngine
+from .naming import FriendlyNames, friendly_names, name_map_file, normalize_name
+from .sinks import JsonSink, MqttSink, Sink, YamlSink
+from .sources import (BackupArchiveSource, RestSource, SnapshotSource, Source, StaticSource,
+                      ZllDbSource, assign_rooms, network_config_from_rest, rooms_from_groups)
+from .transforms import (apply_transforms, build_config, device_entry, generate_random_hex,
+                         network_parameters, only_types, rename_devices)
+
+__all__ = [
+    "BackupArchiveSource",
+    "FriendlyNames",
+    "JsonSink",
+    "MigrationEngine",
+    "MqttSink",
+    "RestSource",
+    "Sink",
+    "SnapshotSource",
+    "Source",
+    "StaticSource",
+    "YamlSink",
+    "ZllDbSource",
+    "apply_transforms",
+    "assign_rooms",
+    "build_config",
+    "device_entry",
+    "friendly_names",
+    "generate_random_hex",
+    "name_map_file",
+    "network_config_from_rest",
+    "network_parameters",
+    "normalize_name",
+    "only_types",
+    "rename_devices",
+    "rooms_from_groups",
+]
@@ -0,0 +1,69 @@
+"""
+Ablauf einer Migration: Quelle → Transformationen → Konfiguration → Ausgaben
+"""
+
+import time
+
+from .naming import friendly_names
+from .transforms import apply_transforms, build_config
+
+
+class MigrationEngine:
+    """Verbindet eine Quelle mit beliebig vielen Ausgaben.
+
+    Beispiel:
+        engine = MigrationEngine(RestSource(host, port, api_key),
+                                 sinks=[YamlSink("configuration.yaml")])
+        result = engine.run()
+    """
+
+    def __init__(self, source, sinks=(), transforms=(), mqtt_server="mqtt://localhost",
+                 mqtt_topic="zigbee2mqtt", parameters=None):
+        self.source = source
+        self.sinks = list(sinks)
+        self.transforms = list(transforms)
+        self.mqtt_server = mqtt_server
+        self.mqtt_topic = mqtt_topic
+        # Ergebnis von network_parameters(), falls erzeugte Werte vorher angezeigt wurden
+        self.parameters = parameters
+
+    def fetch(self):
+        """Daten der Quelle nach Anwendung der Transformationen.
+
+        Ohne eigene Naming-Stufe (friendly_names) werden die Friendly Names
+        zuletzt ohne gespeicherte Zuordnung vergeben.
+        """
+        data = apply_transforms(self.source.fetch(), self.transforms)
+        if any('friendly_name' not in device for device in data['devices']):
+            data = friendly_names()(data)
+        return data
+
+    def build(self, data):
+        return build_config(data['devices'], data['network_config'], self.mqtt_server,
+                            self.mqtt_topic, self.parameters)
+
+    def write(self, config, data):
+        """Schreibe in alle Ausgaben. Gibt {Ausgabe: Ziel} zurück."""
+        outputs = {}
+        for sink in self.sinks:
+            try:
+                outputs[sink.name] = sink.write(config, data)
+            finally:
+                sink.close()
+        return outputs
+
+    def run(self):
+        """Kompletter Lauf. Gibt Daten, Konfiguration, Ausgaben und Zeiten zurück."""
+        timings = {}
+        start = time.perf_counter()
+        data = self.fetch()
+        timings['fetch'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        config = self.build(data)
+        timings['build'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        outputs = self.write(config, data)
+        timings['write'] = time.perf_counter() - start
+        return {'data': data, 'config': config, 'outputs': outputs, 'timings': timings}
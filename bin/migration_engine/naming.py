@@ -0,0 +1,204 @@
+"""
+Friendly Names für Zigbee2MQTT
+deCONZ-Namen werden zu gültigen MQTT-Topics normalisiert; doppelte Namen
+erhalten den Raum als Präfix, danach eine laufende Nummer. Eine gespeicherte
+Zuordnung hält die Namen über mehrere Läufe stabil
+"""
+
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+
+# "/" trennt Topic-Ebenen, "+" und "#" sind MQTT-Wildcards
+_UNSAFE = re.compile(r'[/+#\x00-\x1f\x7f]+')
+
+
+def normalize_name(name):
+    """Topic-sicherer Name: ohne "/", "+", "#" und Steuerzeichen, Leerraum zusammengefasst."""
+    name = unicodedata.normalize('NFC', str(name or ''))
+    return ' '.join(_UNSAFE.sub('-', name).split()).strip(' -')
+
+
+def name_key(device):
+    """Schlüssel eines Geräts in der Zuordnung, wie in configuration.yaml: Typ und ID."""
+    return f"{device['type']}:{device['id']}"
+
+
+def name_map_file(config_file):
+    """Zuordnungsdatei neben der Konfiguration (configuration.yaml -> configuration.names.json)."""
+    return f"{os.path.splitext(config_file)[0]}.names.json"
+
+
+def _address(device):
+    """MAC-Teil der uniqueid ("00:15:8d:...-01-0402"): gleich für alle Ressourcen eines Geräts."""
+    return (device.get('unique_id') or '').split('-', 1)[0] or None
+
+
+def _order(device):
+    device_id = str(device['id'])
+    return (device['type'], int(device_id) if device_id.isdigit() else 0, device_id)
+
+
+class FriendlyNames:
+    """Eindeutige Friendly Names einer Konfiguration.
+
+    `saved` ist eine frühere Zuordnung {Schlüssel: {'name', 'friendly_name'}};
+    ein Gerät behält seinen Friendly Name, solange sich der deCONZ-Name nicht
+    ändert. Kollisionen werden über eine Menge der vergebenen Namen
+    (ohne Groß-/Kleinschreibung) erkannt. `exclude` ist die Ausschluss-Regel
+    des Laufs ("none", "dead", "stale"), damit der Sync-Daemon sie übernimmt.
+    """
+
+    def __init__(self, saved=None, exclude=None):
+        self.saved = dict(saved or {})
+        self.exclude = exclude
+        self.assigned = {}
+        self._taken = set()
+        self._next_suffix = {}
+
+    @classmethod
+    def load(cls, filename):
+        """Zuordnung aus einer Datei; leer, wenn sie fehlt oder unlesbar ist."""
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data.get('names', {}), data.get('exclude'))
+        except (OSError, ValueError, AttributeError):
+            return cls()
+
+    @classmethod
+    def from_config(cls, config, exclude=None):
+        """Zuordnung aus den Geräteeinträgen einer erzeugten Konfiguration."""
+        names = cls(exclude=exclude)
+        for entry in config.get('devices') or []:
+            if entry.get('friendly_name'):
+                names.reserve(entry, entry['friendly_name'])
+        return names
+
+    def save(self, filename):
+        """Schreibe die aktuelle Zuordnung atomar."""
+        data = {'version': 1, 'names': self.assigned}
+        if self.exclude:
+            data['exclude'] = self.exclude
+        tmp_file = f"{filename}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_file, filename)
+
+    def _take(self, device, friendly_name):
+        self._taken.add(friendly_name.casefold())
+        self.assigned[name_key(device)] = {'name': device['name'], 'friendly_name': friendly_name}
+        device['friendly_name'] = friendly_name
+        return friendly_name
+
+    def _previous(self, device):
+        """Friendly Name aus der gespeicherten Zuordnung, falls noch gültig und frei."""
+        entry = self.saved.get(name_key(device))
+        if not entry or entry.get('name') != device['name']:
+            return None
+        friendly_name = entry.get('friendly_name')
+        if not friendly_name or friendly_name != normalize_name(friendly_name) \
+                or friendly_name.casefold() in self._taken:
+            return None
+        return friendly_name
+
+    def _resolve(self, device, base, room=None):
+        """Freier Name: `base`, mit Raum-Präfix (falls angegeben), sonst mit Nummer."""
+        candidate = base
+        if room and room.casefold() not in base.casefold():
+            candidate = f"{room} {base}"
+        folded = candidate.casefold()
+        if folded not in self._taken:
+            return self._take(device, candidate)
+        # Nächste freie Nummer je Name merken, damit 1000 gleiche Namen nicht quadratisch werden
+        number = self._next_suffix.get(folded, 2)
+        while f"{folded} {number}" in self._taken:
+            number += 1
+        self._next_suffix[folded] = number + 1
+        return self._take(device, f"{candidate} {number}")
+
+    def assign(self, devices):
+        """Vergib Friendly Names für alle Geräte und setze device['friendly_name'].
+
+        Reihenfolge: gespeicherte Namen, dann eindeutige Namen unverändert,
+        bei Kollisionen Raum-Präfix und schließlich " 2", " 3", ...
+        Das Ergebnis hängt nicht von der Reihenfolge der Geräte ab.
+
+        Returns:
+            Anzahl der Geräte, deren Friendly Name vom deCONZ-Namen abweicht
+        """
+        self.assigned, self._taken, self._next_suffix = {}, set(), {}
+        devices = sorted(devices, key=_order)
+
+        # Viele Geräte tragen denselben Namen; jeder Name wird nur einmal normalisiert
+        normalized = {}
+        pending = []
+        for device in devices:
+            previous = self._previous(device)
+            if previous:
+                self._take(device, previous)
+                continue
+            name = device['name']
+            if name not in normalized:
+                normalized[name] = normalize_name(name)
+            pending.append((device, normalized[name] or f"{device['type']} {device['id']}"))
+
+        # Sensoren liegen in deCONZ in keinem Raum, erben ihn aber vom Licht desselben Geräts
+        room_names = {}
+        rooms = {}
+        for device in devices:
+            if device.get('room'):
+                room = room_names.setdefault(device['room'], normalize_name(device['room']))
+                rooms.setdefault(_address(device), room)
+        rooms.pop(None, None)
+
+        counts = Counter(base.casefold() for _, base in pending)
+        for device, base in pending:
+            folded = base.casefold()
+            room = None
+            if counts[folded] > 1 or folded in self._taken:
+                room = (room_names.get(device.get('room'))
+                        or rooms.get(_address(device)))
+            self._resolve(device, base, room)
+        return sum(1 for device in devices if device['friendly_name'] != device['name'])
+
+    def add(self, device):
+        """Friendly Name für ein einzelnes neues oder geändertes Gerät (Sync-Daemon)."""
+        current = self.assigned.get(name_key(device))
+        if current and current['name'] == device['name']:
+            device['friendly_name'] = current['friendly_name']
+            return current['friendly_name']
+        self.release(device)
+        previous = self._previous(device)
+        if previous:
+            return self._take(device, previous)
+        base = normalize_name(device['name']) or f"{device['type']} {device['id']}"
+        room = normalize_name(device.get('room')) if base.casefold() in self._taken else None
+        return self._resolve(device, base, room)
+
+    def reserve(self, device, friendly_name):
+        """Übernimm einen bereits vergebenen Namen (z.B. aus configuration.yaml)."""
+        return self._take(device, friendly_name)
+
+    def release(self, device):
+        """Gib den Namen eines entfernten Geräts frei."""
+        entry = self.assigned.pop(name_key(device), None)
+        if entry:
+            self._taken.discard(entry['friendly_name'].casefold())
+
+
+def friendly_names(names=None):
+    """Transformation für die Migrations-Engine: Friendly Names vergeben.
+
+    Setzt device['friendly_name'] wie analyze_devices und annotate_devices
+    direkt an den Geräten; data['renamed'] ist die Anzahl geänderter Namen.
+    Mit einer FriendlyNames-Instanz (z.B. FriendlyNames.load(...)) kann die
+    Zuordnung nach dem Lauf mit names.save(...) gesichert werden.
+    """
+    names = names if names is not None else FriendlyNames()
+
+    def transform(data):
+        return dict(data, renamed=names.assign(data['devices']))
+    return transform
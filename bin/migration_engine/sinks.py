@@ -0,0 +1,149 @@
+"""
+Ausgaben der Migration
+YAML (configuration.yaml), JSON und MQTT (Geräteliste als retained Messages)
+"""
+
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import yaml
+
+from metrics import MQTT_PUBLISHED, MQTT_QUEUE_DEPTH, install_mqtt_metrics
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:
+    mqtt = None
+
+
+def _write_atomic(filename, write):
+    tmp_file = f"{filename}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        write(f)
+    os.replace(tmp_file, filename)
+
+
+class Sink:
+    """Basisklasse: schreibt Konfiguration und Daten eines Laufs."""
+
+    name = "sink"
+
+    def write(self, config, data=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class YamlSink(Sink):
+    """configuration.yaml für Zigbee2MQTT (atomar geschrieben)."""
+
+    name = "yaml"
+
+    def __init__(self, filename="configuration.yaml"):
+        self.filename = filename
+
+    def write(self, config, data=None):
+        _write_atomic(self.filename, lambda f: yaml.dump(
+            config, f, sort_keys=False, default_flow_style=False, allow_unicode=True, indent=2))
+        return self.filename
+
+
+class JsonSink(Sink):
+    """Konfiguration als JSON, z.B. für eigene Tools."""
+
+    name = "json"
+
+    def __init__(self, filename="configuration.json"):
+        self.filename = filename
+
+    def write(self, config, data=None):
+        _write_atomic(self.filename, lambda f: json.dump(config, f, ensure_ascii=False, indent=2))
+        return self.filename
+
+
+class MqttSink(Sink):
+    """Veröffentlicht die migrierten Geräte als retained MQTT-Nachrichten.
+
+    Topics: <base_topic>/migration/devices/<type>/<id> je Gerät und
+    <base_topic>/migration/summary. Der Network Key wird nicht übertragen.
+    Bei wiederholtem write() werden Topics entfernter Geräte gelöscht
+    (leere retained Nachricht). Benötigt paho-mqtt.
+    """
+
+    name = "mqtt"
+
+    def __init__(self, server="mqtt://localhost", base_topic="zigbee2mqtt", qos=1, timeout=30):
+        if mqtt is None:
+            raise RuntimeError("paho-mqtt ist nicht installiert (pip install paho-mqtt)")
+        url = urlparse(server if "://" in server else f"mqtt://{server}")
+        self.host = url.hostname or "localhost"
+        self.port = url.port or 1883
+        self.username = url.username
+        self.password = url.password
+        self.base_topic = base_topic
+        self.qos = qos
+        self.timeout = timeout
+        self.sent = 0
+        self.acknowledged = 0
+        self.lock = threading.Lock()
+        self.client = None
+        self.topics = set()
+        install_mqtt_metrics()
+
+    def _connect(self):
+        if hasattr(mqtt, 'CallbackAPIVersion'):
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        else:
+            client = mqtt.Client()
+        if self.username:
+            client.username_pw_set(self.username, self.password)
+        client.on_publish = self._on_publish
+        client.connect(self.host, self.port)
+        client.loop_start()
+        self.client = client
+
+    def _on_publish(self, client, userdata, mid, *args):
+        with self.lock:
+            self.acknowledged += 1
+            MQTT_QUEUE_DEPTH.set(self.sent - self.acknowledged)
+        MQTT_PUBLISHED.inc()
+
+    def _publish(self, topic, payload):
+        with self.lock:
+            self.sent += 1
+            MQTT_QUEUE_DEPTH.set(self.sent - self.acknowledged)
+        message = b"" if payload is None else json.dumps(payload, ensure_ascii=False)
+        return self.client.publish(topic, message, qos=self.qos, retain=True)
+
+    def write(self, config, data=None):
+        if self.client is None:
+            self._connect()
+        prefix = f"{self.base_topic}/migration"
+        devices = config.get('devices', [])
+        topics = {f"{prefix}/devices/{entry['type']}/{entry['id']}": entry for entry in devices}
+        messages = [self._publish(topic, entry) for topic, entry in topics.items()]
+        messages.extend(self._publish(topic, None) for topic in self.topics - topics.keys())
+        self.topics = set(topics)
+        advanced = config.get('advanced', {})
+        messages.append(self._publish(f"{prefix}/summary", {
+            'devices': len(devices),
+            'channel': advanced.get('channel'),
+            'pan_id': advanced.get('pan_id'),
+            'source': (data or {}).get('source')
+        }))
+        deadline = time.monotonic() + self.timeout
+        for message in messages:
+            message.wait_for_publish(max(0.0, deadline - time.monotonic()))
+            if not message.is_published():
+                raise TimeoutError(f"MQTT-Nachrichten nach {self.timeout}s nicht bestätigt")
+        return f"mqtt://{self.host}:{self.port}/{prefix}"
+
+    def close(self):
+        if self.client is not None:
+            self.client.loop_stop()
+            self.client.disconnect()
+            self.client = None
@@ -0,0 +1,244 @@
+"""
+Datenquellen der Migration
+Jede Quelle liefert Netzwerkkonfiguration und Geräteliste im Format von
+get_devices: deCONZ-REST-API, zll.db, Phoscon-Backup oder Snapshot
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+
+from deconz_client import get_client
+from snapshot import SNAPSHOT_FILE, device_from_resource, load_snapshot
+
+RESOURCE_TYPES = {'sensors': 'sensor', 'lights': 'light'}
+
+
+def _as_int(value):
+    """Zahl aus deCONZ-Werten (int oder Hex-String wie "0x00212eff...")."""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(str(value), 16) if str(value).lower().startswith('0x') else int(value)
+    except ValueError:
+        return None
+
+
+def network_config_from_rest(config):
+    """Netzwerkparameter aus der Antwort von /api/<key>/config."""
+    return {
+        'channel': config.get('zigbeechannel'),
+        'pan_id': _as_int(config.get('panid')),
+        'ext_pan_id': _as_int(config.get('extpanid')),
+        'network_key': _as_int(config.get('networkkey')),
+        'name': config.get('name', 'deCONZ'),
+        'version': config.get('version', 'Unknown')
+    }
+
+
+def rooms_from_groups(groups):
+    """Licht-ID -> Raumname aus der Antwort von /api/<key>/groups."""
+    rooms = {}
+    for group in groups.values():
+        if group.get('type') == 'Room' and group.get('name'):
+            for light_id in group.get('lights') or []:
+                rooms.setdefault(str(light_id), group['name'])
+    return rooms
+
+
+def assign_rooms(devices, rooms):
+    """Setze device['room'] für Lichter in einem Raum."""
+    for device in devices:
+        if device['type'] == 'light' and str(device['id']) in rooms:
+            device['room'] = rooms[str(device['id'])]
+    return devices
+
+
+class Source:
+    """Basisklasse: liefert {'source', 'network_config', 'devices'}."""
+
+    name = "source"
+
+    def fetch_network_config(self):
+        return None
+
+    def fetch_devices(self):
+        raise NotImplementedError
+
+    def fetch(self):
+        return {
+            'source': self.name,
+            'network_config': self.fetch_network_config(),
+            'devices': self.fetch_devices()
+        }
+
+
+class StaticSource(Source):
+    """Bereits abgerufene Daten, z.B. aus dem Lauf-Journal oder von get_devices()."""
+
+    def __init__(self, devices, network_config=None, name="static"):
+        self.devices = devices
+        self.network_config = network_config
+        self.name = name
+
+    def fetch_network_config(self):
+        return self.network_config
+
+    def fetch_devices(self):
+        return self.devices
+
+
+class RestSource(Source):
+    """Laufendes deCONZ-Gateway über die REST-API.
+
+    Verwendet den gemeinsamen Client (Session, Retries, Cache) des Gateways.
+    """
+
+    name = "rest"
+
+    def __init__(self, host, port, api_key, client=None):
+        self.client = client or get_client(host, port, api_key)
+
+    def fetch_network_config(self):
+        response = self.client.get("/config")
+        response.raise_for_status()
+        return network_config_from_rest(response.json())
+
+    def fetch_collection(self, collection):
+        """Geräte einer Sammlung ("sensors" oder "lights")."""
+        response = self.client.get(f"/{collection}")
+        response.raise_for_status()
+        device_type = RESOURCE_TYPES[collection]
+        return [device_from_resource(resource_id, resource, device_type)
+                for resource_id, resource in response.json().items()]
+
+    def fetch_rooms(self):
+        """Raum je Licht-ID aus den Gruppen vom Typ "Room"."""
+        response = self.client.get("/groups")
+        response.raise_for_status()
+        return rooms_from_groups(response.json())
+
+    def fetch_devices(self):
+        devices = []
+        for collection in RESOURCE_TYPES:
+            devices.extend(self.fetch_collection(collection))
+        assign_rooms(devices, self.fetch_rooms())
+        return devices
+
+
+class ZllDbSource(Source):
+    """deCONZ-Datenbank zll.db (z.B. ~/.local/share/dresden-elektronik/deCONZ/zll.db).
+
+    Lichter stehen in der Tabelle nodes, Sensoren in sensors; gelöschte
+    Einträge werden übersprungen. Netzwerkparameter enthält die Datenbank
+    nicht, sie werden beim Erstellen der Konfiguration erzeugt.
+    """
+
+    name = "zll"
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def _rows(connection, table):
+        columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+        if not columns:
+            return columns, []
+        connection.row_factory = sqlite3.Row
+        return columns, connection.execute(f"SELECT * FROM {table}").fetchall()
+
+    @staticmethod
+    def _json(value):
+        try:
+            return json.loads(value) if value else {}
+        except ValueError:
+            return {}
+
+    def fetch_devices(self):
+        devices = []
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            columns, rows = self._rows(connection, "sensors")
+            for row in rows:
+                if 'deletedState' in columns and row['deletedState'] == 'deleted':
+                    continue
+                resource = {key: row[key] for key in
+                            ('name', 'modelid', 'manufacturername', 'uniqueid') if key in columns}
+                resource['state'] = self._json(row['state']) if 'state' in columns else {}
+                resource['config'] = self._json(row['config']) if 'config' in columns else {}
+                devices.append(device_from_resource(str(row['sid']), resource, 'sensor'))
+
+            columns, rows = self._rows(connection, "nodes")
+            for row in rows:
+                if 'state' in columns and row['state'] == 'deleted':
+                    continue
+                resource = {key: row[key] for key in
+                            ('name', 'modelid', 'manufacturername') if key in columns}
+                resource['uniqueid'] = row['mac'] if 'mac' in columns else ''
+                devices.append(device_from_resource(str(row['id']), resource, 'light'))
+        finally:
+            connection.close()
+        return devices
+
+
+class BackupArchiveSource(Source):
+    """Phoscon-/deCONZ-Backup (tar, optional komprimiert oder verschachtelt).
+
+    Die enthaltene zll.db wird in ein temporäres Verzeichnis entpackt und
+    wie bei ZllDbSource gelesen.
+    """
+
+    name = "backup"
+
+    def __init__(self, path):
+        self.path = path
+
+    def _extract_database(self, archive, directory):
+        for member in archive.getmembers():
+            basename = os.path.basename(member.name)
+            if basename == "zll.db" and member.isfile():
+                target = os.path.join(directory, "zll.db")
+                with archive.extractfile(member) as src, open(target, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                return target
+            if member.isfile() and basename.endswith(('.tar', '.tar.gz', '.tgz')):
+                with tarfile.open(fileobj=archive.extractfile(member), mode='r:*') as nested:
+                    found = self._extract_database(nested, directory)
+                    if found:
+                        return found
+        return None
+
+    def fetch_devices(self):
+        directory = tempfile.mkdtemp(prefix="deconz-backup-")
+        try:
+            with tarfile.open(self.path, mode='r:*') as archive:
+                database = self._extract_database(archive, directory)
+            if database is None:
+                raise ValueError(f"Keine zll.db in {self.path} gefunden")
+            return ZllDbSource(database).fetch_devices()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+class SnapshotSource(Source):
+    """Gespeicherter Snapshot (deconz_snapshot.json) eines früheren Laufs."""
+
+    name = "snapshot"
+
+    def __init__(self, filename=SNAPSHOT_FILE):
+        self.filename = filename
+        self._snapshot = None
+
+    def _load(self):
+        if self._snapshot is None:
+            self._snapshot = load_snapshot(self.filename)
+        return self._snapshot
+
+    def fetch_network_config(self):
+        return self._load().get('network_config')
+
+    def fetch_devices(self):
+        return self._load().get('devices') or []
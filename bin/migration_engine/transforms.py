@@ -0,0 +1,115 @@
+"""
+Umwandlung der deCONZ-Daten in die Zigbee2MQTT-Konfiguration
+Transformationen sind Funktionen data -> data und werden als Kette vor dem
+Erstellen der Konfiguration angewendet
+"""
+
+import random
+
+
+def generate_random_hex(byte_count):
+    """Generiere zufällige Hex-Zeichen."""
+    return ''.join(random.choices('0123456789abcdef', k=byte_count * 2))
+
+
+def apply_transforms(data, transforms):
+    """Wende die Transformationen der Reihe nach an."""
+    for transform in transforms:
+        data = transform(data)
+    return data
+
+
+def only_types(*types):
+    """Transformation: nur Geräte der angegebenen Typen ("sensor", "light")."""
+    def transform(data):
+        return dict(data, devices=[device for device in data['devices'] if device['type'] in types])
+    return transform
+
+
+def rename_devices(names):
+    """Transformation: Namen aus einer Zuordnung (type, id) -> Name übernehmen."""
+    def transform(data):
+        devices = []
+        for device in data['devices']:
+            name = names.get((device['type'], str(device['id'])))
+            devices.append(dict(device, name=name) if name else device)
+        return dict(data, devices=devices)
+    return transform
+
+
+def device_entry(device):
+    """Geräteeintrag für configuration.yaml."""
+    entry = {
+        'id': device['id'],
+        'name': device['name'],
+        'type': device['type']
+    }
+    if device.get('friendly_name'):
+        entry['friendly_name'] = device['friendly_name']
+    if device['model']:
+        entry['model'] = device['model']
+    if device['manufacturer']:
+        entry['manufacturer'] = device['manufacturer']
+    if device.get('z2m_supported') is not None:
+        # Ergebnis von compatibility.annotate_devices; ohne Treffer im Index
+        # bleibt die Unterstützung offen (kein Eintrag)
+        entry['supported'] = device['z2m_supported']
+        if device.get('z2m_model'):
+            entry['z2m_model'] = device['z2m_model']
+    if device.get('health') in ('stale', 'dead'):
+        # Markierung aus device_health.analyze_devices
+        entry['health'] = device['health']
+    return entry
+
+
+def network_parameters(network_config):
+    """Kanal, PAN-IDs und Network Key; fehlende Werte werden erzeugt.
+
+    Returns:
+        (channel, pan_id, ext_pan_id, network_key, generated) mit
+        ext_pan_id/network_key als Hex-Strings und generated als Liste
+        der neu erzeugten Felder
+    """
+    channel = network_config.get('channel', 15) if network_config else 15
+    pan_id = network_config.get('pan_id', 0x1A63) if network_config else 0x1A63
+    generated = []
+
+    if not network_config or not network_config.get('ext_pan_id'):
+        ext_pan_id = generate_random_hex(8)
+        generated.append('ext_pan_id')
+    else:
+        ext_pan_id = f"{network_config['ext_pan_id']:016X}"
+
+    if not network_config or not network_config.get('network_key'):
+        network_key = generate_random_hex(16)
+        generated.append('network_key')
+    else:
+        network_key = f"{network_config['network_key']:032X}"
+
+    return channel, pan_id, ext_pan_id, network_key, generated
+
+
+def build_config(devices, network_config, mqtt_server, mqtt_topic, parameters=None):
+    """Erstelle die Zigbee2MQTT-Konfiguration.
+
+    `parameters` kann ein Ergebnis von network_parameters() sein, damit
+    erzeugte Werte vorher angezeigt werden können. friendly_name wird
+    übernommen, wenn die Geräte ihn bereits haben (FriendlyNames.assign).
+    """
+    channel, pan_id, ext_pan_id, network_key, _ = parameters or network_parameters(network_config)
+    return {
+        'mqtt': {
+            'base_topic': mqtt_topic,
+            'server': mqtt_server
+        },
+        'serial': {
+            'port': '/dev/ttyACM0'
+        },
+        'advanced': {
+            'pan_id': f"0x{pan_id:04X}",
+            'extended_pan_id': f"0x{ext_pan_id}",
+            'network_key': f"[{', '.join(f'0x{network_key[i:i+2]}' for i in range(0, len(network_key), 2))}]",
+            'channel': int(channel)
+        },
+        'devices': [device_entry(device) for device in devices]
+    }
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Pairing mit dem deCONZ-Link-Button
+Fragt POST /api während des gesamten 60-Sekunden-Fensters mit wachsendem
+Intervall ab und liefert den API-Key, sobald der Tastendruck erkannt wird.
+Mehrere Gateways können gleichzeitig gepairt werden
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from credentials import remember_api_key
+from deconz_client import get_client
+
+DEVICETYPE = "deconz-migrator"
+PAIRING_WINDOW = 60
+
+# deCONZ-Fehlertyp für "link button not pressed"
+ERROR_LINK_BUTTON_NOT_PRESSED = 101
+
+
+class PairingError(Exception):
+    """Das Gateway hat das Pairing mit einem anderen Fehler abgelehnt."""
+
+
+class GatewayBusy(PairingError):
+    """Keine eindeutige Antwort (z.B. HTTP 503 während eines Neustarts); später erneut versuchen."""
+
+
+def request_api_key(client, devicetype=DEVICETYPE):
+    """Ein einzelner Pairing-Versuch.
+
+    Returns:
+        API-Key oder None, solange der Link-Button nicht gedrückt wurde
+
+    Raises:
+        GatewayBusy: Anderer HTTP-Status oder keine deCONZ-Antwort
+        PairingError: deCONZ meldet einen anderen Fehler als 101
+    """
+    response = client.post(auth=False, json={"devicetype": devicetype})
+    if response.status_code not in (200, 403):
+        raise GatewayBusy(f"HTTP {response.status_code}")
+    try:
+        result = response.json()[0]
+    except (ValueError, IndexError, KeyError, TypeError):
+        raise GatewayBusy("Ungültige Antwort vom Server")
+    if "success" in result and "username" in result["success"]:
+        return result["success"]["username"]
+    error = result.get("error", {})
+    if error.get("type") == ERROR_LINK_BUTTON_NOT_PRESSED:
+        return None
+    raise PairingError(error.get("description", "Unbekannter Fehler"))
+
+
+def pair_gateway(host, port, window=PAIRING_WINDOW, devicetype=DEVICETYPE, on_status=None,
+                 cancel=None, min_interval=0.25, max_interval=2.0):
+    """Warte bis zu `window` Sekunden auf den Link-Button und hole einen API-Key.
+
+    Das Abfrageintervall beginnt bei `min_interval` (Button evtl. schon
+    gedrückt) und wächst bis `max_interval`; ein Tastendruck wird also
+    spätestens nach `max_interval` Sekunden erkannt.
+
+    Args:
+        on_status: Callback(host, port, status, detail) mit status
+            "waiting" (detail = Restzeit), "success" (Dauer),
+            "timeout" (Fenster) oder "error" (Meldung)
+        cancel: threading.Event zum vorzeitigen Abbrechen
+
+    Returns:
+        API-Key oder None (Zeit abgelaufen/abgebrochen)
+
+    Vorübergehende Fehler (Verbindung, HTTP 503 usw.) werden gemeldet und
+    bis zum Ende des Fensters im Abstand von `max_interval` wiederholt.
+
+    Raises:
+        PairingError: Das Gateway meldet einen anderen Fehler als 101
+    """
+    on_status = on_status or (lambda *args: None)
+    cancel = cancel or threading.Event()
+    client = get_client(host, port)
+    start = time.monotonic()
+    deadline = start + window
+    interval = min_interval
+    last_error = None
+
+    while not cancel.is_set():
+        try:
+            api_key = request_api_key(client, devicetype)
+        except (GatewayBusy, requests.RequestException) as e:
+            # Gateway kurz nicht erreichbar: weiter versuchen, aber seltener
+            api_key = None
+            interval = max_interval
+            if str(e) != last_error:
+                last_error = str(e)
+                on_status(host, port, "error", last_error)
+        except PairingError as e:
+            on_status(host, port, "error", str(e))
+            raise
+        if api_key:
+            on_status(host, port, "success", time.monotonic() - start)
+            return api_key
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            on_status(host, port, "timeout", window)
+            return None
+        on_status(host, port, "waiting", remaining)
+        cancel.wait(min(interval, remaining))
+        interval = min(interval * 1.5, max_interval)
+    return None
+
+
+def pair_gateways(gateways, window=PAIRING_WINDOW, devicetype=DEVICETYPE, on_status=None):
+    """Paire mehrere Gateways gleichzeitig.
+
+    Args:
+        gateways: Liste von (host, port)
+
+    Returns:
+        Dictionary (host, port) -> API-Key oder None
+    """
+    cancel = threading.Event()
+
+    def pair(gateway):
+        host, port = gateway
+        try:
+            return gateway, pair_gateway(host, port, window, devicetype, on_status, cancel)
+        except PairingError:
+            return gateway, None
+
+    gateways = [(host, int(port)) for host, port in gateways]
+    with ThreadPoolExecutor(max_workers=max(1, len(gateways))) as executor:
+        futures = executor.map(pair, gateways)
+        try:
+            return dict(futures)
+        except KeyboardInterrupt:
+            cancel.set()
+            raise
+
+
+def print_progress(host, port, status, detail):
+    """Fortschrittsanzeige für ein einzelnes Gateway im Terminal."""
+    if status == "waiting":
+        print(f"\r⏳ Warte auf Link-Button an {host}:{port} ... noch {detail:4.0f}s ",
+              end="", flush=True)
+    elif status == "success":
+        print(f"\r✅ Link-Button erkannt nach {detail:.1f}s" + " " * 30)
+    elif status == "timeout":
+        print(f"\r⏰ Kein Link-Button innerhalb von {detail:.0f}s erkannt" + " " * 20)
+    else:
+        print(f"\r❌ {host}:{port}: {detail}" + " " * 20)
+
+
+def print_events(host, port, status, detail):
+    """Fortschritt mehrerer Gateways: nur Zustandswechsel, eine Zeile pro Ereignis."""
+    if status == "success":
+        print(f"✅ {host}:{port}: API-Key erhalten nach {detail:.1f}s")
+    elif status == "timeout":
+        print(f"⏰ {host}:{port}: kein Link-Button innerhalb von {detail:.0f}s")
+    elif status == "error":
+        print(f"❌ {host}:{port}: {detail}")
+
+
+def pair_interactive(host, port, window=PAIRING_WINDOW):
+    """Pairing im Terminal: Anleitung anzeigen, auf den Link-Button warten.
+
+    Returns:
+        API-Key oder None
+    """
+    print("\n" + "=" * 60)
+    print("🔑 API-Key Generierung")
+    print("=" * 60)
+    print("Um einen API-Key zu generieren, musst du den")
+    print("LINK-BUTTON auf deinem deCONZ-Gateway drücken.")
+    print("\n📋 Schritt-für-Schritt Anleitung:")
+    print("1. Gehe zu deinem deCONZ-Gateway (ConBee II, RaspBee, etc.)")
+    print("2. Suche den LINK-BUTTON (meist ein kleiner Taster)")
+    print("3. Drücke und halte den Button für 5-10 Sekunden")
+    print("4. Warte bis die LED blinkt oder sich ändert")
+    print("5. Das Tool erkennt den Tastendruck automatisch")
+    print(f"\n⏱️  Du hast {window:.0f} Sekunden Zeit!")
+    print("=" * 60)
+
+    print(f"\n📱 App-Name: {DEVICETYPE}")
+    try:
+        api_key = pair_gateway(host, port, window, on_status=print_progress)
+        if api_key:
+            print(f"✅ API-Key erfolgreich generiert!")
+            print(f"🔑 API-Key: {api_key}")
+            return api_key
+    except KeyboardInterrupt:
+        print("\n\n👋 Migration abgebrochen!")
+        sys.exit(0)
+    except PairingError as e:
+        print(f"❌ Fehler bei API-Key-Generierung: {e}")
+
+    print("\n💡 Tipps:")
+    print("- Stelle sicher, dass deCONZ läuft")
+    print("- Drücke den Link-Button länger (5-10 Sekunden)")
+    print("- Versuche es erneut")
+    print("- Oder verwende einen bereits vorhandenen API-Key")
+    return None
+
+
+def parse_gateway(value, default_port=4530):
+    host, _, port = value.partition(':')
+    return host, int(port) if port else default_port
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="API-Keys per Link-Button von einem oder mehreren deCONZ-Gateways holen"
+    )
+    parser.add_argument("gateways", nargs="+", metavar="HOST[:PORT]", help="deCONZ-Gateways")
+    parser.add_argument("--window", type=float, default=PAIRING_WINDOW,
+                        help=f"Sekunden Wartezeit auf den Link-Button (Standard: {PAIRING_WINDOW})")
+    parser.add_argument("--devicetype", default=DEVICETYPE, help=f"App-Name (Standard: {DEVICETYPE})")
+    parser.add_argument("--no-save", action="store_true", help="API-Keys nicht speichern")
+    args = parser.parse_args(argv)
+
+    gateways = [parse_gateway(value) for value in args.gateways]
+    print(f"🔑 Drücke jetzt den Link-Button an {len(gateways)} Gateway(s) "
+          f"(Fenster: {args.window:.0f}s)")
+    try:
+        results = pair_gateways(gateways, args.window, args.devicetype, print_events)
+    except KeyboardInterrupt:
+        print("\n👋 Pairing abgebrochen")
+        sys.exit(130)
+
+    for (host, port), api_key in results.items():
+        if api_key:
+            print(f"🔑 {host}:{port}: {api_key}")
+            if not args.no_save:
+                remember_api_key(host, port, api_key)
+    if not all(results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Profiling-Modus für die Migrations-Wizards
+Misst jeden Schritt (Wall-/CPU-Zeit, Wartezeit auf Eingaben, HTTP-Anfragen,
+Spitzenspeicher) und schreibt optional cProfile-Daten und Collapsed Stacks
+für Flamegraphs
+"""
+
+import builtins
+import cProfile
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from deconz_client import add_request_hook, remove_request_hook
+from tracing import end_step, mark_step
+
+
+class NullProfiler:
+    """Profiler ohne Messung, wenn --profile nicht gesetzt ist.
+
+    Schritt-Markierungen werden weiterhin an das Tracing gemeldet.
+    """
+
+    def start(self):
+        return self
+
+    def mark(self, name):
+        mark_step(name)
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def finish(self):
+        end_step()
+
+    def report(self):
+        pass
+
+
+class PhaseProfiler:
+    """Zeitmessung je Wizard-Schritt.
+
+    mark() beendet den laufenden Schritt und beginnt den nächsten,
+    sodass bestehende Abläufe nur eine Zeile pro Schritt brauchen.
+    Die Wartezeit auf input() wird getrennt ausgewiesen.
+    """
+
+    def __init__(self, cprofile_file=None, collapsed_file=None, sample_interval=0.005):
+        self.cprofile_file = cprofile_file
+        self.collapsed_file = collapsed_file
+        self.sample_interval = sample_interval
+
+        self.phases = []
+        self.current = None
+        self.requests = []
+        self.started = None
+        self.total_wall = 0.0
+        self.peak_bytes = 0
+
+        self._profile = None
+        self._samples = {}
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+        self._main_thread = threading.get_ident()
+        self._original_input = None
+
+    def start(self):
+        tracemalloc.start()
+        add_request_hook(self._on_request)
+        self._original_input = builtins.input
+        builtins.input = self._timed_input
+        if self.cprofile_file:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        if self.collapsed_file:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        self.started = time.perf_counter()
+        return self
+
+    # ------------------------------------------------------------------
+    # Schritte
+    # ------------------------------------------------------------------
+
+    def mark(self, name):
+        """Beende den aktuellen Schritt und beginne `name` (auch im Tracing)."""
+        self._close_phase()
+        mark_step(name)
+        tracemalloc.reset_peak()
+        self.current = {
+            'name': name,
+            'wall_start': time.perf_counter(),
+            'cpu_start': time.process_time(),
+            'input': 0.0,
+            'http_count': 0,
+            'http_time': 0.0,
+            'http_bytes': 0
+        }
+
+    @contextmanager
+    def phase(self, name):
+        """Schritt als Kontextmanager; danach läuft der vorherige Schritt weiter."""
+        outer = self.current['name'] if self.current else None
+        self.mark(name)
+        try:
+            yield
+        finally:
+            self._close_phase()
+            if outer:
+                self.mark(f"{outer} (Fortsetzung)")
+
+    def _close_phase(self):
+        phase = self.current
+        if phase is None:
+            return
+        self.current = None
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak_bytes = max(self.peak_bytes, peak)
+        self.phases.append({
+            'name': phase['name'],
+            'wall': time.perf_counter() - phase['wall_start'],
+            'cpu': time.process_time() - phase['cpu_start'],
+            'input': phase['input'],
+            'http_count': phase['http_count'],
+            'http_time': phase['http_time'],
+            'http_bytes': phase['http_bytes'],
+            'peak_bytes': peak
+        })
+
+    # ------------------------------------------------------------------
+    # Messpunkte
+    # ------------------------------------------------------------------
+
+    def _on_request(self, record):
+        self.requests.append(dict(record, phase=self.current['name'] if self.current else None))
+        if self.current:
+            self.current['http_count'] += 1
+            self.current['http_time'] += record['elapsed']
+            self.current['http_bytes'] += record['bytes']
+
+    def _timed_input(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._original_input(*args, **kwargs)
+        finally:
+            if self.current:
+                self.current['input'] += time.perf_counter() - start
+
+    def _sample(self):
+        """Stichproben des Haupt-Threads für Collapsed Stacks."""
+        while not self._stop_sampling.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._main_thread)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self._samples[key] = self._samples.get(key, 0) + 1
+
+    # ------------------------------------------------------------------
+    # Abschluss
+    # ------------------------------------------------------------------
+
+    def finish(self):
+        """Beende alle Messungen und schreibe die Ausgabedateien."""
+        if self.started is None:
+            return
+        self._close_phase()
+        end_step()
+        self.total_wall = time.perf_counter() - self.started
+        self.started = None
+
+        if self._profile:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_file)
+        if self._sampler:
+            self._stop_sampling.set()
+            self._sampler.join()
+            with open(self.collapsed_file, 'w', encoding='utf-8') as f:
+                for stack, count in sorted(self._samples.items()):
+                    f.write(f"{stack} {count}\n")
+        builtins.input = self._original_input
+        remove_request_hook(self._on_request)
+        tracemalloc.stop()
+
+    def report(self):
+        """Zeige die Aufschlüsselung nach Schritten."""
+        print("\n" + "=" * 78)
+        print("⏱️  PROFILING")
+        print("=" * 78)
+        print(f"{'Schritt':<32}{'Gesamt s':>9}{'Eingabe s':>10}{'CPU s':>8}"
+              f"{'HTTP':>6}{'HTTP s':>8}{'Peak MiB':>10}")
+        print("-" * 78)
+        for phase in self.phases:
+            print(f"{phase['name'][:31]:<32}{phase['wall']:>9.3f}{phase['input']:>10.3f}"
+                  f"{phase['cpu']:>8.3f}{phase['http_count']:>6}{phase['http_time']:>8.3f}"
+                  f"{phase['peak_bytes'] / 1048576:>10.2f}")
+        print("-" * 78)
+        total_input = sum(phase['input'] for phase in self.phases)
+        total_http = sum(phase['http_time'] for phase in self.phases)
+        print(f"{'Gesamt':<32}{self.total_wall:>9.3f}{total_input:>10.3f}"
+              f"{sum(p['cpu'] for p in self.phases):>8.3f}{len(self.requests):>6}"
+              f"{total_http:>8.3f}{self.peak_bytes / 1048576:>10.2f}")
+
+        if self.requests:
+            print("\n🌐 Langsamste HTTP-Anfragen:")
+            for record in sorted(self.requests, key=lambda r: r['elapsed'], reverse=True)[:5]:
+                status = record['status'] or record['error']
+                print(f"   {record['elapsed']:.3f}s  {record['method']} {record['template']} "
+                      f"-> {status} ({record['bytes']} Bytes)")
+        if self.cprofile_file:
+            print(f"\n📁 cProfile-Daten: {self.cprofile_file} (z.B. python3 -m pstats {self.cprofile_file})")
+        if self.collapsed_file:
+            print(f"📁 Collapsed Stacks: {self.collapsed_file} (z.B. flamegraph.pl {self.collapsed_file} > profil.svg)")
+        print("=" * 78)
+
+
+def add_profile_arguments(parser):
+    """Füge die Profiling-Optionen zu einem argparse-Parser hinzu."""
+    parser.add_argument("--profile", action="store_true",
+                        help="Zeitmessung je Schritt und HTTP-Anfrage ausgeben")
+    parser.add_argument("--profile-cprofile", metavar="DATEI",
+                        help="cProfile-Daten in DATEI schreiben (impliziert --profile)")
+    parser.add_argument("--profile-collapsed", metavar="DATEI",
+                        help="Collapsed Stacks für Flamegraphs in DATEI schreiben (impliziert --profile)")
+
+
+def create_profiler(args):
+    """Erzeuge den passenden Profiler für die geparsten Argumente."""
+    if args.profile or args.profile_cprofile or args.profile_collapsed:
+        return PhaseProfiler(args.profile_cprofile, args.profile_collapsed).start()
+    return NullProfiler()
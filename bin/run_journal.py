@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Lauf-Journal für unterbrochene Migrationen
+Jede abgeschlossene Stufe (API-Key, Netzwerkkonfiguration, Geräte,
+MQTT-Einstellungen, erzeugte Konfiguration) wird pro Gateway als eigene
+Datei gesichert; ein Neustart setzt nach der letzten fertigen Stufe fort
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+JOURNAL_DIR = os.environ.get(
+    "DECONZ_JOURNAL_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "deconz-to-zigbee2mqtt", "runs")
+)
+
+# Reihenfolge der Stufen eines Laufs
+STAGES = ('api_key', 'network_config', 'devices', 'mqtt', 'config')
+
+
+def _write_private(filename, data):
+    """Schreibe JSON atomar mit Rechten 600 (enthält API-Key und Network Key)."""
+    tmp_file = f"{filename}.{os.getpid()}.tmp"
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_file, filename)
+
+
+class RunJournal:
+    """Checkpoints eines Migrationslaufs für ein Gateway.
+
+    Jede Stufe liegt in einer eigenen Datei, damit ein Checkpoint nur die
+    eigene Stufe schreibt und große Gerätelisten nicht mehrfach.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._values = {}
+
+    @classmethod
+    def for_gateway(cls, host, port, root=None):
+        return cls(os.path.join(root or JOURNAL_DIR, f"{host}_{int(port)}"))
+
+    def _path(self, stage):
+        return os.path.join(self.directory, f"{stage}.json")
+
+    def checkpoint(self, stage, value):
+        """Sichere das Ergebnis einer abgeschlossenen Stufe."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        _write_private(self._path(stage), {'stage': stage, 'saved': time.time(), 'value': value})
+        self._values[stage] = value
+
+    def has(self, stage):
+        return stage in self._values or os.path.exists(self._path(stage))
+
+    def load(self, stage, default=None):
+        """Ergebnis einer Stufe oder `default`, falls nicht (lesbar) gesichert."""
+        if stage not in self._values:
+            try:
+                with open(self._path(stage), 'r', encoding='utf-8') as f:
+                    self._values[stage] = json.load(f)['value']
+            except (OSError, ValueError, KeyError):
+                return default
+        return self._values[stage]
+
+    def completed(self):
+        """Gesicherte Stufen in Ablaufreihenfolge."""
+        return [stage for stage in STAGES if self.has(stage)]
+
+    def saved_at(self):
+        """Zeitpunkt des letzten Checkpoints oder None."""
+        times = [os.path.getmtime(self._path(stage)) for stage in STAGES
+                 if os.path.exists(self._path(stage))]
+        return max(times) if times else None
+
+    def discard(self, stages=None):
+        """Verwerfe einzelne Stufen oder (ohne Angabe) den ganzen Lauf."""
+        if stages is None:
+            self._values.clear()
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return
+        for stage in stages:
+            self._values.pop(stage, None)
+            try:
+                os.remove(self._path(stage))
+            except FileNotFoundError:
+                pass
+
+    def discard_from(self, stage):
+        """Verwerfe `stage` und alle folgenden Stufen (sie bauen darauf auf)."""
+        self.discard(STAGES[STAGES.index(stage):])
+
+
+class NullJournal:
+    """Journal, das nichts sichert und nichts verwirft (Dry-Run).
+
+    Ein echter unterbrochener Lauf desselben Gateways bleibt so erhalten.
+    """
+
+    def checkpoint(self, stage, value):
+        pass
+
+    def has(self, stage):
+        return False
+
+    def load(self, stage, default=None):
+        return default
+
+    def completed(self):
+        return []
+
+    def saved_at(self):
+        return None
+
+    def discard(self, stages=None):
+        pass
+
+    def discard_from(self, stage):
+        pass
+
+
+class FleetJournal:
+    """Ergebnis je Gateway eines Flotten-Laufs; Wiederholungen nur für Fehlschläge."""
+
+    def __init__(self, filename=None):
+        self.filename = filename or os.path.join(JOURNAL_DIR, "fleet.json")
+        self._gateways = None
+
+    def load(self):
+        if self._gateways is None:
+            try:
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    self._gateways = json.load(f).get('gateways', {})
+            except (OSError, ValueError):
+                self._gateways = {}
+        return self._gateways
+
+    def record(self, host, port, status, exit_code, error=None):
+        self.load()[f"{host}:{int(port)}"] = {
+            'status': status,
+            'exit_code': exit_code,
+            'error': error,
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.filename)), mode=0o700, exist_ok=True)
+        _write_private(self.filename, {'version': 1, 'gateways': self._gateways})
+
+    def pending(self, gateways):
+        """Gateways ohne erfolgreichen Lauf."""
+        done = self.load()
+        return [(host, port) for host, port in gateways
+                if done.get(f"{host}:{int(port)}", {}).get('status') != 'ok']
+
+    def discard(self):
+        self._gateways = {}
+        try:
+            os.remove(self.filename)
+        except FileNotFoundError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Unterbrochene Migrationsläufe anzeigen oder verwerfen")
+    parser.add_argument("command", choices=["list", "clear"], help="list: anzeigen, clear: alle verwerfen")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        shutil.rmtree(JOURNAL_DIR, ignore_errors=True)
+        print("🗑️  Alle gesicherten Läufe verworfen")
+        return
+
+    runs = sorted(os.listdir(JOURNAL_DIR)) if os.path.isdir(JOURNAL_DIR) else []
+    runs = [name for name in runs if os.path.isdir(os.path.join(JOURNAL_DIR, name))]
+    if not runs:
+        print("📭 Keine unterbrochenen Läufe")
+    for name in runs:
+        journal = RunJournal(os.path.join(JOURNAL_DIR, name))
+        saved = time.strftime('%Y-%m-%d %H:%M', time.localtime(journal.saved_at() or 0))
+        print(f"♻️  {name}: {', '.join(journal.completed()) or '-'} (Stand {saved})")
+    fleet = FleetJournal().load()
+    failed = [gateway for gateway, entry in fleet.items() if entry['status'] != 'ok']
+    if failed:
+        print(f"❌ Fehlgeschlagene Gateways im letzten Flotten-Lauf: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,11 @@
 Einfaches Skript zum Generieren eines deCONZ API-Keys
 """
 
-import requests
-import json
 import sys
 
+from credentials import remember_api_key
+from pairing import PAIRING_WINDOW, pair_gateway, print_progress
+
 def get_api_key(host: str, port: int = 4530):
     """
     Generiere einen API-Key für deCONZ.
@@ -15,59 +16,16 @@ def get_api_key(host: str, port: int = 4530):
         host: deCONZ-Host-IP
         port: deCONZ-Port
     """
-    url = f"http://{host}:{port}/api"
-    payload = {"devicetype": "deconz-migrator"}
-    headers = {"Content-Type": "application/json"}
-    
     print(f"🔗 Verbinde zu deCONZ auf {host}:{port}")
     print("⚠️  WICHTIG: Drücke den Link-Button auf deinem deCONZ-Gateway!")
-    print("⏱️  Du hast 60 Sekunden Zeit...")
+    print(f"⏱️  Du hast {PAIRING_WINDOW} Sekunden Zeit...")
     
     try:
-        # Erster Versuch
-        print("\n🔄 Versuche API-Key zu generieren...")
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        
-        if response.status_code in [200, 403]:
-            data = response.json()
-            
-            if isinstance(data, list) and len(data) > 0:
-                result = data[0]
-                
-                if "success" in result and "username" in result["success"]:
-                    api_key = result["success"]["username"]
-                    print(f"✅ API-Key erfolgreich generiert!")
-                    print(f"🔑 API-Key: {api_key}")
-                    return api_key
-                    
-                elif "error" in result:
-                    error_msg = result["error"].get("description", "Unbekannter Fehler")
-                    print(f"❌ Fehler: {error_msg}")
-                    
-                    if "link button not pressed" in error_msg.lower():
-                        print("\n🔄 Warte 10 Sekunden und versuche es erneut...")
-                        import time
-                        time.sleep(10)
-                        
-                        # Zweiter Versuch
-                        response2 = requests.post(url, json=payload, headers=headers, timeout=10)
-                        if response2.status_code in [200, 403]:
-                            data2 = response2.json()
-                            if isinstance(data2, list) and len(data2) > 0:
-                                result2 = data2[0]
-                                if "success" in result2 and "username" in result2["success"]:
-                                    api_key = result2["success"]["username"]
-                                    print(f"✅ API-Key erfolgreich generiert (2. Versuch)!")
-                                    print(f"🔑 API-Key: {api_key}")
-                                    return api_key
-                                else:
-                                    print(f"❌ Auch der zweite Versuch fehlgeschlagen: {result2}")
-            else:
-                print("❌ Ungültige Antwort vom Server")
-        else:
-            print(f"❌ HTTP-Fehler: {response.status_code}")
-            print(f"Response: {response.text}")
-            
+        api_key = pair_gateway(host, port, on_status=print_progress)
+        if api_key:
+            print(f"✅ API-Key erfolgreich generiert!")
+            print(f"🔑 API-Key: {api_key}")
+            return api_key
     except Exception as e:
         print(f"❌ Fehler: {e}")
     
@@ -95,7 +53,8 @@ def main():
     api_key = get_api_key(host, port)
     
     if api_key:
-        print(f"\n📋 Kopiere diesen API-Key in dein Migration Tool:")
+        remember_api_key(host, port, api_key)
+        print(f"\n📋 Die Migration-Tools verwenden diesen API-Key ab jetzt automatisch:")
         print(f"   {api_key}")
     else:
         print("\n❌ API-Key-Generierung fehlgeschlagen")
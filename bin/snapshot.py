@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+deCONZ-Snapshot: Geräteliste und Netzwerkkonfiguration als JSON sichern
+Grundlage für die Verifikation nach der Migration
+"""
+
+import json
+import time
+
+SNAPSHOT_FILE = "deconz_snapshot.json"
+
+
+def device_from_resource(resource_id, resource, device_type):
+    """Wandle eine deCONZ-Ressource in den Geräteeintrag von get_devices um."""
+    return {
+        'id': resource_id,
+        'name': resource.get('name', f'{device_type}_{resource_id}'),
+        'type': device_type,
+        'model': resource.get('modelid', ''),
+        'manufacturer': resource.get('manufacturername', ''),
+        'unique_id': resource.get('uniqueid', ''),
+        'state': resource.get('state', {}),
+        'config': resource.get('config', {}),
+        'last_seen': resource.get('lastseen')
+    }
+
+
+def ieee_from_unique_id(unique_id):
+    """Extrahiere die IEEE-Adresse im Zigbee2MQTT-Format aus einer deCONZ-uniqueid.
+
+    deCONZ verwendet z.B. "00:15:8d:00:01:e1:a2:b3-01-0402",
+    Zigbee2MQTT dagegen "0x00158d0001e1a2b3".
+    """
+    if not unique_id:
+        return None
+    mac = unique_id.split('-', 1)[0].replace(':', '').lower()
+    if len(mac) != 16:
+        return None
+    try:
+        int(mac, 16)
+    except ValueError:
+        return None
+    return f"0x{mac}"
+
+
+def group_by_ieee(devices):
+    """Fasse deCONZ-Ressourcen (Sensoren/Lichter) zu physischen Geräten zusammen.
+
+    Ein Zigbee-Gerät erscheint in deCONZ oft als mehrere Ressourcen
+    (z.B. Temperatur, Luftfeuchte, Druck). Lichter haben Vorrang beim Namen,
+    danach die niedrigste Ressourcen-ID.
+    """
+    index = {}
+    for device in devices:
+        ieee = ieee_from_unique_id(device.get('unique_id'))
+        if not ieee:
+            continue
+        entry = index.get(ieee)
+        if entry is None:
+            index[ieee] = {
+                'ieee': ieee,
+                'name': device['name'],
+                'friendly_name': device.get('friendly_name'),
+                'model': device.get('model', ''),
+                'manufacturer': device.get('manufacturer', ''),
+                'type': device['type'],
+                'resources': [device['id']]
+            }
+            continue
+        entry['resources'].append(device['id'])
+        if device['type'] == 'light' and entry['type'] != 'light':
+            entry['name'] = device['name']
+            entry['friendly_name'] = device.get('friendly_name')
+            entry['type'] = 'light'
+        if not entry['model'] and device.get('model'):
+            entry['model'] = device['model']
+        if not entry['manufacturer'] and device.get('manufacturer'):
+            entry['manufacturer'] = device['manufacturer']
+    return index
+
+
+def save_snapshot(devices, network_config, filename=SNAPSHOT_FILE, exclude=None):
+    """Speichere Geräteliste und Netzwerkkonfiguration als Snapshot.
+
+    Der Snapshot enthält alle Geräte; `exclude` ist die Ausschluss-Regel der
+    Migration, damit die Verifikation bewusst ausgelassene Geräte
+    (device['health']) nicht als fehlend meldet.
+    """
+    snapshot = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'network_config': network_config,
+        'devices': devices
+    }
+    if exclude:
+        snapshot['exclude'] = exclude
+    try:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        print(f"✅ Snapshot gespeichert: {filename}")
+        return True
+    except Exception as e:
+        print(f"❌ Fehler beim Speichern des Snapshots: {e}")
+        return False
+
+
+def load_snapshot(filename=SNAPSHOT_FILE):
+    """Lade einen Snapshot. Eine reine Geräteliste wird ebenfalls akzeptiert."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return {'created': None, 'network_config': None, 'devices': data}
+    return data
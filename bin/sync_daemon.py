@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Sync-Daemon: hält die generierte configuration.yaml mit deCONZ synchron
+Reagiert auf WebSocket-Events (added/deleted) und fragt zusätzlich
+periodisch per ETag ab, ob sich Sensoren oder Lichter geändert haben
+Geräte werden wie bei der Migration bewertet; die Ausschluss-Regel
+(z.B. tote Geräte weglassen) steht in der Namenszuordnung neben der
+configuration.yaml
+Optional wird jede geschriebene Konfiguration zusätzlich per MQTT
+veröffentlicht (MqttSink)
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import requests
+import yaml
+
+from compatibility import annotate_devices
+from credentials import stored_api_key
+from deconz_client import get_client
+from device_health import LABELS, analyze_devices, exclusions
+from metrics import (CONFIG_REWRITES, EVENTS_PROCESSED, install_client_metrics,
+                     set_device_counts, start_metrics_server, write_textfile)
+from migration_engine import FriendlyNames, MqttSink, device_entry, name_map_file
+from snapshot import device_from_resource
+from websocket_lite import WebSocketClient
+
+RESOURCE_TYPES = {'sensors': 'sensor', 'lights': 'light'}
+
+
+class SyncDaemon:
+    """Überträgt neue und gelöschte deCONZ-Geräte in die configuration.yaml.
+
+    Der Geräteindex liegt im Speicher, Änderungen werden als Deltas
+    angewendet und erst nach `debounce` Sekunden Ruhe gesammelt geschrieben.
+    """
+
+    def __init__(self, host, port, api_key, config_file="configuration.yaml",
+                 poll_interval=300, debounce=5.0, websocket_port=None, metrics_textfile=None,
+                 exclude=None, mqtt_sink=None):
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        self.config_file = config_file
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.websocket_port = websocket_port
+        self.metrics_textfile = metrics_textfile
+        self.mqtt_sink = mqtt_sink
+        self.client = get_client(host, port, api_key)
+        self.etags = {}
+        self.names = FriendlyNames.load(name_map_file(config_file))
+        # Regel der Migration übernehmen, sofern nicht ausdrücklich angegeben
+        self.names.exclude = exclude or self.names.exclude or "dead"
+        self.excluded = exclusions(self.names.exclude)
+
+        self.lock = threading.Lock()
+        self.config = {}
+        self.entries = {}
+        self.dirty = False
+        self.timer = None
+        self.running = False
+
+        self.stats = {'events': 0, 'polls': 0, 'polls_unchanged': 0,
+                      'added': 0, 'deleted': 0, 'writes': 0, 'published': 0}
+
+    # ------------------------------------------------------------------
+    # Konfiguration
+    # ------------------------------------------------------------------
+
+    def load_config(self):
+        """Lade die bestehende configuration.yaml und indiziere die Geräte."""
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            self.config = yaml.safe_load(f) or {}
+        self.entries = {}
+        for entry in self.config.get('devices') or []:
+            self.entries[(entry.get('type'), str(entry.get('id')))] = entry
+            if entry.get('friendly_name'):
+                self.names.reserve(entry, entry['friendly_name'])
+        print(f"📁 {len(self.entries)} Geräte aus {self.config_file} geladen")
+
+    def write_config(self):
+        """Schreibe die Konfiguration atomar (temporäre Datei + rename)."""
+        with self.lock:
+            self.timer = None
+            if not self.dirty:
+                return
+            self.config['devices'] = list(self.entries.values())
+            self.dirty = False
+            tmp_file = f"{self.config_file}.tmp"
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    yaml.dump(self.config, f, sort_keys=False, default_flow_style=False,
+                              allow_unicode=True, indent=2)
+                os.replace(tmp_file, self.config_file)
+                self.names.save(name_map_file(self.config_file))
+            except OSError as e:
+                # Änderungen nicht verlieren: später erneut versuchen
+                print(f"❌ {self.config_file} konnte nicht geschrieben werden: {e}")
+                self.dirty = True
+                if self.running:
+                    self._schedule_write()
+                return
+            self.stats['writes'] += 1
+            CONFIG_REWRITES.inc()
+            set_device_counts(self.config['devices'])
+        print(f"💾 {self.config_file} aktualisiert ({len(self.entries)} Geräte)")
+        self.publish()
+        self.export_metrics()
+
+    def publish(self):
+        """Veröffentliche die aktuelle Konfiguration per MQTT, falls konfiguriert."""
+        if self.mqtt_sink is None:
+            return
+        with self.lock:
+            config = dict(self.config, devices=list(self.entries.values()))
+        try:
+            target = self.mqtt_sink.write(config)
+        except (OSError, RuntimeError, ValueError) as e:
+            # Verbindung neu aufbauen; die nächste Änderung veröffentlicht erneut
+            print(f"⚠️  MQTT-Veröffentlichung fehlgeschlagen: {e}")
+            self.mqtt_sink.close()
+            return
+        self.stats['published'] += 1
+        print(f"📤 {len(config['devices'])} Geräte nach {target} veröffentlicht")
+
+    def export_metrics(self):
+        """Aktualisiere die Textfile-Metriken, falls konfiguriert."""
+        if self.metrics_textfile:
+            try:
+                write_textfile(self.metrics_textfile)
+            except OSError as e:
+                print(f"⚠️  Metriken konnten nicht geschrieben werden: {e}")
+
+    def _schedule_write(self):
+        # Aufrufer hält self.lock
+        self.dirty = True
+        if self.timer:
+            self.timer.cancel()
+        self.timer = threading.Timer(self.debounce, self.write_config)
+        self.timer.daemon = True
+        self.timer.start()
+
+    # ------------------------------------------------------------------
+    # Deltas
+    # ------------------------------------------------------------------
+
+    def add_device(self, device):
+        key = (device['type'], str(device['id']))
+        if 'health' not in device:
+            analyze_devices([device])
+        if device['health'] in self.excluded:
+            self.exclude_device(key, device)
+            return
+        with self.lock:
+            # Neue Geräte erhalten einen freien Friendly Name, bestehende behalten ihren
+            self.names.add(device)
+            annotate_devices([device])
+            entry = device_entry(device)
+            if self.entries.get(key) == entry:
+                return
+            self.entries[key] = entry
+            self.stats['added'] += 1
+            self._schedule_write()
+        print(f"➕ {device['type']} {device['id']}: {device['name']}")
+
+    def exclude_device(self, key, device):
+        """Entferne ein Gerät, das nach der Ausschluss-Regel nicht migriert wird."""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return
+            self.names.release(device)
+            self.stats['deleted'] += 1
+            self._schedule_write()
+        print(f"🚫 {device['type']} {device['id']}: {device['name']} ({LABELS[device['health']]})")
+
+    def delete_device(self, device_type, resource_id):
+        key = (device_type, str(resource_id))
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return
+            self.names.release({'type': device_type, 'id': resource_id})
+            self.stats['deleted'] += 1
+            self._schedule_write()
+        print(f"➖ {device_type} {resource_id}: {entry.get('name')}")
+
+    def handle_event(self, event):
+        """Verarbeite ein deCONZ-WebSocket-Event."""
+        self.stats['events'] += 1
+        EVENTS_PROCESSED.inc(event=event.get('e'), resource=event.get('r'))
+        device_type = RESOURCE_TYPES.get(event.get('r'))
+        if device_type is None:
+            return
+        if event.get('e') == 'added':
+            resource = event.get('sensor') if device_type == 'sensor' else event.get('light')
+            if resource:
+                self.add_device(device_from_resource(str(event['id']), resource, device_type))
+        elif event.get('e') == 'deleted':
+            self.delete_device(device_type, event['id'])
+
+    # ------------------------------------------------------------------
+    # ETag-Polling
+    # ------------------------------------------------------------------
+
+    def poll(self):
+        """Frage Sensoren und Lichter bedingt ab und gleiche Unterschiede ab."""
+        self.stats['polls'] += 1
+        for resource, device_type in RESOURCE_TYPES.items():
+            headers = {}
+            if resource in self.etags:
+                headers['If-None-Match'] = self.etags[resource]
+            try:
+                response = self.client.get(f"/{resource}", headers=headers)
+            except requests.RequestException as e:
+                print(f"❌ Abfrage von /{resource} fehlgeschlagen: {e}")
+                continue
+
+            if response.status_code == 304:
+                self.stats['polls_unchanged'] += 1
+                continue
+            if response.status_code != 200:
+                print(f"❌ /{resource}: HTTP {response.status_code}")
+                continue
+            if response.headers.get('ETag'):
+                self.etags[resource] = response.headers['ETag']
+
+            try:
+                current = response.json()
+                if not isinstance(current, dict):
+                    raise ValueError(f"Objekt erwartet, {type(current).__name__} erhalten")
+            except ValueError as e:
+                print(f"❌ /{resource}: ungültige Antwort ({e})")
+                self.etags.pop(resource, None)
+                continue
+            with self.lock:
+                known = [key[1] for key in self.entries if key[0] == device_type]
+            for resource_id in known:
+                if resource_id not in current:
+                    self.delete_device(device_type, resource_id)
+            devices = [device_from_resource(resource_id, data, device_type)
+                       for resource_id, data in current.items()]
+            analyze_devices(devices)
+            for device in devices:
+                self.add_device(device)
+        with self.lock:
+            set_device_counts(list(self.entries.values()))
+        self.export_metrics()
+
+    # ------------------------------------------------------------------
+    # Hauptschleife
+    # ------------------------------------------------------------------
+
+    def _websocket_port(self):
+        if self.websocket_port:
+            return self.websocket_port
+        response = self.client.get("/config")
+        response.raise_for_status()
+        self.websocket_port = response.json().get('websocketport', 443)
+        return self.websocket_port
+
+    def run(self):
+        """Starte den Daemon. Läuft bis KeyboardInterrupt oder stop()."""
+        self.running = True
+        self.poll()
+        with self.lock:
+            pending = self.dirty
+        if not pending:
+            # Ohne Änderungen schreibt write_config nicht; Ausgangsstand trotzdem melden
+            self.publish()
+        next_poll = time.monotonic() + self.poll_interval
+        websocket = None
+        retry_delay = 1
+
+        try:
+            while self.running:
+                if websocket is None:
+                    try:
+                        websocket = WebSocketClient(self.host, self._websocket_port()).connect()
+                        print(f"🔌 WebSocket verbunden (Port {self.websocket_port})")
+                        retry_delay = 1
+                    except (OSError, requests.RequestException) as e:
+                        print(f"⚠️  WebSocket nicht erreichbar: {e} "
+                              f"(neuer Versuch in {retry_delay}s)")
+                        websocket = None
+
+                wait = max(0.0, next_poll - time.monotonic())
+                if websocket is None:
+                    wait = min(wait, retry_delay)
+                    time.sleep(wait)
+                    retry_delay = min(retry_delay * 2, self.poll_interval)
+                else:
+                    try:
+                        message = websocket.recv(timeout=wait or 0.001)
+                    except OSError as e:
+                        print(f"⚠️  WebSocket getrennt: {e}")
+                        websocket = None
+                        continue
+                    if message:
+                        try:
+                            self.handle_event(json.loads(message))
+                        except ValueError:
+                            pass
+
+                if time.monotonic() >= next_poll:
+                    self.poll()
+                    next_poll = time.monotonic() + self.poll_interval
+        finally:
+            if websocket:
+                websocket.close()
+            self.stop()
+
+    def stop(self):
+        """Beende den Daemon und schreibe ausstehende Änderungen sofort."""
+        self.running = False
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+        self.write_config()
+        if self.mqtt_sink is not None:
+            self.mqtt_sink.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Halte configuration.yaml während der Migration mit deCONZ synchron"
+    )
+    parser.add_argument("--host", default="192.168.178.76", help="deCONZ-Host")
+    parser.add_argument("--port", type=int, default=4530, help="deCONZ-Port")
+    parser.add_argument("--api-key", help="deCONZ API-Key (Standard: gespeicherter Key)")
+    parser.add_argument("--config", default="configuration.yaml", help="Zu pflegende configuration.yaml")
+    parser.add_argument("--poll-interval", type=float, default=300,
+                        help="Sekunden zwischen ETag-Abfragen (Standard: 300)")
+    parser.add_argument("--debounce", type=float, default=5.0,
+                        help="Sekunden Ruhe vor dem Schreiben (Standard: 5)")
+    parser.add_argument("--websocket-port", type=int, help="WebSocket-Port (Standard: aus /config)")
+    parser.add_argument("--metrics-port", type=int, help="Prometheus-Metriken unter :PORT/metrics anbieten")
+    parser.add_argument("--metrics-textfile", help="Metriken für den Textfile-Collector in Datei schreiben")
+    parser.add_argument("--mqtt-server", help="Konfiguration zusätzlich per MQTT veröffentlichen "
+                                              "(z.B. mqtt://localhost, benötigt paho-mqtt)")
+    parser.add_argument("--mqtt-topic", default="zigbee2mqtt", help="MQTT Base Topic (Standard: zigbee2mqtt)")
+    parser.add_argument("--exclude", choices=["none", "dead", "stale"],
+                        help="Geräte nicht übernehmen: none, dead oder stale "
+                             "(Standard: Regel der Migration, sonst dead)")
+    args = parser.parse_args(argv)
+
+    api_key = args.api_key or stored_api_key(args.host, args.port)
+    if not api_key:
+        print(f"❌ Kein gültiger API-Key für {args.host}:{args.port} angegeben oder gespeichert")
+        print("💡 --api-key angeben oder zuerst koppeln (bin/headless_migrate.py --pair)")
+        sys.exit(2)
+
+    if args.metrics_textfile:
+        install_client_metrics()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+        print(f"📈 Metriken unter http://0.0.0.0:{args.metrics_port}/metrics")
+
+    mqtt_sink = None
+    if args.mqtt_server:
+        try:
+            mqtt_sink = MqttSink(args.mqtt_server, args.mqtt_topic)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+
+    daemon = SyncDaemon(args.host, args.port, api_key, args.config,
+                        poll_interval=args.poll_interval, debounce=args.debounce,
+                        websocket_port=args.websocket_port,
+                        metrics_textfile=args.metrics_textfile, exclude=args.exclude,
+                        mqtt_sink=mqtt_sink)
+    try:
+        daemon.load_config()
+    except (OSError, yaml.YAMLError) as e:
+        print(f"❌ Konfiguration konnte nicht geladen werden: {e}")
+        sys.exit(2)
+
+    print(f"🚀 Sync-Daemon gestartet für {args.host}:{args.port}")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("\n👋 Sync-Daemon beendet")
+
+
+if __name__ == "__main__":
+    main()
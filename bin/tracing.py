@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Leichtgewichtiges Tracing für deCONZ-Anfragen, Konfigurationsaufbau und Schreiben
+Spans werden als Chrome-Trace-Events zeilenweise in eine lokale Datei
+geschrieben (lesbar mit chrome://tracing, Perfetto oder speedscope)
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+
+# Aktiver Exporter; None = Tracing aus. Alle Einstiegspunkte prüfen nur
+# diese Variable, damit abgeschaltetes Tracing praktisch nichts kostet.
+_exporter = None
+
+_current_span = contextvars.ContextVar('deconz_current_span', default=None)
+_span_ids = itertools.count(1)
+_step = None
+
+
+class JsonLinesExporter:
+    """Schreibt Spans als Chrome-Trace-Events, ein Event pro Zeile.
+
+    Die Datei beginnt mit "[" und jede Zeile endet mit ",". Das Chrome-
+    Trace-Format erlaubt ausdrücklich ein fehlendes "]", die Datei bleibt
+    so auch nach einem Abbruch ladbar und kann fortgeschrieben werden.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+        new_file = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        self.file = open(filename, 'a', encoding='utf-8')
+        if new_file:
+            self.file.write("[\n")
+        self.pid = os.getpid()
+
+    def export(self, span):
+        event = {
+            'name': span.name,
+            'cat': span.category,
+            'ph': 'X',
+            'ts': round(span.start_us, 1),
+            'dur': round(span.duration_us, 1),
+            'pid': self.pid,
+            'tid': span.thread_id,
+            'args': dict(span.attributes, span_id=span.span_id, parent_id=span.parent_id)
+        }
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+        with self.lock:
+            self.file.write(line + ",\n")
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class Span:
+    """Ein Zeitabschnitt mit Attributen, verschachtelt über contextvars."""
+
+    __slots__ = ('name', 'category', 'attributes', 'span_id', 'parent_id',
+                 'thread_id', 'start_us', 'duration_us', '_start', '_token')
+
+    def __init__(self, name, category, attributes):
+        parent = _current_span.get()
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.thread_id = threading.get_ident()
+        self.start_us = 0.0
+        self.duration_us = 0.0
+        self._start = 0.0
+        self._token = None
+
+    def set(self, **attributes):
+        """Ergänze Attribute (z.B. Status, Bytes)."""
+        self.attributes.update(attributes)
+
+    def begin(self):
+        self._start = time.perf_counter()
+        self.start_us = time.time() * 1e6
+        self._token = _current_span.set(self)
+        return self
+
+    def end(self):
+        self.duration_us = (time.perf_counter() - self._start) * 1e6
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # In einem anderen Kontext beendet (z.B. Schritt-Spans)
+                _current_span.set(None)
+            self._token = None
+        exporter = _exporter
+        if exporter:
+            exporter.export(self)
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.end()
+        return False
+
+
+class _NoopSpan:
+    """Ersatz-Span bei abgeschaltetem Tracing."""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def is_enabled():
+    return _exporter is not None
+
+
+def span(name, category="app", **attributes):
+    """Kontextmanager für einen Span. Ohne aktives Tracing ein No-op."""
+    if _exporter is None:
+        return NOOP_SPAN
+    return Span(name, category, attributes)
+
+
+def traced(name, category="app"):
+    """Decorator: Funktionsaufruf als Span erfassen."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with Span(name, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def mark_step(name):
+    """Beende den laufenden Wizard-Schritt und beginne einen neuen.
+
+    Alle Spans bis zum nächsten Aufruf werden unter diesem Schritt eingehängt.
+    """
+    global _step
+    end_step()
+    if _exporter is not None:
+        _step = Span(name, "step", {}).begin()
+
+
+def end_step():
+    """Beende den laufenden Wizard-Schritt."""
+    global _step
+    if _step is not None:
+        step, _step = _step, None
+        step.end()
+
+
+def enable_tracing(filename):
+    """Schalte Tracing ein und schreibe Spans nach `filename`."""
+    global _exporter
+    disable_tracing()
+    _exporter = JsonLinesExporter(filename)
+    return _exporter
+
+
+def disable_tracing():
+    """Schalte Tracing aus und schließe die Ausgabedatei."""
+    global _exporter
+    end_step()
+    exporter, _exporter = _exporter, None
+    if exporter:
+        exporter.close()
+
+
+def add_trace_arguments(parser):
+    """Füge --trace zu einem argparse-Parser hinzu."""
+    parser.add_argument("--trace", metavar="DATEI",
+                        help="Spans (deCONZ-Anfragen, Konfiguration, Speichern) in DATEI schreiben")
+
+
+def configure_tracing(args):
+    """Aktiviere Tracing, falls --trace gesetzt ist."""
+    if getattr(args, 'trace', None):
+        enable_tracing(args.trace)
+        print(f"🧵 Tracing aktiv: {args.trace}")
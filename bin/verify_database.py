@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Verifikation der Migration gegen die Zigbee2MQTT database.db
+Vergleicht den deCONZ-Snapshot mit den Geräten, die Zigbee2MQTT kennt
+"""
+
+import argparse
+import json
+import re
+import sys
+
+import yaml
+
+from device_health import migrated_devices
+from snapshot import SNAPSHOT_FILE, group_by_ieee, load_snapshot
+
+# Vorfilter: die IEEE-Adresse wird per Regex gelesen, bevor eine Zeile
+# vollständig geparst wird. Fremde Geräte kosten so kein json.loads.
+IEEE_PATTERN = re.compile(r'"ieeeAddr"\s*:\s*"(0x[0-9a-fA-F]{16})"')
+
+
+def iter_database(path, wanted=None, stats=None):
+    """Lese database.db zeilenweise (newline-delimited JSON).
+
+    Ist `wanted` gesetzt, werden nur Einträge mit passender IEEE-Adresse
+    vollständig geparst. `stats` sammelt Zeilen-, Fremd- und Fehlerzähler.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('lines', 0)
+    stats.setdefault('foreign', 0)
+    stats.setdefault('corrupt', 0)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            stats['lines'] += 1
+
+            if wanted is not None:
+                match = IEEE_PATTERN.search(line)
+                if match and match.group(1).lower() not in wanted:
+                    stats['foreign'] += 1
+                    continue
+
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                stats['corrupt'] += 1
+                continue
+
+            if entry.get('type') == 'Coordinator':
+                continue
+            ieee = (entry.get('ieeeAddr') or '').lower()
+            if wanted is not None and ieee not in wanted:
+                stats['foreign'] += 1
+                continue
+            yield ieee, entry
+
+
+def load_friendly_names(config_path):
+    """Lese friendly_names aus einer Zigbee2MQTT configuration.yaml.
+
+    Zigbee2MQTT speichert Geräte als Mapping IEEE -> {friendly_name: ...}.
+    Andere Formate (z.B. die Geräteliste dieses Tools) werden ignoriert.
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    devices = config.get('devices')
+    if not isinstance(devices, dict):
+        return {}
+    names = {}
+    for ieee, options in devices.items():
+        if isinstance(options, dict) and options.get('friendly_name'):
+            names[str(ieee).lower()] = options['friendly_name']
+    return names
+
+
+def verify_against_database(devices, db_path, friendly_names=None):
+    """Vergleiche deCONZ-Geräte mit der Zigbee2MQTT database.db.
+
+    Der Speicherbedarf hängt nur von der Größe des Snapshots ab,
+    nicht von der Größe der Datenbank.
+    """
+    expected = group_by_ieee(devices)
+    friendly_names = friendly_names or {}
+    stats = {}
+
+    found = {}
+    for ieee, entry in iter_database(db_path, wanted=expected, stats=stats):
+        found[ieee] = (
+            (entry.get('modelId') or '').strip(),
+            bool(entry.get('interviewCompleted')),
+        )
+
+    report = {
+        'expected': len(expected),
+        'found': len(found),
+        'missing': [],
+        'not_interviewed': [],
+        'renamed': [],
+        'model_changed': [],
+        'database_entries': stats['lines'],
+        'foreign': stats['foreign'],
+        'corrupt_lines': stats['corrupt']
+    }
+
+    for ieee, device in expected.items():
+        if ieee not in found:
+            report['missing'].append({'ieee': ieee, 'name': device['name']})
+            continue
+
+        model_id, interviewed = found[ieee]
+        if not interviewed:
+            report['not_interviewed'].append({'ieee': ieee, 'name': device['name']})
+        if device['model'] and model_id and model_id != device['model'].strip():
+            report['model_changed'].append({
+                'ieee': ieee,
+                'name': device['name'],
+                'deconz': device['model'],
+                'zigbee2mqtt': model_id
+            })
+        # Erwartet wird der vergebene Friendly Name, bei älteren Snapshots der deCONZ-Name
+        expected_name = device.get('friendly_name') or device['name']
+        friendly_name = friendly_names.get(ieee)
+        if friendly_name and friendly_name != expected_name:
+            report['renamed'].append({
+                'ieee': ieee,
+                'deconz': expected_name,
+                'zigbee2mqtt': friendly_name
+            })
+
+    return report
+
+
+def show_verification(report):
+    """Zeige das Ergebnis der Verifikation."""
+    print("\n" + "=" * 60)
+    print("🔎 VERIFIKATION GEGEN ZIGBEE2MQTT")
+    print("=" * 60)
+    print(f"🔢 Erwartete Geräte: {report['expected']}")
+    print(f"   ✅ In database.db gefunden: {report['found']}")
+    print(f"   ❌ Fehlend: {len(report['missing'])}")
+    print(f"   ⏳ Interview offen: {len(report['not_interviewed'])}")
+    if report.get('excluded'):
+        print(f"   🚫 Bewusst nicht migriert: {report['excluded']}")
+    print(f"   ✏️  Umbenannt: {len(report['renamed'])}")
+    print(f"   🔀 Modell geändert: {len(report['model_changed'])}")
+    print(f"\n📁 database.db: {report['database_entries']} Einträge, "
+          f"{report['foreign']} nicht aus deCONZ, {report['corrupt_lines']} fehlerhaft")
+
+    if report['missing']:
+        print("\n❌ Fehlende Geräte:")
+        for device in report['missing']:
+            print(f"   - {device['name']} ({device['ieee']})")
+    if report['not_interviewed']:
+        print("\n⏳ Interview noch nicht abgeschlossen:")
+        for device in report['not_interviewed']:
+            print(f"   - {device['name']} ({device['ieee']})")
+    if report['renamed']:
+        print("\n✏️  Umbenannte Geräte:")
+        for device in report['renamed']:
+            print(f"   - {device['deconz']} -> {device['zigbee2mqtt']} ({device['ieee']})")
+    if report['model_changed']:
+        print("\n🔀 Abweichende Modelle:")
+        for device in report['model_changed']:
+            print(f"   - {device['name']}: {device['deconz']} -> {device['zigbee2mqtt']}")
+    print("=" * 60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Prüfe die Migration gegen die Zigbee2MQTT database.db"
+    )
+    parser.add_argument("database", help="Pfad zur Zigbee2MQTT database.db")
+    parser.add_argument("--snapshot", default=SNAPSHOT_FILE,
+                        help=f"deCONZ-Snapshot (Standard: {SNAPSHOT_FILE})")
+    parser.add_argument("--config", help="Zigbee2MQTT configuration.yaml für friendly_names")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    try:
+        snapshot = load_snapshot(args.snapshot)
+        friendly_names = load_friendly_names(args.config) if args.config else {}
+        devices, excluded = migrated_devices(snapshot)
+        report = verify_against_database(devices, args.database, friendly_names)
+        report['excluded'] = excluded
+    except (OSError, ValueError) as e:
+        print(f"❌ Fehler: {e}")
+        sys.exit(2)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        show_verification(report)
+
+    sys.exit(1 if report['missing'] else 0)
+
+
+if __name__ == "__main__":
+    main()
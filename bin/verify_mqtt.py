@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Live-Verifikation der Migration über MQTT
+Beobachtet <base_topic>/bridge/devices und die Availability-Topics
+eines laufenden Zigbee2MQTT und führt ein Live-Dashboard
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from device_health import migrated_devices
+from snapshot import SNAPSHOT_FILE, group_by_ieee, load_snapshot
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:
+    mqtt = None
+
+STATUSES = ('joined', 'interviewing', 'offline', 'missing')
+
+
+def topic_matches(subscription, topic):
+    """Prüfe, ob ein Topic zu einem MQTT-Filter mit + und # passt."""
+    sub_parts = subscription.split('/')
+    topic_parts = topic.split('/')
+    for i, part in enumerate(sub_parts):
+        if part == '#':
+            return True
+        if i >= len(topic_parts):
+            return False
+        if part != '+' and part != topic_parts[i]:
+            return False
+    return len(sub_parts) == len(topic_parts)
+
+
+class LiveVerifier:
+    """Gleicht Zigbee2MQTT-Nachrichten inkrementell mit den migrierten Geräten ab.
+
+    Der Index der erwarteten Geräte wird einmal vorberechnet. Jede Nachricht
+    ändert nur die Einträge, deren Zustand sich tatsächlich geändert hat,
+    die Zähler des Dashboards werden bei jedem Übergang angepasst.
+    """
+
+    def __init__(self, devices, base_topic="zigbee2mqtt", on_change=None):
+        self.base_topic = base_topic.rstrip('/')
+        self.devices_topic = f"{self.base_topic}/bridge/devices"
+        self.expected = group_by_ieee(devices)
+        self.on_change = on_change
+
+        self.status = {ieee: 'missing' for ieee in self.expected}
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.counts['missing'] = len(self.expected)
+        self.unexpected = 0
+        self.messages = 0
+
+        # Letzter bekannter Stand je Gerät aus bridge/devices
+        self._entries = {}
+        self._available = {}
+        self._by_friendly_name = {}
+        # Availability je Friendly Name; kann vor bridge/devices eintreffen (retained)
+        self._availability = {}
+
+    def subscriptions(self):
+        """Topics, die abonniert werden müssen.
+
+        Friendly Names dürfen "/" enthalten ("etage/kueche/lampe"), daher
+        reicht "+/availability" nicht; gefiltert wird in handle_message().
+        """
+        return [f"{self.base_topic}/#"]
+
+    def handle_message(self, topic, payload):
+        """Verarbeite eine MQTT-Nachricht (payload als bytes oder str)."""
+        self.messages += 1
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8', errors='replace')
+
+        if topic == self.devices_topic:
+            try:
+                self._apply_devices(json.loads(payload))
+            except ValueError:
+                pass
+        elif topic.endswith('/availability') and topic.startswith(self.base_topic + '/'):
+            friendly_name = topic[len(self.base_topic) + 1:-len('/availability')]
+            # bridge/availability meldet Zigbee2MQTT selbst
+            if friendly_name and friendly_name != 'bridge':
+                self._apply_availability(friendly_name, payload)
+
+    def _apply_devices(self, entries):
+        seen = set()
+        unexpected = 0
+        for entry in entries:
+            ieee = (entry.get('ieee_address') or '').lower()
+            if entry.get('type') == 'Coordinator' or not ieee:
+                continue
+            if ieee not in self.expected:
+                unexpected += 1
+                continue
+            seen.add(ieee)
+
+            current = (
+                entry.get('friendly_name'),
+                bool(entry.get('interview_completed')),
+                bool(entry.get('interviewing'))
+            )
+            previous = self._entries.get(ieee)
+            if previous == current:
+                continue
+            if previous and previous[0] != current[0]:
+                self._forget_name(previous[0], ieee)
+            self._by_friendly_name[current[0]] = ieee
+            self._entries[ieee] = current
+            self._available[ieee] = self._availability.get(current[0])
+            self._update(ieee)
+
+        self.unexpected = unexpected
+        for ieee in [ieee for ieee in self._entries if ieee not in seen]:
+            self._forget_name(self._entries.pop(ieee)[0], ieee)
+            self._update(ieee)
+
+    def _forget_name(self, friendly_name, ieee):
+        if self._by_friendly_name.get(friendly_name) == ieee:
+            del self._by_friendly_name[friendly_name]
+
+    def _apply_availability(self, friendly_name, payload):
+        state = payload.strip()
+        if state.startswith('{'):
+            try:
+                state = json.loads(state).get('state', '')
+            except (ValueError, AttributeError):
+                return
+        available = state == 'online'
+        self._availability[friendly_name] = available
+        ieee = self._by_friendly_name.get(friendly_name)
+        if ieee is None:
+            return
+        if self._available.get(ieee) != available:
+            self._available[ieee] = available
+            self._update(ieee)
+
+    def _update(self, ieee):
+        entry = self._entries.get(ieee)
+        if entry is None:
+            new_status = 'missing'
+        elif not entry[1]:
+            new_status = 'interviewing'
+        elif self._available.get(ieee) is False:
+            new_status = 'offline'
+        else:
+            new_status = 'joined'
+
+        old_status = self.status[ieee]
+        if old_status == new_status:
+            return
+        self.status[ieee] = new_status
+        self.counts[old_status] -= 1
+        self.counts[new_status] += 1
+        if self.on_change:
+            self.on_change(ieee, old_status, new_status)
+
+    def dashboard_line(self):
+        """Einzeilige Statusanzeige."""
+        return (f"✅ verbunden: {self.counts['joined']}  "
+                f"⏳ Interview: {self.counts['interviewing']}  "
+                f"🔌 offline: {self.counts['offline']}  "
+                f"❌ fehlend: {self.counts['missing']}  "
+                f"➕ fremd: {self.unexpected}")
+
+    def report(self):
+        """Ergebnis als Dictionary (für --json und Auswertungen)."""
+        report = {'expected': len(self.expected), 'unexpected': self.unexpected,
+                  'messages': self.messages, 'counts': dict(self.counts)}
+        for status in STATUSES:
+            report[status] = [
+                {'ieee': ieee, 'name': self.expected[ieee]['name']}
+                for ieee, current in self.status.items() if current == status
+            ]
+        return report
+
+
+class Message:
+    """Minimaler Ersatz für paho.mqtt.client.MQTTMessage."""
+
+    def __init__(self, topic, payload, retain=False):
+        self.topic = topic
+        self.payload = payload
+        self.retain = retain
+
+
+class ReplayBroker:
+    """Lokaler Broker-Ersatz, der aufgezeichnete Nachrichten abspielt.
+
+    Bietet die Teile der paho-Client-Schnittstelle, die der Verifier nutzt
+    (subscribe, on_message, loop_forever). Aufzeichnungen sind JSON-Zeilen
+    mit topic, payload und optional retain und t (Sekunden seit Start).
+    """
+
+    def __init__(self, filename, speed=0):
+        self.filename = filename
+        self.speed = speed
+        self.on_message = None
+        self.userdata = None
+        self._subscriptions = []
+
+    def subscribe(self, topic, qos=0):
+        self._subscriptions.append(topic)
+
+    def loop_forever(self):
+        start = time.monotonic()
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if self.speed and 't' in record:
+                    delay = record['t'] / self.speed - (time.monotonic() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                topic = record['topic']
+                if not any(topic_matches(sub, topic) for sub in self._subscriptions):
+                    continue
+                if self.on_message:
+                    payload = record['payload']
+                    if not isinstance(payload, str):
+                        payload = json.dumps(payload)
+                    self.on_message(self, self.userdata,
+                                    Message(topic, payload.encode('utf-8'), record.get('retain', False)))
+
+
+def run_live(verifier, host, port, duration, record_file=None):
+    """Verbinde mit dem MQTT-Broker und verifiziere für `duration` Sekunden."""
+    if mqtt is None:
+        print("❌ paho-mqtt ist nicht installiert (pip install paho-mqtt)")
+        return False
+
+    if hasattr(mqtt, 'CallbackAPIVersion'):
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    else:
+        client = mqtt.Client()
+
+    record = open(record_file, 'a', encoding='utf-8') if record_file else None
+    start = time.monotonic()
+
+    def on_connect(client, userdata, *args):
+        for topic in verifier.subscriptions():
+            client.subscribe(topic)
+
+    def on_message(client, userdata, msg):
+        if record:
+            record.write(json.dumps({
+                't': round(time.monotonic() - start, 3),
+                'topic': msg.topic,
+                'payload': msg.payload.decode('utf-8', errors='replace'),
+                'retain': bool(msg.retain)
+            }, ensure_ascii=False) + "\n")
+        verifier.handle_message(msg.topic, msg.payload)
+
+    client.on_connect = on_connect
+    client.on_message = on_message
+
+    try:
+        client.connect(host, port)
+        client.loop_start()
+        time.sleep(duration)
+        client.loop_stop()
+        client.disconnect()
+        return True
+    except Exception as e:
+        print(f"❌ MQTT-Fehler: {e}")
+        return False
+    finally:
+        if record:
+            record.close()
+
+
+def run_replay(verifier, filename, speed=0):
+    """Spiele eine Aufzeichnung über den ReplayBroker ab."""
+    broker = ReplayBroker(filename, speed=speed)
+    broker.on_message = lambda client, userdata, msg: verifier.handle_message(msg.topic, msg.payload)
+    for topic in verifier.subscriptions():
+        broker.subscribe(topic)
+    broker.loop_forever()
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Prüfe die Migration live über MQTT (bridge/devices + availability)"
+    )
+    parser.add_argument("--snapshot", default=SNAPSHOT_FILE,
+                        help=f"deCONZ-Snapshot (Standard: {SNAPSHOT_FILE})")
+    parser.add_argument("--host", default="localhost", help="MQTT-Broker")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT-Port")
+    parser.add_argument("--base-topic", default="zigbee2mqtt", help="Zigbee2MQTT Base Topic")
+    parser.add_argument("--duration", type=float, default=30, help="Beobachtungsdauer in Sekunden")
+    parser.add_argument("--record", help="Empfangene Nachrichten in Datei aufzeichnen")
+    parser.add_argument("--replay", help="Aufzeichnung statt Broker abspielen")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="Abspielgeschwindigkeit für --replay (0 = so schnell wie möglich)")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    try:
+        snapshot = load_snapshot(args.snapshot)
+    except (OSError, ValueError) as e:
+        print(f"❌ Snapshot konnte nicht geladen werden: {e}")
+        sys.exit(2)
+
+    last_render = [0.0]
+
+    def on_change(ieee, old_status, new_status):
+        # Anzeige höchstens alle 0,2 s aktualisieren
+        now = time.monotonic()
+        if not args.json and now - last_render[0] >= 0.2:
+            last_render[0] = now
+            print(f"\r{verifier.dashboard_line()}", end="", flush=True)
+
+    devices, excluded = migrated_devices(snapshot)
+    verifier = LiveVerifier(devices, args.base_topic, on_change=on_change)
+
+    if args.replay:
+        ok = run_replay(verifier, args.replay, args.speed)
+    else:
+        ok = run_live(verifier, args.host, args.port, args.duration, args.record)
+    if not ok:
+        sys.exit(2)
+
+    report = verifier.report()
+    report['excluded'] = excluded
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"\r{verifier.dashboard_line()}")
+        if excluded:
+            print(f"🚫 Bewusst nicht migriert: {excluded}")
+        for status, label in (('missing', '❌ Fehlend'), ('interviewing', '⏳ Interview offen'),
+                              ('offline', '🔌 Offline')):
+            if report[status]:
+                print(f"\n{label}:")
+                for device in report[status]:
+                    print(f"   - {device['name']} ({device['ieee']})")
+
+    sys.exit(1 if report['missing'] else 0)
+
+
+if __name__ == "__main__":
+    main()
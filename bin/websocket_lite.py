@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Minimaler WebSocket-Client und -Server (RFC 6455) ohne externe Abhängigkeiten
+Reicht für den deCONZ-Event-Stream (Textnachrichten, Ping/Pong, Close)
+"""
+
+import base64
+import hashlib
+import os
+import socket
+import socketserver
+import struct
+import threading
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+def accept_key(key):
+    """Berechne Sec-WebSocket-Accept für einen Sec-WebSocket-Key."""
+    digest = hashlib.sha1((key + GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def encode_frame(opcode, payload, mask):
+    """Baue einen einzelnen (finalen) WebSocket-Frame."""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header += struct.pack('!H', length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('!Q', length)
+    if not mask:
+        return bytes(header) + payload
+    key = os.urandom(4)
+    masked = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return bytes(header) + key + masked
+
+
+class WebSocketClosed(ConnectionError):
+    """Die Gegenseite hat die WebSocket-Verbindung geschlossen."""
+
+
+class FrameReader:
+    """Liest WebSocket-Frames aus einem Socket.
+
+    Ein Frame wird erst aus dem Puffer entnommen, wenn er vollständig
+    empfangen wurde. Ein Timeout mitten im Frame verliert daher keine Daten.
+    """
+
+    def __init__(self, sock, buffer=b""):
+        self.sock = sock
+        self.buffer = buffer
+
+    def _parse(self):
+        buffer = self.buffer
+        if len(buffer) < 2:
+            return None
+        first, second = buffer[0], buffer[1]
+        length = second & 0x7F
+        offset = 2
+        if length == 126:
+            if len(buffer) < 4:
+                return None
+            length = struct.unpack('!H', buffer[2:4])[0]
+            offset = 4
+        elif length == 127:
+            if len(buffer) < 10:
+                return None
+            length = struct.unpack('!Q', buffer[2:10])[0]
+            offset = 10
+        key = None
+        if second & 0x80:
+            key = buffer[offset:offset + 4]
+            offset += 4
+        if len(buffer) < offset + length:
+            return None
+        payload = buffer[offset:offset + length]
+        self.buffer = buffer[offset + length:]
+        if key:
+            payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        return bool(first & 0x80), first & 0x0F, payload
+
+    def read_frame(self):
+        """Lies einen Frame. Gibt (fin, opcode, payload) zurück."""
+        while True:
+            frame = self._parse()
+            if frame is not None:
+                return frame
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise WebSocketClosed("Verbindung geschlossen")
+            self.buffer += chunk
+
+
+class WebSocketClient:
+    """Blockierender WebSocket-Client.
+
+    recv() wartet ohne Polling auf dem Socket, eine inaktive Verbindung
+    verursacht daher keine CPU-Last.
+    """
+
+    def __init__(self, host, port, path="/", timeout=10):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+        self._fragments = []
+
+    def connect(self):
+        """Baue die Verbindung auf und führe den Handshake durch."""
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        request = (
+            f"GET {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        sock.sendall(request.encode('ascii'))
+
+        response = b""
+        while b"\r\n\r\n" not in response:
+            chunk = sock.recv(4096)
+            if not chunk:
+                sock.close()
+                raise WebSocketClosed("Handshake abgebrochen")
+            response += chunk
+        head, rest = response.split(b"\r\n\r\n", 1)
+        lines = head.decode('latin-1').split("\r\n")
+        if " 101 " not in f"{lines[0]} ":
+            sock.close()
+            raise ConnectionError(f"Handshake fehlgeschlagen: {lines[0]}")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('sec-websocket-accept') != accept_key(key):
+            sock.close()
+            raise ConnectionError("Ungültiger Sec-WebSocket-Accept")
+
+        self.sock = sock
+        self.reader = FrameReader(sock, rest)
+        return self
+
+    def send(self, text):
+        """Sende eine Textnachricht."""
+        self.sock.sendall(encode_frame(OP_TEXT, text.encode('utf-8'), mask=True))
+
+    def recv(self, timeout=None):
+        """Empfange die nächste Textnachricht.
+
+        Gibt None zurück, wenn innerhalb von `timeout` Sekunden nichts kam.
+        """
+        self.sock.settimeout(timeout)
+        fragments = self._fragments
+        try:
+            while True:
+                fin, opcode, payload = self.reader.read_frame()
+                if opcode == OP_PING:
+                    self.sock.sendall(encode_frame(OP_PONG, payload, mask=True))
+                    continue
+                if opcode == OP_PONG:
+                    continue
+                if opcode == OP_CLOSE:
+                    self.close()
+                    raise WebSocketClosed("Verbindung von der Gegenseite geschlossen")
+                fragments.append(payload)
+                if fin:
+                    self._fragments = []
+                    return b"".join(fragments).decode('utf-8', errors='replace')
+        except socket.timeout:
+            return None
+
+    def close(self):
+        """Schließe die Verbindung."""
+        if self.sock is None:
+            return
+        try:
+            self.sock.sendall(encode_frame(OP_CLOSE, b"", mask=True))
+        except OSError:
+            pass
+        self.sock.close()
+        self.sock = None
+
+
+class _ServerHandler(socketserver.BaseRequestHandler):
+    """Handshake und Lesen von Client-Frames für WebSocketServer."""
+
+    def handle(self):
+        sock = self.request
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            data += chunk
+        head, rest = data.split(b"\r\n\r\n", 1)
+        key = None
+        for line in head.decode('latin-1').split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == 'sec-websocket-key':
+                key = value.strip()
+        if not key:
+            sock.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n"
+        ).encode('ascii'))
+
+        self.server.register(sock)
+        reader = FrameReader(sock, rest)
+        try:
+            while True:
+                fin, opcode, payload = reader.read_frame()
+                if opcode == OP_CLOSE:
+                    break
+                if opcode == OP_PING:
+                    self.server.send_frame(sock, encode_frame(OP_PONG, payload, mask=False))
+        except OSError:
+            pass
+        finally:
+            self.server.unregister(sock)
+
+
+class WebSocketServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """WebSocket-Server, der Textnachrichten an alle Clients verteilt.
+
+    Dient als lokaler Ersatz für den deCONZ-Event-Stream
+    (Replayer, Simulator).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _ServerHandler)
+        # Socket -> Sendesperre; Event-, Replay- und Handler-Threads senden gleichzeitig
+        self.clients = {}
+        self.client_lock = threading.Lock()
+        self.connected = threading.Condition(self.client_lock)
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def register(self, sock):
+        with self.client_lock:
+            self.clients[sock] = threading.Lock()
+            self.connected.notify_all()
+
+    def unregister(self, sock):
+        with self.client_lock:
+            self.clients.pop(sock, None)
+
+    def wait_for_clients(self, count=1, timeout=None):
+        """Warte, bis mindestens `count` Clients verbunden sind."""
+        with self.client_lock:
+            return self.connected.wait_for(lambda: len(self.clients) >= count, timeout)
+
+    def send_frame(self, sock, frame):
+        """Sende einen Frame; Frames verschiedener Threads dürfen sich nicht vermischen."""
+        with self.client_lock:
+            send_lock = self.clients.get(sock)
+        if send_lock is None:
+            return False
+        try:
+            with send_lock:
+                sock.sendall(frame)
+            return True
+        except OSError:
+            self.unregister(sock)
+            return False
+
+    def broadcast(self, text):
+        """Sende eine Textnachricht an alle Clients. Gibt die Anzahl Empfänger zurück."""
+        frame = encode_frame(OP_TEXT, text.encode('utf-8'), mask=False)
+        with self.client_lock:
+            clients = list(self.clients)
+        return sum(1 for sock in clients if self.send_frame(sock, frame))
+
+    def start(self):
+        """Starte den Server in einem Hintergrund-Thread."""
+        # Kurzes Poll-Intervall: stop() wartet sonst bis zu 0,5 s
+        self.thread = threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05},
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Beende den Server und trenne alle Clients."""
+        self.shutdown()
+        with self.client_lock:
+            clients = list(self.clients.items())
+            self.clients.clear()
+        for sock, send_lock in clients:
+            try:
+                with send_lock:
+                    sock.sendall(encode_frame(OP_CLOSE, b"", mask=False))
+                sock.close()
+            except OSError:
+                pass
+        self.server_close()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Aufräumen der deCONZ-Whitelist
+Jeder Lauf des Migrators hat früher einen neuen API-Key
+"deconz-migrator-<Zufallszahl>" angelegt. Dieses Tool findet die verwaisten
+Einträge anhand von Name und letzter Nutzung und löscht sie parallel über
+DELETE /config/whitelist/<key>
+"""
+
+import argparse
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from credentials import CredentialStore, get_bridge_id
+from deconz_client import get_client
+
+DEFAULT_PATTERN = r"^deconz-migrator(-\d+)?$"
+
+
+def parse_date(value):
+    """Datum aus der Whitelist ("2024-05-01T12:00:00", optional mit Z)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).rstrip('Z').split('.')[0])
+    except ValueError:
+        return None
+
+
+def find_stale_keys(whitelist, pattern=DEFAULT_PATTERN, max_age_days=30, keep=(), now=None):
+    """Whitelist-Einträge, die gelöscht werden können.
+
+    Berücksichtigt werden nur Namen, die auf `pattern` passen und deren
+    letzte Nutzung älter als `max_age_days` ist. Keys aus `keep` (der
+    verwendete und gespeicherte Keys) bleiben immer erhalten.
+
+    Returns:
+        Liste von (key, name, letzte Nutzung), älteste zuerst
+    """
+    regex = re.compile(pattern)
+    cutoff = (now or datetime.now()) - timedelta(days=max_age_days)
+    stale = []
+    for key, entry in whitelist.items():
+        if key in keep:
+            continue
+        name = entry.get('name', '')
+        if not regex.search(name):
+            continue
+        last_use = parse_date(entry.get('last use date')) or parse_date(entry.get('create date'))
+        if last_use is not None and last_use > cutoff:
+            continue
+        stale.append((key, name, last_use))
+    stale.sort(key=lambda item: item[2] or datetime.min)
+    return stale
+
+
+def delete_keys(client, keys, workers=8):
+    """Lösche Whitelist-Einträge parallel.
+
+    Returns:
+        Dictionary key -> None bei Erfolg, sonst Fehlermeldung
+    """
+    def delete(key):
+        try:
+            response = client.delete(f"/config/whitelist/{key}")
+            if response.status_code != 200:
+                return key, f"HTTP {response.status_code}"
+            result = response.json()
+            if isinstance(result, list) and result and "error" in result[0]:
+                return key, result[0]["error"].get("description", "Unbekannter Fehler")
+            return key, None
+        except Exception as e:
+            return key, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return dict(executor.map(delete, keys))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Verwaiste deconz-migrator-Einträge aus der deCONZ-Whitelist entfernen"
+    )
+    parser.add_argument("--host", default="192.168.178.76", help="deCONZ-Host")
+    parser.add_argument("--port", type=int, default=4530, help="deCONZ-Port")
+    parser.add_argument("--api-key", help="deCONZ API-Key (Standard: gespeicherter Key)")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN,
+                        help=f"Regulärer Ausdruck für App-Namen (Standard: {DEFAULT_PATTERN})")
+    parser.add_argument("--max-age", type=float, default=30,
+                        help="Nur Einträge, die so viele Tage nicht genutzt wurden (Standard: 30)")
+    parser.add_argument("--workers", type=int, default=8, help="Parallele DELETE-Anfragen (Standard: 8)")
+    parser.add_argument("--dry-run", action="store_true", help="Nur anzeigen, nichts löschen")
+    args = parser.parse_args(argv)
+
+    store = CredentialStore()
+    api_key = args.api_key or store.get(get_bridge_id(args.host, args.port))
+    if not api_key:
+        print("❌ Kein API-Key angegeben und keiner gespeichert (--api-key)")
+        sys.exit(2)
+
+    client = get_client(args.host, args.port, api_key)
+    try:
+        response = client.get("/config")
+        response.raise_for_status()
+        config = response.json()
+    except Exception as e:
+        print(f"❌ Konfiguration konnte nicht abgerufen werden: {e}")
+        sys.exit(2)
+    if 'whitelist' not in config:
+        print("❌ API-Key ungültig (keine Whitelist in /config)")
+        sys.exit(2)
+
+    whitelist = config['whitelist']
+    keep = {api_key} | {entry.get('api_key') for entry in store.load().values()}
+    stale = find_stale_keys(whitelist, args.pattern, args.max_age, keep)
+
+    print(f"📋 Whitelist: {len(whitelist)} Einträge, {len(stale)} verwaist "
+          f"(/config: {len(response.content) / 1024:.1f} KiB)")
+    for key, name, last_use in stale:
+        used = last_use.strftime('%Y-%m-%d') if last_use else "nie"
+        print(f"   {key[:4]}…  {name:<28} zuletzt genutzt: {used}")
+
+    if not stale:
+        print("✅ Nichts aufzuräumen")
+        return
+    if args.dry_run:
+        print(f"\n🔍 Dry-Run: {len(stale)} Einträge würden gelöscht")
+        return
+
+    results = delete_keys(client, [key for key, _, _ in stale], args.workers)
+    failed = {key: error for key, error in results.items() if error}
+    print(f"\n🗑️  {len(results) - len(failed)} Einträge gelöscht")
+    for key, error in failed.items():
+        print(f"❌ {key[:4]}…: {error}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -280,7 +280,7 @@ def main():
         logger.info("🔄 Fallback: Starte Terminal-Version...")
         try:
             from final_interactive import main as terminal_main
-            terminal_main()
+            terminal_main([])
         except ImportError as e2:
             logger.error(f"❌ Terminal-Version auch nicht verfügbar: {e2}")
             return False
@@ -294,7 +294,7 @@ def main():
         logger.info("🔄 Fallback: Starte Terminal-Version...")
         try:
             from final_interactive import main as terminal_main
-            terminal_main()
+            terminal_main([])
         except ImportError as e2:
             logger.error(f"❌ Terminal-Version auch nicht verfügbar: {e2}")
             return False
@@ -101,7 +101,7 @@ def main():
         
         try:
             from final_interactive import main as terminal_main
-            terminal_main()
+            terminal_main([])
         except ImportError as e2:
             print(f"Terminal-Version nicht verfügbar: {e2}")
             print("App kann nicht gestartet werden.")
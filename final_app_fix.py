@@ -116,7 +116,7 @@ def main():
         print("\\n🔄 Fallback: Starte Terminal-Version...")
         try:
             from final_interactive import main as terminal_main
-            terminal_main()
+            terminal_main([])
         except ImportError as e2:
             print(f"❌ Terminal-Version auch nicht verfügbar: {e2}")
             sys.exit(1)
@@ -130,7 +130,7 @@ def main():
         print("\\n🔄 Fallback: Starte Terminal-Version...")
         try:
             from final_interactive import main as terminal_main
-            terminal_main()
+            terminal_main([])
         except ImportError as e2:
             print(f"❌ Terminal-Version auch nicht verfügbar: {e2}")
             sys.exit(1)
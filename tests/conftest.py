@@ -0,0 +1,32 @@
+"""
+Gemeinsame Fixtures: Credential-Store, Lauf-Journal und Kompatibilitäts-Datenbank
+liegen je Test in tmp_path statt im Home-Verzeichnis
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bin"))
+
+import compatibility
+import credentials
+import deconz_client
+import run_journal
+
+
+@pytest.fixture(autouse=True)
+def sandbox(tmp_path, monkeypatch):
+    """Zustand außerhalb des Arbeitsverzeichnisses je Test isolieren; gibt das Verzeichnis zurück."""
+    home = tmp_path / "home"
+    monkeypatch.setattr(credentials, 'CREDENTIALS_FILE', str(home / "credentials.json"))
+    monkeypatch.setattr(run_journal, 'JOURNAL_DIR', str(home / "runs"))
+    monkeypatch.setattr(compatibility, '_index',
+                        compatibility.CompatibilityIndex(database=str(home / "z2m_devices.sqlite")))
+    # Prozessweite Caches: ein wiederverwendeter Port darf keine alten Ergebnisse liefern
+    monkeypatch.setattr(credentials, '_validated', {})
+    monkeypatch.setattr(credentials, '_bridge_ids', {})
+    for registry in ('_clients', '_sessions', '_breakers', '_timeouts', '_caches'):
+        monkeypatch.setattr(deconz_client, registry, {})
+    return home
@@ -0,0 +1,104 @@
+"""
+Tests für den Zigbee2MQTT-Kompatibilitätsindex mit eigenen TSV-Quellen
+"""
+
+import pytest
+
+from compatibility import (COLUMNS, UNSUPPORTED_COLUMNS, CompatibilityIndex, annotate_compatibility,
+                           read_source, unsupported_models)
+
+DEVICES = [
+    ('', 'TRADFRI bulb E27 WS opal 980lm', 'LED1545G12', 'IKEA', 'TRADFRI bulb E27'),
+    ('', 'lumi.sensor_ht', 'WSDCGQ01LM', 'Aqara', 'Temperature and humidity sensor'),
+    ('LUMI', 'lumi.weather', 'WSDCGQ11LM', 'Aqara', 'Temperature, humidity and pressure sensor'),
+    ('_TZ3000_abc', 'TS0201', 'TS0201_tuya', 'Tuya', 'Temperature sensor'),
+    ('', 'TS0201', 'TS0201', 'TuYa', 'Generic temperature sensor'),
+    ('', 'SML001', '9290012607', 'Philips', 'Hue motion sensor "indoor"'),
+]
+UNSUPPORTED = [
+    ('dresden elektronik', 'ConBee II', 'Koordinator, kein Endgerät'),
+    # Eine Z2M-Definition hat Vorrang vor der gepflegten Liste
+    ('', 'SML001', 'veraltet'),
+]
+
+
+def write_tsv(path, columns, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# Kommentar\n")
+        for row in [columns] + rows:
+            f.write("\t".join(row) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = CompatibilityIndex(database=str(tmp_path / "cache" / "z2m.sqlite"),
+                               source=write_tsv(tmp_path / "devices.tsv", COLUMNS, DEVICES),
+                               unsupported=write_tsv(tmp_path / "unsupported.tsv", UNSUPPORTED_COLUMNS,
+                                                     UNSUPPORTED))
+    yield index
+    index.close()
+
+
+def test_lookup_prefers_matching_manufacturer(index):
+    assert index.lookup('_TZ3000_abc', 'TS0201')['model'] == 'TS0201_tuya'
+    assert index.lookup('_TZ3000_xyz', 'TS0201')['model'] == 'TS0201'
+    # Ohne generischen Eintrag passt auch ein anderer Hersteller (gleiche modelid)
+    assert index.lookup('', 'lumi.weather')['model'] == 'WSDCGQ11LM'
+    assert index.lookup('IKEA of Sweden', ' TRADFRI bulb E27 WS opal 980lm ')['supported'] is True
+    assert index.lookup('LUMI', 'lumi.unknown') is None
+    assert index.lookup('LUMI', '') is None
+    assert index.lookup('Philips', 'SML001')['description'] == 'Hue motion sensor "indoor"'
+
+
+def test_unsupported_devices_are_reported_with_reason(index):
+    definition = index.lookup('dresden elektronik', 'ConBee II')
+    assert definition == {'model': None, 'vendor': None, 'description': 'Koordinator, kein Endgerät',
+                          'supported': False}
+
+    devices = [
+        {'manufacturer': 'dresden elektronik', 'model': 'ConBee II'},
+        {'manufacturer': 'LUMI', 'model': 'lumi.sensor_ht'},
+        {'manufacturer': 'LUMI', 'model': 'lumi.sensor_ht.v2'},
+    ]
+    data = annotate_compatibility(index)({'devices': devices})
+    assert [device['z2m_supported'] for device in devices] == [False, True, None]
+    assert devices[1]['z2m_model'] == 'WSDCGQ01LM'
+    assert data['unsupported'] == devices[:1]
+    assert data['unknown'] == devices[2:]
+    assert unsupported_models(data['unsupported'], index) == [
+        ('dresden elektronik', 'ConBee II', 1, 'Koordinator, kein Endgerät')]
+
+
+def test_candidates_find_similar_supported_models(index):
+    candidates = index.candidates('lumi.sensor_ht.agl02')
+    assert candidates[0]['modelid'] == 'lumi.sensor_ht'
+    assert all(candidates[i]['score'] >= candidates[i + 1]['score'] for i in range(len(candidates) - 1))
+    assert 'ConBee II' not in [candidate['modelid'] for candidate in index.candidates('ConBee')]
+    assert index.candidates('zzzz') == []
+    assert index.candidates('') == []
+
+
+def test_index_is_rebuilt_when_source_changes(index, tmp_path):
+    assert index.lookup('', 'lumi.vibration') is None
+    index.close()
+    # Neue Zeile: Dateigröße und damit die Signatur der Quelle ändern sich
+    write_tsv(tmp_path / "devices.tsv", COLUMNS,
+              DEVICES + [('', 'lumi.vibration', 'DJT11LM', 'Aqara', 'Vibration sensor')])
+    assert index.lookup('', 'lumi.vibration')['model'] == 'DJT11LM'
+
+
+def test_read_source_rejects_missing_columns(tmp_path):
+    source = write_tsv(tmp_path / "broken.tsv", ('manufacturer', 'modelid'), [('LUMI', 'lumi.weather')])
+    with pytest.raises(ValueError, match="Spalten fehlen"):
+        read_source(source)
+
+
+def test_unwritable_cache_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    index = CompatibilityIndex(database=str(blocker / "z2m.sqlite"),
+                               source=write_tsv(tmp_path / "devices.tsv", COLUMNS, DEVICES),
+                               unsupported=write_tsv(tmp_path / "unsupported.tsv", UNSUPPORTED_COLUMNS, []))
+    assert index.lookup('', 'SML001')['model'] == '9290012607'
+    index.close()
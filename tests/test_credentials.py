@@ -0,0 +1,70 @@
+"""
+Tests für die API-Key-Prüfung und den Credential-Store gegen den deCONZ-Simulator
+"""
+
+import json
+import os
+import stat
+
+import pytest
+import requests
+
+from credentials import (CredentialStore, obtain_api_key, remember_api_key, stored_api_key,
+                         validate_api_key)
+from deconz_simulator import DeconzSimulator, FaultProfile, generate_fleet
+
+
+def simulator(**kwargs):
+    return DeconzSimulator(generate_fleet(10, seed=1), api_keys=("GOOD",), **kwargs)
+
+
+def test_validate_api_key_distinguishes_valid_and_public_config():
+    with simulator() as sim:
+        assert validate_api_key(sim.host, sim.port, "GOOD") is True
+        # Unbekannter Key: deCONZ antwortet mit HTTP 200, aber nur der öffentlichen Konfiguration
+        assert validate_api_key(sim.host, sim.port, "UNKNOWN") is False
+
+
+def test_validate_api_key_raises_on_unclear_answer_without_caching():
+    with simulator(faults=FaultProfile(error_rate=1.0)) as sim:
+        with pytest.raises(requests.HTTPError):
+            validate_api_key(sim.host, sim.port, "GOOD")
+        sim.faults = FaultProfile()
+        assert validate_api_key(sim.host, sim.port, "GOOD") is True
+
+
+def test_stored_api_key_survives_gateway_errors(sandbox):
+    store = CredentialStore()
+    with simulator() as sim:
+        remember_api_key(sim.host, sim.port, "GOOD", store)
+        sim.faults = FaultProfile(error_rate=1.0)
+        assert stored_api_key(sim.host, sim.port, store) is None
+        # Der Key bleibt für den nächsten Lauf erhalten
+        assert CredentialStore().get(sim.fleet['config']['bridgeid'].upper()) == "GOOD"
+        sim.faults = FaultProfile()
+        assert stored_api_key(sim.host, sim.port, store) == "GOOD"
+    mode = os.stat(store.filename).st_mode
+    assert not mode & (stat.S_IRWXG | stat.S_IRWXO)
+
+
+def test_stored_api_key_removes_revoked_key_unless_read_only():
+    store = CredentialStore()
+    with simulator() as sim:
+        remember_api_key(sim.host, sim.port, "REVOKED", store)
+        bridge_id = sim.fleet['config']['bridgeid'].upper()
+
+        assert stored_api_key(sim.host, sim.port, store, read_only=True) is None
+        assert CredentialStore().get(bridge_id) == "REVOKED"
+
+        assert stored_api_key(sim.host, sim.port, store) is None
+        assert CredentialStore().get(bridge_id) is None
+
+
+def test_obtain_api_key_pairs_and_remembers_new_key(sandbox):
+    with simulator() as sim:
+        api_key = obtain_api_key(sim.host, sim.port, lambda host, port: "GOOD")
+        assert api_key == "GOOD"
+        with open(sandbox / "credentials.json", encoding='utf-8') as f:
+            gateways = json.load(f)['gateways']
+        entry = gateways[sim.fleet['config']['bridgeid'].upper()]
+        assert (entry['api_key'], entry['host'], entry['port']) == ("GOOD", sim.host, sim.port)
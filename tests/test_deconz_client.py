@@ -0,0 +1,82 @@
+"""
+Tests für Wiederholungen, Circuit Breaker und Fristen des deCONZ-Clients gegen den Simulator
+"""
+
+import time
+
+import pytest
+import requests
+
+from deconz_client import (CircuitBreaker, DeadlineExceeded, DeconzClient, GatewayUnavailable,
+                           RetryPolicy, add_request_hook, deadline, remove_request_hook)
+from deconz_simulator import DeconzSimulator, FaultProfile, generate_fleet
+
+FAST_RETRY = RetryPolicy(attempts=3, backoff=0.01)
+
+
+def simulator(**kwargs):
+    return DeconzSimulator(generate_fleet(10, seed=11), api_keys=("K",), **kwargs)
+
+
+def client(sim, **kwargs):
+    return DeconzClient(sim.host, sim.port, "K", **kwargs)
+
+
+def test_get_is_retried_until_gateway_recovers():
+    with simulator(faults=FaultProfile(error_rate=1.0)) as sim:
+        def recover(record):
+            if record['status'] == 503:
+                sim.faults = FaultProfile()
+        add_request_hook(recover)
+        try:
+            response = client(sim).get("/sensors", retry=FAST_RETRY)
+        finally:
+            remove_request_hook(recover)
+        assert response.status_code == 200
+        assert sim.requests["GET /api/K/sensors"] == 2
+
+
+def test_retries_are_limited_and_return_last_response():
+    with simulator(faults=FaultProfile(error_rate=1.0)) as sim:
+        breaker = CircuitBreaker(threshold=2)
+        response = client(sim, breaker=breaker).get("/sensors", retry=FAST_RETRY)
+        assert response.status_code == 503
+        assert sim.requests["GET /api/K/sensors"] == 3
+        # HTTP-Fehler zählen nicht für den Circuit Breaker
+        assert not breaker.is_open
+
+
+def test_post_is_not_retried_after_gateway_answered():
+    with simulator(faults=FaultProfile(error_rate=1.0)) as sim:
+        response = client(sim).post("/groups", json={"name": "Test"}, retry=FAST_RETRY)
+        assert response.status_code == 503
+        assert sim.requests["POST /api/K/groups"] == 1
+
+
+def test_circuit_breaker_opens_after_timeouts_and_recovers():
+    with simulator(faults=FaultProfile(timeout_rate=1.0, hang=0.5)) as sim:
+        breaker = CircuitBreaker(threshold=2, cooldown=0.3)
+        gateway = client(sim, breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(requests.Timeout):
+                gateway.get("/sensors", timeout=0.1, retry=RetryPolicy(attempts=1))
+        assert breaker.is_open
+
+        with pytest.raises(GatewayUnavailable):
+            gateway.get("/lights", timeout=0.1)
+        assert "GET /api/K/lights" not in sim.requests
+
+        # Nach der Sperrzeit darf eine Probeanfrage durch; Erfolg schließt den Breaker
+        sim.faults = FaultProfile()
+        time.sleep(0.3)
+        assert gateway.get("/lights").status_code == 200
+        assert breaker.failures == 0 and not breaker.is_open
+
+
+def test_deadline_limits_request_including_retries():
+    with simulator(faults=FaultProfile(timeout_rate=1.0, hang=2.0)) as sim:
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            with deadline(0.3):
+                client(sim).get("/sensors", retry=FAST_RETRY)
+        assert time.monotonic() - start < 1.0
@@ -0,0 +1,105 @@
+"""
+Tests für den strukturellen Konfigurationsvergleich und den Dry-Run von headless_migrate
+"""
+
+import json
+import os
+
+import pytest
+
+import deconz_client
+import headless_migrate
+from config_diff import diff_configs, has_changes, summarize
+from credentials import CredentialStore, remember_api_key
+from deconz_simulator import DeconzSimulator, generate_fleet
+
+
+def test_diff_configs_matches_devices_by_type_and_id():
+    old = {'mqtt': {'server': 'mqtt://old'},
+           'advanced': {'network_key': [1, 2, 3]},
+           'devices': [{'type': 'light', 'id': '1', 'name': 'Lampe'},
+                       {'type': 'sensor', 'id': '1', 'name': 'Sensor'},
+                       {'type': 'sensor', 'id': '2', 'name': 'Alt'}]}
+    new = {'mqtt': {'server': 'mqtt://new'},
+           'advanced': {'network_key': [4, 5, 6]},
+           'devices': [{'type': 'sensor', 'id': '1', 'name': 'Sensor'},
+                       {'type': 'light', 'id': '1', 'name': 'Deckenlampe', 'model': 'LCT001'},
+                       {'type': 'light', 'id': '2', 'name': 'Neu'}]}
+
+    diff = diff_configs(old, new, ignore={'advanced.network_key'})
+    assert [entry['name'] for entry in diff['added']] == ['Neu']
+    assert [entry['name'] for entry in diff['removed']] == ['Alt']
+    assert diff['changed'] == [(new['devices'][1], {'name': ('Lampe', 'Deckenlampe'),
+                                                    'model': (None, 'LCT001')})]
+    assert diff['settings'] == {'mqtt.server': ('mqtt://old', 'mqtt://new')}
+    assert summarize(diff) == {'added': 1, 'removed': 1, 'changed': 1, 'settings': 1}
+
+    # Ohne vorhandene Datei ist alles neu
+    assert summarize(diff_configs(None, new))['added'] == 3
+    assert not has_changes(diff_configs(new, new))
+
+
+def migrate(sim, *args):
+    """headless_migrate.main mit --json gegen den Simulator; gibt den Exit-Code zurück."""
+    with pytest.raises(SystemExit) as exit_info:
+        headless_migrate.main(["--host", sim.host, "--port", str(sim.port), "--json"] + list(args))
+    return exit_info.value.code
+
+
+def result(capsys):
+    return json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+
+
+def files(directory):
+    return {name: (directory / name).read_bytes() for name in sorted(os.listdir(directory))}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    directory = tmp_path / "work"
+    directory.mkdir()
+    monkeypatch.chdir(directory)
+    # Jeder Lauf soll den aktuellen Stand des Simulators sehen
+    monkeypatch.setattr(deconz_client, '_cache_ttl', 0)
+    return directory
+
+
+def test_dry_run_reports_changes_without_writing(workdir, sandbox, capsys):
+    with DeconzSimulator(generate_fleet(30, seed=7), api_keys=("K",)) as sim:
+        assert migrate(sim, "--api-key", "K") == headless_migrate.EXIT_OK
+        capsys.readouterr()
+        before = files(workdir)
+        assert "configuration.yaml" in before
+        journals = sorted(os.listdir(sandbox / "runs"))
+
+        light_id, light = sorted(sim.fleet['lights'].items())[0]
+        sensor_id = sorted(sim.fleet['sensors'])[0]
+        sim.delete_resource('sensors', sensor_id)
+        sim.delete_resource('lights', light_id)
+        sim.add_resource('lights', dict(light, name="Umbenannt"), light_id)
+        sim.add_resource('lights', dict(light, name="Neue Lampe", uniqueid="00:00:00:00:00:00:00:99-0b"))
+
+        assert migrate(sim, "--api-key", "K", "--dry-run") == headless_migrate.EXIT_OK
+    counts = result(capsys)['dry_run']
+    assert (counts['added'], counts['removed'], counts['changed']) == (1, 1, 1)
+    assert files(workdir) == before
+    assert sorted(os.listdir(sandbox / "runs")) == journals
+
+
+def test_dry_run_with_pair_does_not_store_api_key(workdir, sandbox, capsys):
+    with DeconzSimulator(generate_fleet(10, seed=8), link_button=True) as sim:
+        assert migrate(sim, "--pair", "--pair-window", "5", "--dry-run") == headless_migrate.EXIT_OK
+    assert result(capsys)['dry_run']['added'] > 0
+    assert files(workdir) == {}
+    assert not (sandbox / "credentials.json").exists()
+
+
+def test_dry_run_keeps_revoked_stored_key(workdir, capsys):
+    store = CredentialStore()
+    with DeconzSimulator(generate_fleet(10, seed=9), api_keys=("K",)) as sim:
+        remember_api_key(sim.host, sim.port, "REVOKED", store)
+        assert migrate(sim, "--dry-run") == headless_migrate.EXIT_AUTH
+        assert CredentialStore().get(sim.fleet['config']['bridgeid'].upper()) == "REVOKED"
+        # Ohne --pair wird nicht auf den Link-Button gewartet
+        assert "POST /api" not in sim.requests
+    assert result(capsys)['status'] == 'error'
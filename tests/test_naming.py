@@ -0,0 +1,87 @@
+"""
+Tests für die Vergabe der Friendly Names (Eindeutigkeit und Stabilität über mehrere Läufe)
+"""
+
+import random
+
+from deconz_simulator import generate_fleet
+from migration_engine import FriendlyNames
+from migration_engine.naming import normalize_name
+from snapshot import device_from_resource
+
+
+def fleet_devices(seed=5):
+    fleet = generate_fleet(200, seed=seed)
+    return [device_from_resource(resource_id, resource, collection[:-1])
+            for collection in ("lights", "sensors")
+            for resource_id, resource in fleet[collection].items()]
+
+
+def device(device_type, device_id, name, room=None, unique_id=None):
+    return {'type': device_type, 'id': device_id, 'name': name, 'room': room, 'unique_id': unique_id}
+
+
+def assigned(devices):
+    return {(entry['type'], entry['id']): entry['friendly_name'] for entry in devices}
+
+
+def test_names_do_not_depend_on_device_order():
+    devices = fleet_devices()
+    FriendlyNames().assign(devices)
+    expected = assigned(devices)
+
+    shuffled = fleet_devices()
+    random.Random(1).shuffle(shuffled)
+    FriendlyNames().assign(shuffled)
+    assert assigned(shuffled) == expected
+    assert len({name.casefold() for name in expected.values()}) == len(expected)
+
+
+def test_collisions_get_room_prefix_then_number():
+    devices = [
+        device('light', '1', 'Deckenlampe', 'Küche', '00:17:88:01:00:00:00:01-0b'),
+        device('light', '2', 'Deckenlampe', 'Flur', '00:17:88:01:00:00:00:02-0b'),
+        device('light', '3', 'Deckenlampe', 'Flur'),
+        # Sensor ohne Raum erbt ihn vom Licht desselben Geräts
+        device('sensor', '4', 'Deckenlampe', None, '00:17:88:01:00:00:00:01-02-0406'),
+        device('sensor', '5', 'Bad/Feuchte #1'),
+    ]
+    renamed = FriendlyNames().assign(devices)
+    assert [entry['friendly_name'] for entry in devices] == [
+        'Küche Deckenlampe', 'Flur Deckenlampe', 'Flur Deckenlampe 2', 'Küche Deckenlampe 2', 'Bad-Feuchte -1']
+    assert renamed == 5
+    assert normalize_name(' a//b ++ c ') == 'a-b - c'
+
+
+def test_saved_names_stay_stable_across_runs(tmp_path):
+    filename = str(tmp_path / "configuration.names.json")
+    first = [device('light', '1', 'Lampe', 'Bad'), device('light', '2', 'Lampe', 'Flur')]
+    names = FriendlyNames(exclude='stale')
+    names.assign(first)
+    names.save(filename)
+
+    # Neues Gerät mit gleichem Namen: vorhandene Friendly Names bleiben unverändert,
+    # der Name ohne Raum ist noch frei
+    second = [device('light', '3', 'Lampe', 'Bad')] + [dict(entry) for entry in first]
+    loaded = FriendlyNames.load(filename)
+    assert loaded.exclude == 'stale'
+    loaded.assign(second)
+    assert assigned(second) == {('light', '1'): 'Bad Lampe', ('light', '2'): 'Flur Lampe',
+                                ('light', '3'): 'Lampe'}
+
+    # Umbenennen in deCONZ verwirft den gespeicherten Namen
+    second[1]['name'] = 'Stehlampe'
+    loaded.assign(second)
+    assert second[1]['friendly_name'] == 'Stehlampe'
+
+
+def test_add_and_release_for_sync_daemon():
+    config = {'devices': [{'type': 'light', 'id': '1', 'name': 'Lampe', 'friendly_name': 'Lampe'}]}
+    names = FriendlyNames.from_config(config)
+    new = device('light', '2', 'Lampe', 'Flur')
+    assert names.add(new) == 'Flur Lampe'
+    assert names.add(dict(new)) == 'Flur Lampe'
+
+    names.release({'type': 'light', 'id': '1'})
+    assert names.add(device('light', '3', 'Lampe')) == 'Lampe'
+    assert FriendlyNames.load("/nonexistent/names.json").saved == {}
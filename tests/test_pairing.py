@@ -0,0 +1,88 @@
+"""
+Tests für das Pairing per Link-Button gegen den deCONZ-Simulator
+"""
+
+import threading
+
+import pytest
+
+from deconz_simulator import DeconzSimulator, FaultProfile, generate_fleet
+from pairing import GatewayBusy, PairingError, pair_gateway, pair_gateways, request_api_key
+
+
+class Response:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class Client:
+    """Liefert eine feste Antwort auf POST /api."""
+
+    def __init__(self, status_code, payload):
+        self.response = Response(status_code, payload)
+
+    def post(self, **kwargs):
+        return self.response
+
+
+def collect(events):
+    return lambda host, port, status, detail: events.append((status, detail))
+
+
+def test_pair_gateway_detects_button_pressed_during_window():
+    with DeconzSimulator(generate_fleet(5, seed=2)) as sim:
+        threading.Timer(0.3, sim.press_link_button).start()
+        events = []
+        api_key = pair_gateway(sim.host, sim.port, window=5, on_status=collect(events),
+                               min_interval=0.05, max_interval=0.1)
+        assert api_key in sim.fleet['config']['whitelist']
+        assert events[-1][0] == "success"
+        assert any(status == "waiting" for status, _ in events)
+
+
+def test_pair_gateway_keeps_polling_through_gateway_errors():
+    with DeconzSimulator(generate_fleet(5, seed=2), faults=FaultProfile(error_rate=1.0)) as sim:
+        def recover():
+            sim.faults = FaultProfile()
+            sim.press_link_button()
+        threading.Timer(0.4, recover).start()
+        events = []
+        api_key = pair_gateway(sim.host, sim.port, window=5, on_status=collect(events),
+                               min_interval=0.05, max_interval=0.1)
+        assert api_key in sim.fleet['config']['whitelist']
+        # Gleiche Fehler werden nur einmal gemeldet
+        assert [detail for status, detail in events if status == "error"] == ["HTTP 503"]
+        assert sim.requests["POST /api"] > 2
+
+
+def test_pair_gateway_times_out_without_button():
+    with DeconzSimulator(generate_fleet(5, seed=2)) as sim:
+        events = []
+        assert pair_gateway(sim.host, sim.port, window=0.3, on_status=collect(events),
+                            min_interval=0.05, max_interval=0.1) is None
+        assert events[-1] == ("timeout", 0.3)
+
+
+def test_pair_gateways_pairs_all_gateways_in_parallel():
+    with DeconzSimulator(generate_fleet(5, seed=3), link_button=True) as first, \
+            DeconzSimulator(generate_fleet(5, seed=4)) as second:
+        results = pair_gateways([(first.host, first.port), (second.host, second.port)], window=0.5)
+    assert results[(first.host, first.port)] in first.fleet['config']['whitelist']
+    assert results[(second.host, second.port)] is None
+
+
+def test_request_api_key_classifies_answers():
+    assert request_api_key(Client(200, [{"success": {"username": "KEY"}}])) == "KEY"
+    assert request_api_key(Client(403, [{"error": {"type": 101, "description": "link button not pressed"}}])) is None
+    with pytest.raises(GatewayBusy):
+        request_api_key(Client(503, None))
+    with pytest.raises(GatewayBusy):
+        request_api_key(Client(200, {}))
+    # Andere deCONZ-Fehler sind endgültig und brechen das Pairing ab
+    with pytest.raises(PairingError) as error:
+        request_api_key(Client(403, [{"error": {"type": 7, "description": "invalid value"}}]))
+    assert not isinstance(error.value, GatewayBusy)
@@ -0,0 +1,70 @@
+"""
+Tests für die MQTT-Verifikation über den ReplayBroker (ohne Broker und paho-mqtt)
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bin"))
+
+from verify_mqtt import LiveVerifier, run_replay
+
+DEVICES = [
+    {'id': '1', 'name': 'Küche Lampe', 'type': 'light', 'unique_id': '00:17:88:01:00:00:00:01-0b'},
+    {'id': '2', 'name': 'Flur Sensor', 'type': 'sensor', 'unique_id': '00:15:8d:00:00:00:00:02-01-0402'},
+    {'id': '3', 'name': 'Bad Sensor', 'type': 'sensor', 'unique_id': '00:15:8d:00:00:00:00:03-01-0402'},
+]
+
+
+def bridge_device(ieee, friendly_name, interview_completed=True):
+    return {'ieee_address': ieee, 'friendly_name': friendly_name, 'type': 'EndDevice',
+            'interview_completed': interview_completed, 'interviewing': False}
+
+
+def write_recording(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return str(path)
+
+
+def replay(tmp_path, records):
+    verifier = LiveVerifier(DEVICES)
+    run_replay(verifier, write_recording(tmp_path / "mqtt.jsonl", records))
+    return verifier
+
+
+def test_availability_before_bridge_devices_and_nested_names(tmp_path):
+    verifier = replay(tmp_path, [
+        # Retained Availability kommt oft vor bridge/devices an
+        {'topic': 'zigbee2mqtt/eg/kueche/lampe/availability', 'payload': {'state': 'offline'}},
+        {'topic': 'zigbee2mqtt/Flur Sensor/availability', 'payload': 'online'},
+        {'topic': 'zigbee2mqtt/bridge/availability', 'payload': 'online'},
+        {'topic': 'zigbee2mqtt/bridge/devices', 'payload': [
+            {'ieee_address': '0x0000000000000000', 'type': 'Coordinator'},
+            bridge_device('0x0017880100000001', 'eg/kueche/lampe'),
+            bridge_device('0x00158d0000000002', 'Flur Sensor'),
+            bridge_device('0x00158d0000000003', 'Bad Sensor', interview_completed=False),
+        ]},
+        {'topic': 'zigbee2mqtt/eg/kueche/lampe', 'payload': {'state': 'ON'}},
+    ])
+
+    report = verifier.report()
+    assert report['counts'] == {'joined': 1, 'interviewing': 1, 'offline': 1, 'missing': 0}
+    assert [device['name'] for device in report['offline']] == ['Küche Lampe']
+    assert [device['name'] for device in report['joined']] == ['Flur Sensor']
+
+
+def test_availability_updates_after_bridge_devices(tmp_path):
+    verifier = replay(tmp_path, [
+        {'topic': 'zigbee2mqtt/bridge/devices', 'payload': [
+            bridge_device('0x0017880100000001', 'eg/kueche/lampe'),
+        ]},
+        {'topic': 'zigbee2mqtt/eg/kueche/lampe/availability', 'payload': 'offline'},
+        {'topic': 'zigbee2mqtt/eg/kueche/lampe/availability', 'payload': 'online'},
+        {'topic': 'other/eg/kueche/lampe/availability', 'payload': 'offline'},
+    ])
+
+    assert verifier.counts == {'joined': 1, 'interviewing': 0, 'offline': 0, 'missing': 2}
+    assert verifier.messages == 3